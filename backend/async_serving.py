@@ -0,0 +1,516 @@
+# backend/async_serving.py
+#
+# The "async" serving mode: an asyncio front end in front of the same
+# request handler class the other modes use.
+#
+# The event loop owns every client socket. It reads and parses request
+# heads itself, so an idle keep-alive connection costs a small buffer and a
+# timer rather than a parked thread, and thousands of them are cheap. Each
+# parsed request is handed to a bounded thread pool, where the handler's
+# do_GET()/do_POST()/... run exactly as under the threaded mode: the routes,
+# middleware and blocking MySQL calls are untouched. At most `max_workers`
+# requests run and `queue_depth` wait for a thread; past that a request gets
+# the same immediate 503 as the threaded mode.
+#
+# Connections stay open between requests (HTTP/1.1 keep-alive, and
+# pipelined requests are answered in order) until the client closes them,
+# the handler asks for close, or they sit idle for `keepalive_timeout`
+# seconds. A request head has to arrive within `header_timeout` seconds.
+#
+# Flow control runs both ways. A handler thread writing to a client that is
+# not reading blocks once the loop holds `WRITE_BUFFER` bytes for it, and
+# gives up after `io_timeout` seconds; a client uploading faster than the
+# handler reads stops being read once `READ_BUFFER` bytes are waiting.
+import asyncio
+import io
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.serving import OVERLOADED_RESPONSE
+from backend.utils import metrics
+from backend.utils.logger import get_logger
+
+log = get_logger("serving")
+
+# Largest request line plus headers accepted; larger gets 431
+MAX_HEAD_BYTES = 64 * 1024
+# Bytes a handler may have queued on the loop for one client before it waits
+WRITE_BUFFER = 256 * 1024
+# Response bytes a handler thread collects before handing them to the loop
+FLUSH_BYTES = 64 * 1024
+# Unread request body bytes held before the client is no longer read
+READ_BUFFER = 256 * 1024
+
+_HEAD_TOO_LARGE = (
+    b"HTTP/1.1 431 Request Header Fields Too Large\r\n"
+    b"Connection: close\r\nContent-Length: 0\r\n\r\n"
+)
+
+connections_open = metrics.registry.gauge(
+    "http_connections_open", "Client connections held by the asyncio front end (SERVER_MODE=async).")
+
+
+class _LoopWriter:
+    """wfile for the few responses the loop sends itself (parse errors, 100 Continue)."""
+
+    def __init__(self, transport):
+        self._transport = transport
+        self.bytes_written = 0
+
+    def write(self, data):
+        self._transport.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class _ResponseWriter:
+    """wfile for a handler thread.
+
+    Writes collect until flush() or FLUSH_BYTES, so a typical response
+    (headers and body) reaches the loop in one hop, together with the end of
+    the request. flush() blocks while the client has WRITE_BUFFER bytes
+    outstanding and raises BrokenPipeError once the connection is gone, like
+    a socket would.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._pending = []
+        self._size = 0
+        self.bytes_written = 0
+
+    def write(self, data):
+        self._pending.append(bytes(data))
+        self._size += len(data)
+        self.bytes_written += len(data)
+        if self._size >= FLUSH_BYTES:
+            self.flush()
+        return len(data)
+
+    def take(self):
+        """Everything written since the last flush."""
+        data = b"".join(self._pending)
+        self._pending = []
+        self._size = 0
+        return data
+
+    def flush(self):
+        if self._pending:
+            self._connection.send(self.take())
+
+
+class _RequestBody:
+    """rfile for a handler thread: the connection's unread bytes, as they arrive."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.consumed = 0
+
+    def read(self, size=-1):
+        data = self._connection.take(size, newline=False)
+        self.consumed += len(data)
+        return data
+
+    def readline(self, size=-1):
+        data = self._connection.take(size, newline=True)
+        self.consumed += len(data)
+        return data
+
+
+class _Connection(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.loop = server.loop
+        self.transport = None
+        self.client_address = None
+        self.closed = False
+
+        # Received and not yet parsed or read by the handler. Shared with the
+        # handler thread while a request runs, under `_lock`
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._readable = threading.Condition(self._lock)
+        self._writable = threading.Condition(self._lock)
+        self._queued = 0
+        self._write_paused = False
+        self._read_paused = False
+
+        self._busy = False
+        self._timer = None
+        self._waiting_for_head = False
+        # Handed over to a long-lived writer (AsyncHTTPServer.detach)
+        self.detached = False
+
+    # -- loop side ---------------------------------------------------------
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.client_address = transport.get_extra_info("peername") or ("", 0)
+        server = self.server
+        server.connections.add(self)
+        connections_open.inc()
+        if len(server.connections) > server.max_connections:
+            server.rejected_requests += 1
+            transport.write(OVERLOADED_RESPONSE)
+            transport.close()
+            return
+        transport.set_write_buffer_limits(high=WRITE_BUFFER)
+        self._set_timer(server.keepalive_timeout)
+
+    def connection_lost(self, exc):
+        self.server.connections.discard(self)
+        connections_open.dec()
+        self._cancel_timer()
+        with self._lock:
+            self.closed = True
+            self._readable.notify_all()
+            self._writable.notify_all()
+
+    def pause_writing(self):
+        with self._lock:
+            self._write_paused = True
+
+    def resume_writing(self):
+        with self._lock:
+            self._write_paused = False
+            self._writable.notify_all()
+
+    def data_received(self, data):
+        if self.detached:
+            # Nothing more is read from a detached connection
+            return
+        with self._lock:
+            self._buffer += data
+            self._readable.notify_all()
+            busy = self._busy
+            if busy and len(self._buffer) > READ_BUFFER and not self._read_paused:
+                # The handler is not keeping up with the upload
+                self._read_paused = True
+                self.transport.pause_reading()
+        if not busy:
+            self._next_request()
+
+    def _set_timer(self, seconds):
+        self._cancel_timer()
+        if seconds:
+            self._timer = self.loop.call_later(seconds, self._timed_out)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _timed_out(self):
+        self._timer = None
+        if not self._busy:
+            self.transport.close()
+
+    def _next_request(self):
+        """Parse a buffered request head, if a whole one is there, and start it."""
+        if self.closed or self._busy or self.transport.is_closing():
+            return
+        buffer = self._buffer
+        end = buffer.find(b"\r\n\r\n")
+        if end < 0:
+            if len(buffer) > MAX_HEAD_BYTES:
+                self.transport.write(_HEAD_TOO_LARGE)
+                self.transport.close()
+            elif buffer and not self._waiting_for_head:
+                # Part of a head: it has header_timeout to arrive in full
+                self._waiting_for_head = True
+                self._set_timer(self.server.header_timeout)
+            return
+        if end > MAX_HEAD_BYTES:
+            self.transport.write(_HEAD_TOO_LARGE)
+            self.transport.close()
+            return
+
+        with self._lock:
+            head = bytes(buffer[:end + 4])
+            del buffer[:end + 4]
+        self._waiting_for_head = False
+        self._cancel_timer()
+
+        handler = self.server.new_handler(self, head)
+        if handler is None:
+            # Not a usable request; parse_request() has answered it
+            self.transport.close()
+            return
+        if self.server.in_flight >= self.server.max_workers + self.server.queue_depth:
+            self.server.rejected_requests += 1
+            self.transport.write(OVERLOADED_RESPONSE)
+            self.transport.close()
+            return
+
+        self._busy = True
+        self.server.in_flight += 1
+        try:
+            self.server.executor.submit(self.server.run_handler, self, handler)
+        except RuntimeError:
+            # Shutting down
+            self.server.in_flight -= 1
+            self.transport.close()
+
+    def request_done(self, handler, data):
+        """Back on the loop after a handler returns: send the rest, keep the connection or close it."""
+        self.server.in_flight -= 1
+        self._busy = False
+        if self.closed:
+            return
+        if data:
+            self.transport.write(data)
+        if self.detached:
+            # Its new owner closes it
+            return
+        close = handler.close_connection or self.server.stopping
+        if not close:
+            close = not self._skip_unread_body(handler)
+        if close:
+            self.transport.close()
+            return
+        with self._lock:
+            if self._read_paused:
+                self._read_paused = False
+                self.transport.resume_reading()
+        self._set_timer(self.server.keepalive_timeout)
+        self._next_request()
+
+    def _skip_unread_body(self, handler):
+        """Drop whatever of the request body the handler left unread; False if that is not possible."""
+        if "chunked" in handler.headers.get("Transfer-Encoding", "").lower():
+            # No way to find the end without parsing it; rare (imports)
+            return False
+        try:
+            length = int(handler.headers.get("Content-Length", 0))
+        except ValueError:
+            return False
+        unread = length - handler.rfile.consumed
+        if unread <= 0:
+            return True
+        with self._lock:
+            if len(self._buffer) < unread:
+                return False
+            del self._buffer[:unread]
+        return True
+
+    # -- handler thread side ----------------------------------------------
+
+    def send(self, data):
+        timeout = self.server.io_timeout
+        with self._lock:
+            if not self._writable.wait_for(
+                lambda: self.closed or (not self._write_paused and self._queued < WRITE_BUFFER),
+                timeout,
+            ):
+                self.loop.call_soon_threadsafe(self.transport.abort)
+                raise BrokenPipeError("client stopped reading")
+            if self.closed:
+                raise BrokenPipeError("client disconnected")
+            self._queued += len(data)
+        self.loop.call_soon_threadsafe(self._write, data)
+
+    def _write(self, data):
+        with self._lock:
+            self._queued -= len(data)
+            self._writable.notify_all()
+        if not self.transport.is_closing():
+            self.transport.write(data)
+
+    def take(self, size, newline):
+        """Up to `size` bytes (all of a line with `newline`); b"" once the client is gone."""
+        timeout = self.server.io_timeout
+
+        def ready():
+            if self.closed:
+                return True
+            if size is not None and 0 <= size <= len(self._buffer):
+                return True
+            return newline and b"\n" in self._buffer
+
+        with self._lock:
+            if size is None or size < 0:
+                if not newline:
+                    raise ValueError("read() of a connection needs a size")
+            if not self._readable.wait_for(ready, timeout):
+                self.loop.call_soon_threadsafe(self.transport.abort)
+                raise TimeoutError("request body not received")
+            buffer = self._buffer
+            end = len(buffer) if size is None or size < 0 else min(size, len(buffer))
+            if newline:
+                found = buffer.find(b"\n", 0, end)
+                if found >= 0:
+                    end = found + 1
+            data = bytes(buffer[:end])
+            del buffer[:end]
+            if self._read_paused and len(buffer) < READ_BUFFER // 2:
+                self._read_paused = False
+                self.loop.call_soon_threadsafe(self.transport.resume_reading)
+        return data
+
+
+class _LoopSink:
+    """Non-blocking writer for a detached connection, used from any thread.
+
+    send() never waits: while the transport is above its high-water mark the
+    data stays here, and `pending` tells the owner how far behind the client
+    is so it can give up on it.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._backlog = bytearray()
+
+    @property
+    def closed(self):
+        return self._connection.closed
+
+    @property
+    def pending(self):
+        return len(self._backlog) + self._connection._queued
+
+    def send(self, data):
+        self._backlog += data
+        return self.flush()
+
+    def flush(self):
+        connection = self._connection
+        with connection._lock:
+            if connection.closed:
+                return False
+            if not self._backlog or connection._write_paused:
+                return True
+            data = bytes(self._backlog)
+            self._backlog.clear()
+            connection._queued += len(data)
+        try:
+            connection.loop.call_soon_threadsafe(connection._write, data)
+        except RuntimeError:
+            # The loop has already closed
+            return False
+        return True
+
+    def close(self):
+        try:
+            self._connection.loop.call_soon_threadsafe(self._connection.transport.close)
+        except RuntimeError:
+            pass
+
+
+class AsyncHTTPServer:
+    def __init__(self, handler_class, host, port, max_workers=16, queue_depth=64, backlog=128,
+                 max_connections=10000, keepalive_timeout=75.0, header_timeout=10.0, io_timeout=30.0):
+        self.handler_class = handler_class
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.backlog = backlog
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.header_timeout = header_timeout
+        self.io_timeout = io_timeout
+
+        self.loop = None
+        self.executor = None
+        self.connections = set()
+        self.in_flight = 0
+        self.rejected_requests = 0
+        self.stopping = False
+        self._stopped = None
+
+    def new_handler(self, connection, head):
+        """A handler instance for one parsed request head; None if parse_request() refused it."""
+        handler = self.handler_class.__new__(self.handler_class)
+        handler.server = self
+        handler.request = None
+        # No socket for sendfile(): the loop writes to it
+        handler.connection = None
+        handler.client_address = connection.client_address
+        handler.keep_alive = True
+        handler.close_connection = True
+        line_end = head.index(b"\n") + 1
+        handler.raw_requestline = head[:line_end]
+        handler.rfile = io.BytesIO(head[line_end:])
+        handler.wfile = _LoopWriter(connection.transport)
+        if not handler.parse_request():
+            return None
+        handler.rfile = _RequestBody(connection)
+        handler.wfile = _ResponseWriter(connection)
+        return handler
+
+    def run_handler(self, connection, handler):
+        """On a pool thread: what BaseHTTPRequestHandler.handle_one_request() does after parsing."""
+        try:
+            method = getattr(handler, "do_" + handler.command, None)
+            if method is None:
+                handler.send_error(501, f"Unsupported method ({handler.command!r})")
+            else:
+                method()
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            handler.close_connection = True
+        except Exception:
+            log.exception("request failed", method=handler.command, path=handler.path)
+            handler.close_connection = True
+        finally:
+            data = handler.wfile.take() if isinstance(handler.wfile, _ResponseWriter) else b""
+            try:
+                self.loop.call_soon_threadsafe(connection.request_done, handler, data)
+            except RuntimeError:
+                # The loop has already closed
+                pass
+
+    def detach(self, handler):
+        """Take the connection from a handler that has sent its headers; returns a sink for the rest.
+
+        The connection stays open after the handler returns and nothing more
+        is read from it; the sink's owner closes it.
+        """
+        handler.wfile.flush()
+        connection = handler.wfile._connection
+        connection.detached = True
+        return _LoopSink(connection)
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="http-worker")
+        server = await self.loop.create_server(
+            lambda: _Connection(self), self.host, self.port, backlog=self.backlog, reuse_address=True,
+        )
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                self.loop.add_signal_handler(signum, self.stop)
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            # Idle connections go now; busy ones close after their response
+            for connection in list(self.connections):
+                if not connection._busy:
+                    connection.transport.close()
+            while self.in_flight:
+                await asyncio.sleep(0.05)
+            self.executor.shutdown(wait=True)
+
+    def stop(self):
+        self.stopping = True
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def shutdown(self):
+        """stop() from another thread."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stop)
+
+    def serve_forever(self):
+        """Serve until SIGTERM/SIGINT, then finish the requests already running."""
+        asyncio.run(self.serve())
+
+    def server_close(self):
+        # serve() has closed everything by the time it returns
+        pass
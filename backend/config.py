@@ -0,0 +1,74 @@
+# backend/config.py
+import configparser
+import os
+
+# Settings are looked up in this order:
+#   1. environment variable IT_MGMT_<NAME>          e.g. IT_MGMT_SERVER_MODE=threaded
+#   2. INI file given by IT_MGMT_CONFIG (default: config.ini in the project root),
+#      where [server] mode = threaded is read as SERVER_MODE
+#   3. the default passed by the caller
+ENV_PREFIX = "IT_MGMT_"
+CONFIG_FILE_ENV = "IT_MGMT_CONFIG"
+DEFAULT_CONFIG_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.ini"
+)
+
+_file_settings = None
+
+
+def _load_file_settings():
+    global _file_settings
+    if _file_settings is not None:
+        return _file_settings
+
+    settings = {}
+    path = os.environ.get(CONFIG_FILE_ENV, DEFAULT_CONFIG_FILE)
+    if os.path.isfile(path):
+        parser = configparser.ConfigParser(interpolation=None)
+        try:
+            parser.read(path)
+        except configparser.Error as e:
+            print(f"[CONFIG ERROR] {path}: {e}")
+        for section in parser.sections():
+            for key, value in parser.items(section):
+                settings[f"{section}_{key}".upper()] = value
+
+    _file_settings = settings
+    return settings
+
+
+def get_setting(name, default=None):
+    name = name.upper()
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is not None:
+        return value
+    return _load_file_settings().get(name, default)
+
+
+def get_int(name, default):
+    value = get_setting(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"[CONFIG WARNING] {name}={value!r} is not an integer, using {default}")
+        return default
+
+
+def get_float(name, default):
+    value = get_setting(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"[CONFIG WARNING] {name}={value!r} is not a number, using {default}")
+        return default
+
+
+def get_bool(name, default):
+    value = get_setting(name)
+    if value is None or value == "":
+        return default
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
@@ -1,16 +1,306 @@
 # backend/db/connection.py
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import mysql.connector
 from mysql.connector import Error
 
-def get_db_connection():
+from backend.config import get_setting, get_int, get_float, get_bool
+from backend.utils import metrics
+from backend.utils.logger import get_logger
+
+log = get_logger("db")
+
+
+class PoolTimeoutError(Exception):
+    """No connection became free within the checkout timeout."""
+
+
+def _connect_args():
+    return {
+        "host": get_setting("DB_HOST", "localhost"),
+        "port": get_int("DB_PORT", 3306),
+        "user": get_setting("DB_USER", "root"),
+        "password": get_setting("DB_PASSWORD", ""),
+        "database": get_setting("DB_NAME", "it_management"),
+        "connection_timeout": get_int("DB_CONNECT_TIMEOUT", 10),
+    }
+
+
+class TimedCursor:
+    """A mysql.connector cursor that records execute and fetch times.
+
+    Iterating the cursor directly is not timed; the routes fetch explicitly.
+    """
+
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def _timed(self, operation, method, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.db_query_duration.observe(time.perf_counter() - started, operation)
+
+    def execute(self, *args, **kwargs):
+        return self._timed("execute", self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed("execute", self._cursor.executemany, *args, **kwargs)
+
+    def fetchone(self):
+        return self._timed("fetch", self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed("fetch", self._cursor.fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed("fetch", self._cursor.fetchall)
+
+
+class PooledConnection:
+    """A MySQL connection on loan from the pool.
+
+    Behaves like the underlying mysql.connector connection; close() hands it
+    back to the pool instead of tearing down the socket, and its cursors are
+    TimedCursors.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self._checked_out = False
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self.raw.cursor(*args, **kwargs))
+
+    def close(self):
+        if self._checked_out:
+            self._checked_out = False
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    def __init__(self, size=16, timeout=5.0, max_age=1800.0, ping=True, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.ping = ping
+        self.connect_args = connect_args
+        self.pid = os.getpid()
+
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.connects = 0
+        self.connect_errors = 0
+        self.recycled = 0
+        self.ping_failures = 0
+
+    def _discard(self, pooled):
+        try:
+            pooled.raw.close()
+        except Error:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _create(self):
+        try:
+            raw = mysql.connector.connect(**self.connect_args)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self.connect_errors += 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.connects += 1
+        return PooledConnection(self, raw)
+
+    def _usable(self, pooled):
+        if self.max_age and time.monotonic() - pooled.created_at > self.max_age:
+            with self._cond:
+                self.recycled += 1
+            return False
+        if self.ping:
+            try:
+                pooled.raw.ping(reconnect=False)
+            except Error:
+                with self._cond:
+                    self.ping_failures += 1
+                return False
+        return True
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        while True:
+            with self._cond:
+                while True:
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        break
+                    if self._open < self.size:
+                        self._open += 1
+                        pooled = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.checkout_timeouts += 1
+                        raise PoolTimeoutError(
+                            f"no database connection free after {self.timeout}s "
+                            f"({self.size} in use)"
+                        )
+                    self._cond.wait(remaining)
+
+            if pooled is None:
+                pooled = self._create()
+            elif not self._usable(pooled):
+                self._discard(pooled)
+                continue
+            break
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        pooled._checked_out = True
+        return pooled
+
+    def release(self, pooled):
+        with self._cond:
+            self.in_use -= 1
+
+        try:
+            healthy = pooled.raw.is_connected()
+            if healthy and pooled.raw.in_transaction:
+                # Never hand the next borrower someone else's open transaction
+                pooled.raw.rollback()
+        except Error:
+            healthy = False
+
+        if not healthy:
+            self._discard(pooled)
+            return
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "utilisation": round(self.in_use / self.size, 3) if self.size else 0.0,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6)
+                if self.checkouts else 0.0,
+                "connects": self.connects,
+                "connect_errors": self.connect_errors,
+                "recycled": self.recycled,
+                "ping_failures": self.ping_failures,
+            }
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(name="main"):
+    """The process's connection pool called `name`.
+
+    "main" serves requests (DB_POOL_SIZE). Other names are small side pools
+    (DB_POOL_<NAME>_SIZE, default 2) for lookups made while a request
+    already holds a main connection, so they never wait on the main pool.
+    """
+    pool = _pools.get(name)
+    # A pool inherited across fork() shares sockets with the parent; each
+    # prefork worker builds its own instead
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        pool = _pools.get(name)
+        if pool is None or pool.pid != os.getpid():
+            if name == "main":
+                size = get_int("DB_POOL_SIZE", 16)
+            else:
+                size = get_int(f"DB_POOL_{name.upper()}_SIZE", 2)
+            pool = _pools[name] = ConnectionPool(
+                size=size,
+                timeout=get_float("DB_POOL_TIMEOUT", 5.0),
+                max_age=get_float("DB_POOL_MAX_AGE", 1800.0),
+                ping=get_bool("DB_POOL_PING", True),
+                **_connect_args(),
+            )
+        return pool
+
+
+def get_pool_stats(name="main"):
+    return get_pool(name).stats()
+
+
+def get_db_connection(pool="main"):
+    """Borrow a pooled connection; call close() on it to give it back.
+
+    Prefer `with db_connection() as conn:`, which gives it back on every path.
+    """
+    started = time.perf_counter()
     try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',          # Replace with your DB user
-            password='Adrde07@',
-            database='it_management'
-        )
-        return conn
-    except Error as e:
-        print(f"[DB ERROR] {e}")
+        return get_pool(pool).acquire()
+    except (Error, PoolTimeoutError) as e:
+        log.error("database connection failed", pool=pool, error=e)
+        metrics.db_connection_errors.inc(pool)
         return None
+    finally:
+        metrics.db_connection_wait.observe(time.perf_counter() - started, pool)
+
+
+@contextmanager
+def db_connection(pool="main"):
+    conn = get_db_connection(pool)
+    try:
+        yield conn
+    finally:
+        if conn is not None:
+            conn.close()
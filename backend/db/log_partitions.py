@@ -0,0 +1,260 @@
+# backend/db/log_partitions.py
+#
+# Storage maintenance for the audit log. log_entry is RANGE COLUMNS
+# partitioned by month on created_at (see db/schema.sql):
+#
+#   p_history   everything before the first monthly partition
+#   pYYYYMM     one partition per month
+#   p_future    MAXVALUE catch-all
+#
+# run_log_maintenance() keeps LOG_PARTITION_MONTHS_AHEAD monthly partitions
+# split out of p_future ahead of time. It also moves every partition that
+# ends more than LOG_RETENTION_MONTHS ago into gzip-compressed NDJSON files,
+# one per month, under LOG_ARCHIVE_DIR, and then drops the partition. The
+# archive stays searchable: GET /logs falls through to it via
+# iter_archived_logs() once the table runs out of rows.
+#
+# The threaded and single servers run it every LOG_MAINTENANCE_INTERVAL_HOURS
+# on a background thread; prefork runs it once before forking, so schedule
+# `python -m backend.db.log_partitions` from cron there.
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from mysql.connector import Error
+
+from backend.config import get_int, get_setting
+from backend.db.connection import db_connection
+from backend.utils.encoder import json_default
+from backend.utils.logger import get_logger
+
+log = get_logger("log_partitions")
+
+DEFAULT_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "archive", "logs",
+)
+ARCHIVE_FILE_RE = re.compile(r"^log_entry-(\d{4})-(\d{2})\.ndjson\.gz$")
+ARCHIVE_COLUMNS = (
+    "log_id", "user_id", "action", "resource_type", "resource_id",
+    "context", "created_at", "user_name",
+)
+
+
+def get_archive_dir():
+    return get_setting("LOG_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR)
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(moment, months):
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _archive_path(archive_dir, month):
+    return os.path.join(archive_dir, f"log_entry-{month:%Y-%m}.ndjson.gz")
+
+
+def list_partitions(cursor):
+    """[(name, upper_bound)] in order; upper_bound is None for MAXVALUE."""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'log_entry'
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    partitions = []
+    for name, description in cursor.fetchall():
+        description = description.strip("'")
+        if description.upper() == "MAXVALUE":
+            partitions.append((name, None))
+        else:
+            partitions.append((name, datetime.fromisoformat(description)))
+    return partitions
+
+
+def ensure_future_partitions(cursor, months_ahead, now=None):
+    """Split monthly partitions out of p_future up to `months_ahead` months ahead."""
+    partitions = list_partitions(cursor)
+    if not partitions:
+        log.warning("log_entry is not partitioned; see db/migrations")
+        return []
+
+    catch_all = [name for name, upper in partitions if upper is None]
+    if not catch_all:
+        log.warning("log_entry has no MAXVALUE partition to split")
+        return []
+
+    bounds = [upper for _, upper in partitions if upper is not None]
+    next_start = max(bounds) if bounds else month_start(now or datetime.now())
+    target = add_months(month_start(now or datetime.now()), months_ahead + 1)
+
+    created = []
+    definitions = []
+    while next_start < target:
+        upper = add_months(next_start, 1)
+        name = f"p{next_start:%Y%m}"
+        definitions.append(f"PARTITION {name} VALUES LESS THAN ('{upper:%Y-%m-%d}')")
+        created.append(name)
+        next_start = upper
+
+    if definitions:
+        definitions.append(f"PARTITION {catch_all[0]} VALUES LESS THAN (MAXVALUE)")
+        cursor.execute(
+            f"ALTER TABLE log_entry REORGANIZE PARTITION {catch_all[0]} INTO ({', '.join(definitions)})"
+        )
+    return created
+
+
+def _archive_partition(conn, name, archive_dir):
+    """Copy one partition's rows into per-month archive files; returns the row count."""
+    os.makedirs(archive_dir, exist_ok=True)
+    cursor = conn.cursor(buffered=False)
+    cursor.execute(f"""
+        SELECT l.log_id, l.user_id, l.action, l.resource_type, l.resource_id,
+               l.context, l.created_at, u.full_name AS user_name
+        FROM log_entry PARTITION ({name}) l
+        LEFT JOIN user u ON l.user_id = u.user_id
+        ORDER BY l.created_at, l.log_id
+    """)
+
+    count = 0
+    current_month = None
+    current_file = None
+    written = []
+    try:
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for row in rows:
+                record = dict(zip(ARCHIVE_COLUMNS, row))
+                month = month_start(record["created_at"])
+                if month != current_month:
+                    if current_file:
+                        current_file.close()
+                    path = _archive_path(archive_dir, month)
+                    # Write beside the final name and rename once complete, so
+                    # a crash never leaves a truncated archive behind
+                    current_file = gzip.open(path + ".tmp", "wt", encoding="utf-8")
+                    written.append(path)
+                    current_month = month
+                current_file.write(json.dumps(record, default=json_default) + "\n")
+                count += 1
+    finally:
+        if current_file:
+            current_file.close()
+        cursor.close()
+
+    for path in written:
+        os.replace(path + ".tmp", path)
+    return count
+
+
+def archive_expired_partitions(conn, retention_months, archive_dir, now=None):
+    cursor = conn.cursor()
+    partitions = list_partitions(cursor)
+    cutoff = add_months(month_start(now or datetime.now()), -retention_months)
+
+    archived = []
+    for name, upper in partitions:
+        if upper is None or upper > cutoff:
+            continue
+        rows = _archive_partition(conn, name, archive_dir)
+        cursor.execute(f"ALTER TABLE log_entry DROP PARTITION {name}")
+        archived.append((name, rows))
+        log.info("log partition archived and dropped", partition=name, rows=rows)
+    cursor.close()
+    return archived
+
+
+def run_log_maintenance():
+    try:
+        with db_connection() as conn:
+            if not conn:
+                log.error("log maintenance failed, no database connection")
+                return
+            cursor = conn.cursor()
+            created = ensure_future_partitions(cursor, get_int("LOG_PARTITION_MONTHS_AHEAD", 3))
+            cursor.close()
+            if created:
+                log.info("log partitions added", partitions=",".join(created))
+            archive_expired_partitions(
+                conn, get_int("LOG_RETENTION_MONTHS", 12), get_archive_dir()
+            )
+    except Error as e:
+        log.error("log maintenance failed", error=e)
+
+
+def start_log_maintenance(interval_hours):
+    """Run maintenance now and then every `interval_hours` on a daemon thread."""
+    stop = threading.Event()
+
+    def loop():
+        while True:
+            run_log_maintenance()
+            if stop.wait(interval_hours * 3600):
+                return
+
+    threading.Thread(target=loop, name="log-maintenance", daemon=True).start()
+    return stop
+
+
+def archived_months(archive_dir=None):
+    archive_dir = archive_dir or get_archive_dir()
+    try:
+        names = os.listdir(archive_dir)
+    except FileNotFoundError:
+        return []
+    months = []
+    for name in names:
+        match = ARCHIVE_FILE_RE.match(name)
+        if match:
+            months.append(datetime(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _read_archive_month(archive_dir, month):
+    with gzip.open(_archive_path(archive_dir, month), "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            record["created_at"] = datetime.fromisoformat(record["created_at"])
+            yield record
+
+
+def iter_archived_logs(date_from=None, date_to=None, after=None, archive_dir=None):
+    """Archived log rows newest first, in the same order and shape as GET /logs.
+
+    `date_from` is inclusive, `date_to` exclusive; `after` is a decoded
+    (created_at, log_id) page cursor. Only months that overlap the range
+    are opened, and only one month is held in memory at a time.
+    """
+    archive_dir = archive_dir or get_archive_dir()
+    for month in reversed(archived_months(archive_dir)):
+        month_end = add_months(month, 1)
+        if date_to and month >= date_to:
+            continue
+        if date_from and month_end <= date_from:
+            break
+        if after and month > after[0]:
+            continue
+
+        rows = [
+            row for row in _read_archive_month(archive_dir, month)
+            if (not date_from or row["created_at"] >= date_from)
+            and (not date_to or row["created_at"] < date_to)
+            and (not after or (row["created_at"], row["log_id"]) < after)
+        ]
+        rows.sort(key=lambda row: (row["created_at"], row["log_id"]), reverse=True)
+        yield from rows
+
+
+if __name__ == "__main__":
+    run_log_maintenance()
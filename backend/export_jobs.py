@@ -0,0 +1,338 @@
+# backend/export_jobs.py
+#
+# Background PDF exports. POST /exports queues a report from
+# backend.routes.pdf_export.REPORTS with its filters and returns at once; a
+# process pool renders it, so CPU-bound PDF work never holds an HTTP worker
+# thread or the server's GIL. GET /exports/<id> polls the job and
+# GET /exports/<id>/file downloads the result.
+#
+# A job id is a hash of the report name, its filters and the version token
+# of the tables it reads (backend.utils.versions). Asking for the same
+# export while none of those tables has changed gives the same id, and the
+# cached file is served straight away; any write produces a new id.
+#
+# Job state is kept in EXPORT_CACHE_DIR rather than in memory, so any
+# prefork worker can answer a poll for a job another worker started:
+#     <id>.json   status, rewritten by the renderer after every batch
+#     <id>.pdf    the finished report (written as .part, then renamed)
+# Files unused for EXPORT_CACHE_MAX_AGE_HOURS are pruned.
+#
+# Pool processes are started with "spawn": forking a threaded server would
+# copy locks held by other threads into the child. They are given the
+# server's version counters so their reference-data caches are invalidated
+# by the same writes as the server's.
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.config import get_float, get_int, get_setting
+from backend.db.connection import db_connection
+from backend.routes.pdf_export import REPORTS
+from backend.utils.logger import get_logger
+from backend.utils.pdf_stream import stream_pdf_report
+from backend.utils import versions
+from backend.utils.versions import version_token
+
+log = get_logger("exports")
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "exports"
+)
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+PENDING = ("queued", "running")
+PRUNE_INTERVAL = 300
+
+
+class InvalidExportRequest(ValueError):
+    pass
+
+
+def _status_path(cache_dir, job_id):
+    return os.path.join(cache_dir, f"{job_id}.json")
+
+
+def _result_path(cache_dir, job_id):
+    return os.path.join(cache_dir, f"{job_id}.pdf")
+
+
+def _write_status(cache_dir, status):
+    path = _status_path(cache_dir, status["job_id"])
+    status["updated_at"] = time.time()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp, path)
+
+
+def _read_status(cache_dir, job_id):
+    try:
+        with open(_status_path(cache_dir, job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def normalise_filters(report, raw_filters):
+    """The report's own filters from a JSON object or parse_qs() dict, as strings."""
+    filters = {}
+    for name in report.filters:
+        value = raw_filters.get(name)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if value is None or value == "":
+            continue
+        filters[name] = str(value)
+    return filters
+
+
+def _query_filters(filters):
+    return {name: [value] for name, value in filters.items()}
+
+
+def make_job_id(name, filters, token):
+    key = json.dumps([name, sorted(filters.items()), token])
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def _count_rows(query, values):
+    with db_connection() as conn:
+        if not conn:
+            raise ConnectionError("Database connection failed")
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM ({query}) AS export_rows", values)
+        (total,) = cursor.fetchone()
+        cursor.close()
+    return total
+
+
+def render_export(cache_dir, job_id, name, filters, owner):
+    """Pool entry point: render one report into the cache directory."""
+    report = REPORTS[name]
+    status = {"job_id": job_id, "report": name, "filters": filters, "status": "running",
+              "rows": 0, "total": None, "owner": owner}
+    part = f"{_result_path(cache_dir, job_id)}.{os.getpid()}.part"
+    try:
+        query, values = report.build(_query_filters(filters))
+        status["total"] = _count_rows(query, values)
+        _write_status(cache_dir, status)
+
+        def progress(rows):
+            status["rows"] = rows
+            _write_status(cache_dir, status)
+
+        stream = stream_pdf_report(query, values, report.title, report.render,
+                                   report.decorate, progress)
+        if stream is None:
+            raise ConnectionError("Database connection failed")
+        try:
+            with open(part, "wb") as f:
+                for chunk in stream:
+                    f.write(chunk)
+        finally:
+            stream.close()
+        # Two workers racing on one id each write their own .part; the
+        # rename is atomic, so readers only ever see a complete file
+        os.replace(part, _result_path(cache_dir, job_id))
+        status["status"] = "done"
+    except Exception:
+        log.exception("export job failed", report=name, job_id=job_id)
+        status["status"] = "failed"
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+    _write_status(cache_dir, status)
+
+
+class ExportJobs:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, processes=2, max_age=86400.0):
+        self.cache_dir = cache_dir
+        self.processes = processes
+        self.max_age = max_age
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._last_prune = 0.0
+
+        self.submitted = 0
+        self.cache_hits = 0
+        self.failed = 0
+
+    def _executor(self):
+        # Like the audit writer: a pool inherited across fork() is not ours
+        if self._pool is not None and self._pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    # The renderers' reference-data caches must see the
+                    # server's writes, or a renamed user keeps the old name
+                    # in a PDF cached under the new version token
+                    initializer=versions.use_shared_state,
+                    initargs=versions.shared_state(),
+                )
+                self._pid = os.getpid()
+                self._futures = {}
+            return self._pool
+
+    def submit(self, name, raw_filters):
+        """Queue report `name` (or find it cached); returns its status()."""
+        report = REPORTS.get(name)
+        if report is None:
+            raise InvalidExportRequest(f"Unknown report {name!r}, expected one of {sorted(REPORTS)}")
+        filters = normalise_filters(report, raw_filters)
+        # Builds the query once here so bad filters fail the request, not the job
+        report.build(_query_filters(filters))
+        job_id = make_job_id(name, filters, version_token(report.tables))
+
+        executor = self._executor()
+        self._prune()
+        result = _result_path(self.cache_dir, job_id)
+        if os.path.exists(result):
+            self.cache_hits += 1
+            self._touch(job_id)
+            return self.status(job_id)
+
+        with self._lock:
+            status = _read_status(self.cache_dir, job_id)
+            if status and status["status"] in PENDING and _process_alive(status["owner"]):
+                return self.status(job_id)
+
+            _write_status(self.cache_dir, {
+                "job_id": job_id, "report": name, "filters": filters, "status": "queued",
+                "rows": 0, "total": None, "owner": os.getpid(),
+            })
+            try:
+                future = executor.submit(render_export, self.cache_dir, job_id, name,
+                                         filters, os.getpid())
+            except BrokenProcessPool:
+                self._pool = None
+                raise
+            self._futures[job_id] = future
+            self.submitted += 1
+        future.add_done_callback(lambda f: self._finished(job_id, f))
+        return self.status(job_id)
+
+    def _finished(self, job_id, future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+        error = None if future.cancelled() else future.exception()
+        if error is None:
+            return
+        # The renderer records its own failures; this is a pool process dying
+        self.failed += 1
+        log.error("export worker process failed", job_id=job_id, error=error)
+        status = _read_status(self.cache_dir, job_id)
+        if status is not None:
+            status["status"] = "failed"
+            _write_status(self.cache_dir, status)
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._pool = None
+
+    def _touch(self, job_id):
+        for path in (_result_path(self.cache_dir, job_id), _status_path(self.cache_dir, job_id)):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def _prune(self):
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.max_age:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def status(self, job_id):
+        """The job's state for GET /exports/<id>; None for an unknown id."""
+        if not JOB_ID_RE.match(job_id):
+            return None
+        status = _read_status(self.cache_dir, job_id)
+        done = os.path.exists(_result_path(self.cache_dir, job_id))
+        if status is None:
+            if not done:
+                return None
+            status = {"job_id": job_id, "report": None, "rows": None, "total": None}
+        state = "done" if done else status["status"]
+        if state in PENDING and not _process_alive(status["owner"]):
+            # The server process that queued it has gone; POST again to retry
+            state = "failed"
+
+        total = status["total"]
+        job = {
+            "job_id": job_id,
+            "report": status["report"],
+            "status": state,
+            "rows": status["rows"],
+            "total": total,
+            "progress": 1.0 if done else (round(status["rows"] / total, 3) if total else None),
+            "status_url": f"/exports/{job_id}",
+        }
+        if done:
+            job["download_url"] = f"/exports/{job_id}/file"
+        if state == "failed":
+            job["error"] = "Export failed"
+        return job
+
+    def result_path(self, job_id):
+        """Path of the finished PDF, or None if there is none (yet)."""
+        if not JOB_ID_RE.match(job_id):
+            return None
+        path = _result_path(self.cache_dir, job_id)
+        return path if os.path.exists(path) else None
+
+    def close(self):
+        if self._pool is None or self._pid != os.getpid():
+            return
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    def stats(self):
+        return {
+            "processes": self.processes,
+            "running": len(self._futures),
+            "submitted": self.submitted,
+            "cache_hits": self.cache_hits,
+            "failed": self.failed,
+        }
+
+
+export_jobs = ExportJobs(
+    cache_dir=get_setting("EXPORT_CACHE_DIR", DEFAULT_CACHE_DIR),
+    processes=get_int("EXPORT_PROCESSES", 2),
+    max_age=get_float("EXPORT_CACHE_MAX_AGE_HOURS", 24) * 3600,
+)
+
+atexit.register(export_jobs.close)
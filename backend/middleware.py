@@ -0,0 +1,132 @@
+# backend/middleware.py
+#
+# The middleware chain every routed request goes through, outermost first:
+#   instrument  per-route request counts, durations and bytes sent, and
+#               requests in flight (GET /metrics), and the access log line;
+#               it also sends whatever Response the inner layers return
+#   errors      HTTPError -> its status and {"error": ...}; anything else -> 500
+#   cors        CORS headers on every response; answers OPTIONS preflights
+#   auth        401 for a session token that no longer verifies, 403 for a
+#               route's role= requirement
+#   etag        conditional GET for routes with etag=(tables...): 304 before
+#               the handler runs if nothing those tables hold has changed
+# See backend/router.py for the (request, call_next) contract.
+import logging
+import time
+
+from backend.router import HTTPError, Response
+from backend.utils import metrics
+from backend.utils.logger import access_log, get_logger, sample_access
+from backend.utils.compression import COMPRESSION_ENABLED, gzip_etag
+from backend.utils.versions import etag_matches, make_etag
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Accept, Authorization, X-User-ID, X-User-Role, If-None-Match",
+    "Access-Control-Expose-Headers": "ETag",
+}
+
+log = get_logger("http")
+
+
+def route_label(request):
+    """The route template a request is counted under; never the raw path."""
+    if request.route is not None:
+        return request.route.template
+    if request.method == "OPTIONS":
+        return "(preflight)"
+    if request.error is not None:
+        return "(unmatched)"
+    return "(static)"
+
+
+def instrument(request, call_next):
+    # Sends the response itself rather than leaving it to the caller, so
+    # the recorded duration and size include writing it to the socket
+    handler = request.handler
+    started = time.perf_counter()
+    metrics.requests_in_flight.inc()
+    try:
+        response = call_next(request)
+        if response is not None:
+            handler._send_response(response)
+        return None
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.requests_in_flight.dec()
+        label = route_label(request)
+        status = handler.response_status
+        sent = handler.wfile.bytes_written
+        metrics.request_duration.observe(elapsed, label, request.method)
+        metrics.requests_total.inc(label, request.method, str(status))
+        metrics.response_bytes.inc(label, request.method, amount=sent)
+        if access_log.enabled(logging.INFO) and sample_access(status, elapsed):
+            claims = handler._claims()
+            # The path only: query strings can carry ?token=
+            access_log.info(
+                "request", method=request.method, path=request.path, route=label,
+                status=status, ms=round(elapsed * 1000, 2), bytes=sent,
+                client=handler.client_address[0],
+                user_id=claims.user_id if claims is not None else None,
+            )
+
+
+def errors(request, call_next):
+    try:
+        return call_next(request)
+    except HTTPError as e:
+        return Response(e.status, {"error": e.message}, e.headers)
+    except (BrokenPipeError, ConnectionResetError):
+        log.info("client disconnected", method=request.method, path=request.path)
+        return None
+    except Exception:
+        log.exception("unhandled error", method=request.method, path=request.path)
+        if request.handler.response_started:
+            # Too late for a status line; the connection closes short
+            request.handler.close_connection = True
+            return None
+        return Response(500, {"error": "Internal server error"})
+
+
+def cors(request, call_next):
+    request.handler.default_headers.update(CORS_HEADERS)
+    if request.method == "OPTIONS":
+        return Response(200, None)
+    return call_next(request)
+
+
+def auth(request, call_next):
+    handler = request.handler
+    if not request.option("public") and handler._session_token() and handler._claims() is None:
+        raise HTTPError(401, "Session expired, please log in again")
+    role = request.option("role")
+    if role and request.role != role:
+        raise HTTPError(403, request.option("forbidden", "Forbidden"))
+    return call_next(request)
+
+
+def etag(request, call_next):
+    tables = request.option("etag")
+    if not tables:
+        return call_next(request)
+
+    # Read before the handler runs; see make_etag()
+    current = make_etag(tables)
+    if_none_match = request.headers.get("If-None-Match")
+    for candidate in (current, gzip_etag(current)):
+        if etag_matches(if_none_match, candidate):
+            headers = {"ETag": candidate, "Cache-Control": "no-cache"}
+            if COMPRESSION_ENABLED:
+                headers["Vary"] = "Accept-Encoding"
+            return Response(304, None, headers)
+
+    response = call_next(request)
+    if response is not None and response.status == 200:
+        # no-cache: clients may keep the body but must revalidate it
+        response.headers = dict(response.headers or {}, ETag=current)
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+DEFAULT_MIDDLEWARE = (instrument, errors, cors, auth, etag)
@@ -0,0 +1,246 @@
+# backend/router.py
+#
+# Table-driven request routing. Routes are registered as a method plus a
+# path template,
+#     router.add("GET", "/system/{id:int}", handler, invalid="Invalid system ID")
+# and compiled once, before the server starts, into
+#   - a dict {path: {method: route}} for templates without parameters, which
+#     is most of them and costs one lookup, and
+#   - a segment trie for the rest, walked one path segment at a time, so
+#     lookup cost depends on the path's depth, not on how many routes exist.
+# Literal segments win over parameters ("/exports/batch" before
+# "/exports/{id}").
+#
+# A matched request runs through the middleware chain and then the route's
+# handler. A middleware is a function (request, call_next) -> Response or
+# None; it may answer without calling call_next (a 401, a 304) or adjust what
+# comes back. Handlers take the Request and return (status, body), a
+# Response, or None once they have written the response themselves (streams,
+# files).
+#
+# Route options (public=, role=, etag=, ...) are free-form keywords kept on
+# the route for middleware to read.
+from urllib.parse import urlparse
+
+CONVERTERS = {
+    "int": int,
+    "str": str,
+}
+
+
+class HTTPError(Exception):
+    """Ends a request with `status` and {"error": message}; raised by routing or middleware."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers
+
+
+class Response:
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers
+
+
+class Route:
+    def __init__(self, method, template, handler, options):
+        self.method = method
+        self.template = template
+        self.handler = handler
+        self.options = options
+        # [(name, converter)] in path order
+        self.params = []
+        self.segments = []
+        for segment in template.strip("/").split("/"):
+            if segment.startswith("{") and segment.endswith("}"):
+                name, _, kind = segment[1:-1].partition(":")
+                if (kind or "str") not in CONVERTERS:
+                    raise ValueError(f"Unknown converter {kind!r} in {template}")
+                self.params.append((name, CONVERTERS[kind or "str"]))
+                self.segments.append(None)
+            else:
+                self.segments.append(segment)
+
+    def convert(self, raw_values):
+        params = {}
+        for (name, converter), raw in zip(self.params, raw_values):
+            try:
+                params[name] = converter(raw)
+            except ValueError:
+                raise HTTPError(400, self.options.get("invalid") or f"Invalid {name}")
+        return params
+
+
+class _Node:
+    __slots__ = ("children", "param", "routes")
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.routes = None
+
+
+class Request:
+    """One request as seen by middleware and handlers."""
+
+    def __init__(self, handler, method):
+        self.handler = handler
+        self.method = method
+        parsed = urlparse(handler.path)
+        self.path = parsed.path
+        self.query = parsed.query
+        self.route = None
+        self.params = {}
+        self.error = None
+        self._body = None
+
+    @property
+    def headers(self):
+        return self.handler.headers
+
+    @property
+    def body(self):
+        """The request body as text, read on first use."""
+        if self._body is None:
+            self._body = self.handler._read_body()
+        return self._body
+
+    @property
+    def user_id(self):
+        return self.handler._parse_user_id()
+
+    @property
+    def role(self):
+        return self.handler._parse_role()
+
+    def option(self, name, default=None):
+        return self.route.options.get(name, default) if self.route else default
+
+
+class Router:
+    def __init__(self):
+        self.routes = []
+        self.middleware = []
+        self.fallbacks = {}
+        self._static = None
+        self._root = None
+        self._chain = None
+
+    def add(self, method, template, handler, **options):
+        if self._chain is not None:
+            raise RuntimeError("Routes must be added before the router is compiled")
+        self.routes.append(Route(method, template, handler, options))
+
+    def get(self, template, handler, **options):
+        self.add("GET", template, handler, **options)
+
+    def post(self, template, handler, **options):
+        self.add("POST", template, handler, **options)
+
+    def put(self, template, handler, **options):
+        self.add("PUT", template, handler, **options)
+
+    def delete(self, template, handler, **options):
+        self.add("DELETE", template, handler, **options)
+
+    def use(self, middleware):
+        """Append a middleware; the first one added is the outermost."""
+        self.middleware.append(middleware)
+
+    def fallback(self, method, handler):
+        """Handler for `method` requests no route matches (e.g. static files for GET)."""
+        self.fallbacks[method] = handler
+
+    def compile(self):
+        static = {}
+        root = _Node()
+        for route in self.routes:
+            if not route.params:
+                methods = static.setdefault("/" + "/".join(route.segments), {})
+            else:
+                node = root
+                names = iter(name for name, _ in route.params)
+                for segment in route.segments:
+                    if segment is not None:
+                        node = node.children.setdefault(segment, _Node())
+                        continue
+                    name = next(names)
+                    if node.param is None:
+                        node.param = (name, _Node())
+                    elif node.param[0] != name:
+                        raise ValueError(f"{route.template}: parameter {{{name}}} clashes "
+                                         f"with {{{node.param[0]}}} at the same position")
+                    node = node.param[1]
+                if node.routes is None:
+                    node.routes = {}
+                methods = node.routes
+            if route.method in methods:
+                raise ValueError(f"Duplicate route {route.method} {route.template}")
+            methods[route.method] = route
+        self._static = static
+        self._root = root
+
+        chain = self._endpoint
+        for middleware in reversed(self.middleware):
+            chain = _link(middleware, chain)
+        self._chain = chain
+        return self
+
+    def _walk(self, node, segments, index, values):
+        if index == len(segments):
+            return node.routes, values
+        child = node.children.get(segments[index])
+        if child is not None:
+            found, found_values = self._walk(child, segments, index + 1, values)
+            if found:
+                return found, found_values
+        if node.param is not None and segments[index]:
+            return self._walk(node.param[1], segments, index + 1, values + [segments[index]])
+        return None, None
+
+    def match(self, method, path):
+        """(route, params) for a request; (None, {}) to use the fallback. Raises HTTPError."""
+        methods = self._static.get(path)
+        values = ()
+        if methods is None:
+            methods, values = self._walk(self._root, path.strip("/").split("/"), 0, [])
+        if not methods:
+            if method in self.fallbacks:
+                return None, {}
+            raise HTTPError(404, "Route not found")
+        route = methods.get(method)
+        if route is None:
+            if method in self.fallbacks:
+                return None, {}
+            allowed = ", ".join(sorted(methods))
+            raise HTTPError(405, "Method not allowed", {"Allow": allowed})
+        return route, route.convert(values)
+
+    def dispatch(self, handler, method):
+        """Route one request and run it through the middleware chain."""
+        request = Request(handler, method)
+        try:
+            request.route, request.params = self.match(method, request.path)
+        except HTTPError as e:
+            # Raised inside the chain, so error mapping and CORS still apply
+            request.error = e
+        return self._chain(request)
+
+    def _endpoint(self, request):
+        if request.error is not None:
+            raise request.error
+        if request.route is None:
+            return self.fallbacks[request.method](request)
+        result = request.route.handler(request)
+        if isinstance(result, tuple):
+            return Response(*result)
+        return result
+
+
+def _link(middleware, call_next):
+    return lambda request: middleware(request, call_next)
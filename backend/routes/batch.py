@@ -0,0 +1,233 @@
+# backend/routes/batch.py
+#
+# Batch changes: PUT /<resource>/batch and DELETE /<resource>/batch for
+# systems, peripherals and complaints. The body picks rows either by id,
+#     {"ids": [1, 2, 3], "patch": {"network_id": 7}}
+# or by a filter over the table's own columns,
+#     {"filter": {"status": "Resolved", "updated_at": {"older_than_days": 30}},
+#      "patch": {"status": "Closed"}}
+# and the change runs as one set-based UPDATE or DELETE in one transaction,
+# followed by one audit entry for the whole batch.
+#
+# A filter is an AND of conditions. A plain value means equality (null
+# means IS NULL); an object applies operators: eq, ne, lt, lte, gt, gte,
+# in (a list), and older_than_days for timestamp columns. Patches use the
+# same field allow-lists as the single-row update routes.
+import json
+
+from backend.config import get_int
+from backend.db.connection import db_connection
+from backend.routes.complaint import COMPLAINT_FIELDS, resolved_updates
+from backend.routes.log import log_action
+from backend.routes.peripheral import PERIPHERAL_FIELDS
+from backend.routes.system import SYSTEM_FIELDS
+from backend.utils.changes import record_change
+from backend.utils.logger import get_logger
+
+log = get_logger("batch")
+
+MAX_IDS = get_int("BATCH_MAX_IDS", 10000)
+
+OPERATORS = {"eq": "=", "ne": "<>", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+TIMESTAMPS = ("created_at", "updated_at")
+
+
+class InvalidBatchRequest(ValueError):
+    pass
+
+
+class BatchResource:
+    def __init__(self, table, resource_type, label, id_column, fields, filters,
+                 time_columns=TIMESTAMPS, extra_updates=None):
+        self.table = table
+        self.resource_type = resource_type
+        self.label = label
+        self.id_column = id_column
+        self.fields = fields
+        self.filters = filters
+        self.time_columns = time_columns
+        self.extra_updates = extra_updates
+
+
+BATCH_RESOURCES = {
+    "systems": BatchResource(
+        "`system`", "system", "systems", "system_id", SYSTEM_FIELDS,
+        ["system_id"] + SYSTEM_FIELDS + list(TIMESTAMPS),
+    ),
+    "peripherals": BatchResource(
+        "peripheral", "peripheral", "peripherals", "peripheral_id", PERIPHERAL_FIELDS,
+        ["peripheral_id"] + PERIPHERAL_FIELDS + list(TIMESTAMPS),
+    ),
+    "complaints": BatchResource(
+        "complaint", "complaint", "complaints", "complaint_id", COMPLAINT_FIELDS,
+        ["complaint_id", "user_id"] + COMPLAINT_FIELDS + list(TIMESTAMPS) + ["resolved_at"],
+        time_columns=TIMESTAMPS + ("resolved_at",), extra_updates=resolved_updates,
+    ),
+}
+
+
+def _scalar(column, value):
+    if isinstance(value, (dict, list)):
+        raise InvalidBatchRequest(f"{column} values must be strings, numbers or null")
+    return value
+
+
+def _condition(resource, column, spec):
+    if column not in resource.filters:
+        raise InvalidBatchRequest(f"Cannot filter on {column}")
+    if spec is None:
+        return [f"{column} IS NULL"], []
+    if not isinstance(spec, dict):
+        return [f"{column} = %s"], [_scalar(column, spec)]
+    if not spec:
+        raise InvalidBatchRequest(f"Empty condition for {column}")
+
+    clauses = []
+    values = []
+    for op, value in spec.items():
+        if op in OPERATORS:
+            clauses.append(f"{column} {OPERATORS[op]} %s")
+            values.append(_scalar(column, value))
+        elif op == "in":
+            if not isinstance(value, list) or not value:
+                raise InvalidBatchRequest(f"{column}.in must be a non-empty list")
+            clauses.append(f"{column} IN ({', '.join(['%s'] * len(value))})")
+            values.extend(_scalar(column, item) for item in value)
+        elif op == "older_than_days" and column in resource.time_columns:
+            if not isinstance(value, int) or value < 0:
+                raise InvalidBatchRequest(f"{column}.older_than_days must be a non-negative integer")
+            clauses.append(f"{column} < NOW() - INTERVAL %s DAY")
+            values.append(value)
+        else:
+            raise InvalidBatchRequest(f"Unsupported condition {op!r} on {column}")
+    return clauses, values
+
+
+def parse_selection(resource, data):
+    """(WHERE clause, values, audit description) for the ids or filter in `data`."""
+    if ("ids" in data) == ("filter" in data):
+        raise InvalidBatchRequest("Give either ids or filter")
+
+    if "ids" in data:
+        ids = data["ids"]
+        if not isinstance(ids, list) or not ids:
+            raise InvalidBatchRequest("ids must be a non-empty list")
+        if len(ids) > MAX_IDS:
+            raise InvalidBatchRequest(f"At most {MAX_IDS} ids per batch")
+        if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise InvalidBatchRequest("ids must be integers")
+        where = f"{resource.id_column} IN ({', '.join(['%s'] * len(ids))})"
+        return where, list(ids), f"{len(ids)} ids"
+
+    conditions = data["filter"]
+    if not isinstance(conditions, dict) or not conditions:
+        # An empty filter would match the whole table
+        raise InvalidBatchRequest("filter must be a non-empty object")
+    clauses = []
+    values = []
+    for column, spec in conditions.items():
+        column_clauses, column_values = _condition(resource, column, spec)
+        clauses.extend(column_clauses)
+        values.extend(column_values)
+    return " AND ".join(clauses), values, f"filter {json.dumps(conditions, sort_keys=True)}"
+
+
+def _parse_body(request_body):
+    data = json.loads(request_body) if request_body.strip() else None
+    if not isinstance(data, dict):
+        raise InvalidBatchRequest("Expected a JSON object")
+    return data
+
+
+def _execute(sql, values):
+    with db_connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        cursor.execute(sql, values)
+        count = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    return count
+
+
+def batch_update(name, request_body, user_id=None):
+    resource = BATCH_RESOURCES[name]
+    try:
+        data = _parse_body(request_body)
+        where, where_values, selection = parse_selection(resource, data)
+
+        patch = data.get("patch")
+        if not isinstance(patch, dict):
+            return 400, {"error": "patch must be an object"}
+        updates = []
+        values = []
+        for field in resource.fields:
+            if field in patch:
+                updates.append(f"{field} = %s")
+                values.append(patch[field])
+        if not updates:
+            return 400, {"error": "No valid fields to update"}
+        if resource.extra_updates:
+            for column, value in resource.extra_updates(patch):
+                updates.append(f"{column} = %s")
+                values.append(value)
+
+        updated = _execute(f"""
+            UPDATE {resource.table}
+            SET {', '.join(updates)}
+            WHERE {where}
+        """, values + where_values)
+        if updated is None:
+            return 500, {"error": "Database connection failed"}
+        if updated:
+            record_change(resource.resource_type, "updated")
+
+        if user_id:
+            log_action(
+                user_id=user_id,
+                action=f"Batch updated {resource.label}",
+                resource_type=resource.resource_type,
+                resource_id=None,
+                context=f"{updated} rows by {selection}; set {', '.join(f for f in resource.fields if f in patch)}"
+            )
+        return 200, {"message": f"{updated} {resource.label} updated", "updated": updated}
+
+    except json.JSONDecodeError:
+        return 400, {"error": "Invalid JSON"}
+    except InvalidBatchRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("batch update failed", resource=name)
+        return 500, {"error": "Internal server error"}
+
+
+def batch_delete(name, request_body, user_id=None):
+    resource = BATCH_RESOURCES[name]
+    try:
+        data = _parse_body(request_body)
+        where, where_values, selection = parse_selection(resource, data)
+
+        deleted = _execute(f"DELETE FROM {resource.table} WHERE {where}", where_values)
+        if deleted is None:
+            return 500, {"error": "Database connection failed"}
+        if deleted:
+            record_change(resource.resource_type, "deleted")
+
+        if user_id:
+            log_action(
+                user_id=user_id,
+                action=f"Batch deleted {resource.label}",
+                resource_type=resource.resource_type,
+                resource_id=None,
+                context=f"{deleted} rows by {selection}"
+            )
+        return 200, {"message": f"{deleted} {resource.label} deleted", "deleted": deleted}
+
+    except json.JSONDecodeError:
+        return 400, {"error": "Invalid JSON"}
+    except InvalidBatchRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("batch delete failed", resource=name)
+        return 500, {"error": "Internal server error"}
@@ -2,24 +2,31 @@
 
 import json
 from datetime import datetime
-from decimal import Decimal
-from backend.db.connection import get_db_connection
+from backend.db.connection import db_connection
 from urllib.parse import parse_qs
 from backend.routes.log import log_action
-from datetime import datetime
+from backend.utils.changes import record_change
+from backend.utils.logger import get_logger
+from backend.utils.refdata import for_stream, user_names
+from backend.utils.pagination import (
+    InvalidPageRequest, keyset_clause, keyset_order, parse_page_params
+)
+from backend.utils.search import (
+    InvalidSearchRequest, decode_score_cursor, encode_score_cursor, highlight, search_terms, snippet
+)
+from backend.utils.streaming import stream_query
+
+log = get_logger("complaint")
+
+# Columns a client may change on a complaint
+COMPLAINT_FIELDS = ["status", "priority"]
 
 
-def convert_types(obj):
-    """Convert Decimal/datetime to float/ISO format for JSON."""
-    if isinstance(obj, list):
-        return [convert_types(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_types(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    return obj
+def resolved_updates(data):
+    """(column, value) pairs that go with an update: resolved_at when status becomes Resolved."""
+    if data.get("status") == "Resolved":
+        return [("resolved_at", datetime.now())]
+    return []
 
 
 def add_complaint(request_body):
@@ -30,72 +37,184 @@ def add_complaint(request_body):
         if not all(field in data for field in required_fields):
             return 400, {"error": "Missing required fields"}
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO complaint (user_id, subject, description, status, priority)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            data["user_id"],
-            data["subject"],
-            data["description"],
-            data.get("status", "Open"),
-            data.get("priority", "Medium")
-        ))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                INSERT INTO complaint (user_id, subject, description, status, priority)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (
+                data["user_id"],
+                data["subject"],
+                data["description"],
+                data.get("status", "Open"),
+                data.get("priority", "Medium")
+            ))
+
+            conn.commit()
+            cursor.close()
+        record_change("complaint", "added", cursor.lastrowid)
 
         return 201, {"message": "Complaint submitted successfully"}
 
     except json.JSONDecodeError:
         return 400, {"error": "Invalid JSON"}
-    except Exception as e:
-        print("[ADD COMPLAINT ERROR]", e)
+    except Exception:
+        log.exception("add complaint failed")
         return 500, {"error": "Internal server error"}
 
 
+# user_name is filled in from the refdata cache
+COMPLAINT_SELECT = "SELECT c.* FROM complaint c"
+
+
+def complaint_filters(filters):
+    """WHERE clauses and values for ?status=, ?priority= and ?user_id=."""
+    where_clauses = []
+    values = []
+
+    if "status" in filters:
+        where_clauses.append("c.status = %s")
+        values.append(filters["status"][0])
+
+    if "priority" in filters:
+        where_clauses.append("c.priority = %s")
+        values.append(filters["priority"][0])
+
+    if "user_id" in filters:
+        where_clauses.append("c.user_id = %s")
+        values.append(filters["user_id"][0])
+
+    return where_clauses, values
+
+
+def build_complaints_query(filters, page_size=None, after=None):
+    where_clauses, values = complaint_filters(filters)
+
+    if after:
+        clause, cursor_values = keyset_clause("c.created_at", "c.complaint_id", after)
+        where_clauses.append(clause)
+        values.extend(cursor_values)
+
+    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    limit_sql = ""
+    if page_size:
+        limit_sql = "LIMIT %s"
+        values.append(page_size + 1)
+
+    query = f"""
+        {COMPLAINT_SELECT}
+        {where_sql}
+        {keyset_order("c.created_at", "c.complaint_id")}
+        {limit_sql}
+    """
+    return query, values
+
+
 def get_complaints(query_string=""):
     try:
         filters = parse_qs(query_string)
-        where_clauses = []
-        values = []
+        limit, after = parse_page_params(filters)
+        query, values = build_complaints_query(filters, limit, after)
+
+        stream = stream_query(query, values, "complaints", limit, "complaint_id",
+                              decorate=for_stream(user_names, "user_id"))
+        if stream is None:
+            return 500, {"error": "Database connection failed"}
+        return 200, stream
+
+    except InvalidPageRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("filtered get complaints failed")
+        return 500, {"error": "Internal server error"}
 
-        if "status" in filters:
-            where_clauses.append("c.status = %s")
-            values.append(filters["status"][0])
 
-        if "priority" in filters:
-            where_clauses.append("c.priority = %s")
-            values.append(filters["priority"][0])
+# Served by the FULLTEXT index ft_complaint_text; the MATCH column list must
+# be exactly the index's columns
+MATCH_SQL = "MATCH(c.subject, c.description) AGAINST (%s IN NATURAL LANGUAGE MODE)"
 
-        if "user_id" in filters:
-            where_clauses.append("c.user_id = %s")
-            values.append(filters["user_id"][0])
 
-        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+def build_search_query(terms, filters, page_size, after=None):
+    text = " ".join(terms)
+    where_clauses, filter_values = complaint_filters(filters)
+    values = [text, text] + filter_values
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+    having_sql = ""
+    if after:
+        score, row_id = after
+        having_sql = "HAVING score < %s OR (score = %s AND complaint_id < %s)"
+        values.extend([score, score, row_id])
+    values.append(page_size + 1)
 
-        cursor.execute(f"""
-            SELECT c.*, u.full_name AS user_name
-            FROM complaint c
-            LEFT JOIN user u ON c.user_id = u.user_id
-            {where_sql}
-            ORDER BY c.created_at DESC
-        """, values)
+    query = f"""
+        SELECT c.*, {MATCH_SQL} AS score
+        FROM complaint c
+        WHERE {" AND ".join([MATCH_SQL] + where_clauses)}
+        {having_sql}
+        ORDER BY score DESC, c.complaint_id DESC
+        LIMIT %s
+    """
+    return query, values
 
-        complaints = cursor.fetchall()
-        cursor.close()
-        conn.close()
 
-        return 200, {"complaints": convert_types(complaints)}
+def search_complaints(query_string=""):
+    """GET /complaints/search?q=: complaints ranked by relevance, with highlighted snippets."""
+    try:
+        filters = parse_qs(query_string)
+        terms = search_terms(filters.get("q", [""])[0])
+        limit, _ = parse_page_params({"limit": filters.get("limit", [None])})
+        cursor_param = filters.get("cursor", [None])[0]
+        after = decode_score_cursor(cursor_param) if cursor_param else None
+        query, values = build_search_query(terms, filters, limit, after)
+
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, values)
+            rows = cursor.fetchall()
+            cursor.close()
 
-    except Exception as e:
-        print("[FILTERED GET COMPLAINTS ERROR]", e)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_score_cursor(rows[-1]["score"], rows[-1]["complaint_id"])
+
+        for row, names in zip(rows, user_names(rows)):
+            row.update(names)
+            row["highlight"] = {
+                "subject": highlight(row["subject"], terms),
+                "description": snippet(row["description"], terms),
+            }
+        return 200, {"complaints": rows, "terms": terms, "next_cursor": next_cursor}
+
+    except (InvalidSearchRequest, InvalidPageRequest) as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("search complaints failed")
+        return 500, {"error": "Internal server error"}
+
+
+def get_complaint(complaint_id):
+    try:
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(COMPLAINT_SELECT + " WHERE c.complaint_id = %s", (complaint_id,))
+            complaint = cursor.fetchone()
+            cursor.close()
+
+        if not complaint:
+            return 404, {"error": "Complaint not found"}
+        complaint.update(user_names([complaint])[0])
+        return 200, complaint
+
+    except Exception:
+        log.exception("get complaint failed")
         return 500, {"error": "Internal server error"}
     
     
@@ -103,11 +222,10 @@ def update_complaint(complaint_id, request_body, user_id=None):
     try:
         data = json.loads(request_body)
 
-        allowed_fields = ["status", "priority"]
         updates = []
         values = []
 
-        for field in allowed_fields:
+        for field in COMPLAINT_FIELDS:
             if field in data:
                 updates.append(f"{field} = %s")
                 values.append(data[field])
@@ -115,29 +233,29 @@ def update_complaint(complaint_id, request_body, user_id=None):
         if not updates:
             return 400, {"error": "No valid fields to update"}
 
-        # Add resolved_at if status is set to 'Resolved'
-        if data.get("status") == "Resolved":
-            updates.append("resolved_at = %s")
-            values.append(datetime.now())
+        for column, value in resolved_updates(data):
+            updates.append(f"{column} = %s")
+            values.append(value)
 
         values.append(complaint_id)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            UPDATE complaint
-            SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP
-            WHERE complaint_id = %s
-        """, values)
-
-        if cursor.rowcount == 0:
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE complaint
+                SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP
+                WHERE complaint_id = %s
+            """, values)
+
+            if cursor.rowcount == 0:
+                cursor.close()
+                return 404, {"error": "Complaint not found"}
+
+            conn.commit()
             cursor.close()
-            conn.close()
-            return 404, {"error": "Complaint not found"}
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        record_change("complaint", "updated", complaint_id)
 
         # Logging context
         log_context = []
@@ -159,6 +277,6 @@ def update_complaint(complaint_id, request_body, user_id=None):
 
     except json.JSONDecodeError:
         return 400, {"error": "Invalid JSON"}
-    except Exception as e:
-        print("[UPDATE COMPLAINT ERROR]", e)
+    except Exception:
+        log.exception("update complaint failed")
         return 500, {"error": "Internal server error"}
@@ -0,0 +1,38 @@
+import json
+from backend.export_jobs import InvalidExportRequest, export_jobs
+from backend.utils.pagination import InvalidPageRequest
+from backend.utils.logger import get_logger
+
+log = get_logger("exports")
+
+
+def create_export(request_body):
+    try:
+        data = json.loads(request_body) if request_body.strip() else {}
+        if not isinstance(data, dict):
+            return 400, {"error": "Expected a JSON object"}
+        filters = data.get("filters") or {}
+        if not isinstance(filters, dict):
+            return 400, {"error": "filters must be an object"}
+
+        return submit_export(data.get("report"), filters)
+    except json.JSONDecodeError:
+        return 400, {"error": "Invalid JSON"}
+
+
+def submit_export(report, filters):
+    try:
+        job = export_jobs.submit(report, filters)
+        return (200 if job["status"] == "done" else 202), job
+    except (InvalidExportRequest, InvalidPageRequest) as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("create export failed")
+        return 500, {"error": "Internal server error"}
+
+
+def get_export(job_id):
+    job = export_jobs.status(job_id)
+    if job is None:
+        return 404, {"error": "Export not found"}
+    return 200, job
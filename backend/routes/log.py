@@ -1,54 +1,100 @@
-from backend.db.connection import get_db_connection
-from decimal import Decimal
-from datetime import datetime
-
-def convert_types(obj):
-    """Convert Decimal and datetime objects in dicts/lists."""
-    if isinstance(obj, list):
-        return [convert_types(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {
-            k: convert_types(v) for k, v in obj.items()
-        }
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    return obj
+from datetime import datetime, timedelta
+from backend.db.log_partitions import iter_archived_logs
+from backend.utils.audit import audit_writer
+from backend.utils.logger import get_logger
+from backend.utils.refdata import for_stream, user_names
+from backend.utils.pagination import (
+    InvalidPageRequest, keyset_clause, keyset_order, parse_page_params
+)
+from backend.utils.streaming import stream_query
+from urllib.parse import parse_qs
 
+log = get_logger("log")
 
 def log_action(user_id, action, resource_type, resource_id, context=""):
     if not user_id:
-        print("[LOGGING WARNING] Skipping log: No valid user_id")
+        log.warning("audit entry skipped, no user_id", action=action, resource_type=resource_type)
         return
+    # Queued and written in batches by the audit writer; the timestamp is
+    # taken now so a delayed flush does not shift the entry's time
+    audit_writer.submit((user_id, action, resource_type, resource_id, context, datetime.now()))
+
+
+def parse_date_range(filters):
+    """?from= and ?to= as a half-open [from, to) datetime range.
+
+    Both accept an ISO date or datetime; a bare date in `to` includes that
+    whole day. Bounding created_at lets MySQL prune log_entry partitions.
+    """
+    def parse(name):
+        raw = filters.get(name, [None])[0]
+        if not raw:
+            return None
+        try:
+            return datetime.fromisoformat(raw)
+        except ValueError:
+            raise InvalidPageRequest(f"{name} must be an ISO date or datetime")
+
+    date_from = parse("from")
+    date_to = parse("to")
+    if date_to and len(filters["to"][0]) == 10:
+        date_to += timedelta(days=1)
+    return date_from, date_to
+
+
+def build_logs_query(filters, page_size=None, after=None):
+    conditions = []
+    values = []
+
+    date_from, date_to = parse_date_range(filters)
+    if date_from:
+        conditions.append("l.created_at >= %s")
+        values.append(date_from)
+    if date_to:
+        conditions.append("l.created_at < %s")
+        values.append(date_to)
+
+    if after:
+        clause, cursor_values = keyset_clause("l.created_at", "l.log_id", after)
+        conditions.append(clause)
+        values.extend(cursor_values)
+
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    limit_sql = ""
+    if page_size:
+        limit_sql = "LIMIT %s"
+        values.append(page_size + 1)
+
+    # user_name is filled in from the refdata cache
+    query = f"""
+        SELECT l.*
+        FROM log_entry l
+        {where_sql}
+        {keyset_order("l.created_at", "l.log_id")}
+        {limit_sql}
+    """
+    return query, values
+
+
+def get_logs(query_string=""):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO log_entry (user_id, action, resource_type, resource_id, context)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (user_id, action, resource_type, resource_id, context))
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        print("[LOGGING ERROR]", e)
-        
-def get_logs():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT l.*, u.full_name AS user_name
-            FROM log_entry l
-            LEFT JOIN user u ON l.user_id = u.user_id
-            ORDER BY l.created_at DESC
-        """)
-        logs = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        return 200, {"logs": convert_types(logs)}
-    except Exception as e:
-        print("[GET LOGS ERROR]", e)
+        filters = parse_qs(query_string)
+        limit, after = parse_page_params(filters)
+        query, values = build_logs_query(filters, limit, after)
+        date_from, date_to = parse_date_range(filters)
+
+        # Months past the retention window live in the archive; the listing
+        # continues into them once the table has no older rows
+        def archived():
+            return iter_archived_logs(date_from, date_to, after)
+
+        stream = stream_query(query, values, "logs", limit, "log_id", tail=archived,
+                              decorate=for_stream(user_names, "user_id"))
+        if stream is None:
+            return 500, {"error": "Database connection failed"}
+        return 200, stream
+    except InvalidPageRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("get logs failed")
         return 500, {"error": "Internal server error"}
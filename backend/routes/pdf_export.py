@@ -1,179 +1,176 @@
-import io
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from backend.db.connection import get_db_connection
+from backend.routes.log import parse_date_range
+from backend.routes.peripheral import PERIPHERAL_SELECT
+from backend.utils.pagination import InvalidPageRequest
+from backend.utils.logger import get_logger
+from backend.utils.pdf_stream import stream_pdf_report
+from backend.utils.refdata import system_names, user_names
 from urllib.parse import parse_qs
 
-def generate_complaint_pdf(query_string):
+log = get_logger("pdf_export")
+
+# Each export returns (status, body, content_type). On success the body is a
+# PdfReportStream that the handler sends chunk by chunk and closes; errors
+# come back as plain-text bytes before anything has been sent.
+#
+# The same REPORTS drive the background export jobs in
+# backend/export_jobs.py, which render them in a process pool.
+
+
+def render_complaint(complaint):
+    return (
+        (50, f"ID: {complaint['complaint_id']} | User: {complaint['user_name']}"),
+        (50, f"Subject: {complaint['subject']}"),
+        (50, f"Status: {complaint['status']}, Priority: {complaint['priority']}, Created: {complaint['created_at']}"),
+        (50, f"Description: {(complaint['description'] or '')[:100]}..."),
+    )
+
+
+def render_system(sys):
+    return (
+        (50, f"Host: {sys['hostname']} | IP: {sys['ip_address']} | MAC: {sys['mac_address']}"),
+        (50, f"OS: {sys['os_name']} {sys['os_version']}, RAM: {sys['ram_size_gb']} GB, CPU: {sys['cpu_model']}"),
+        (50, f"User: {sys.get('user_name')}, Dept: {sys.get('department')}, Network: {sys.get('network')}"),
+    )
+
+
+def render_log(log):
+    time_str = log['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+    return (
+        (50, f"{time_str} | User: {log.get('user_name') or 'N/A'} | Action: {log['action']}"),
+        (70, f"Resource: {log['resource_type']}#{log['resource_id']} | Context: {log.get('context') or ''}"),
+    )
+
+
+def render_peripheral(p):
+    return (
+        (50, f"ID: {p['peripheral_id']} | Type: {p['type']} | Model: {p['model'] or ''} | Serial: {p['serial_number'] or ''}"),
+        (50, f"Assigned to: {p.get('assigned_system') or 'None'}"),
+    )
+
+
+def build_complaint_report(filters):
+    conditions = []
+    values = []
+
+    if "status" in filters:
+        conditions.append("c.status = %s")
+        values.append(filters["status"][0])
+    if "priority" in filters:
+        conditions.append("c.priority = %s")
+        values.append(filters["priority"][0])
+    if "user_id" in filters:
+        conditions.append("c.user_id = %s")
+        values.append(filters["user_id"][0])
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"""
+        SELECT c.*
+        FROM complaint c
+        {where_clause}
+        ORDER BY c.created_at DESC
+    """, values
+
+
+def build_system_report(filters):
+    conditions = []
+    values = []
+
+    if "department_id" in filters:
+        conditions.append("s.user_id IN (SELECT user_id FROM `user` WHERE department_id = %s)")
+        values.append(filters["department_id"][0])
+    if "network_id" in filters:
+        conditions.append("s.network_id = %s")
+        values.append(filters["network_id"][0])
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"""
+        SELECT s.*
+        FROM `system` s
+        {where_clause}
+        ORDER BY s.hostname
+    """, values
+
+
+def build_log_report(filters):
+    date_from, date_to = parse_date_range(filters)
+    conditions = []
+    values = []
+    if date_from:
+        conditions.append("l.created_at >= %s")
+        values.append(date_from)
+    if date_to:
+        conditions.append("l.created_at < %s")
+        values.append(date_to)
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"""
+        SELECT l.*
+        FROM log_entry l
+        {where_clause}
+        ORDER BY l.created_at DESC
+    """, values
+
+
+def build_peripheral_report(filters):
+    return f"""
+        {PERIPHERAL_SELECT}
+        ORDER BY p.peripheral_id
+    """, []
+
+
+class Report:
+    """One exportable PDF report.
+
+    `build(filters)` turns parse_qs()-style filters into (query, values);
+    only the names in `filters` are read, so they are all a cached export
+    needs to key on. `tables` are the versioned tables the report reads.
+    """
+
+    def __init__(self, title, build, render, decorate, filters, tables):
+        self.title = title
+        self.build = build
+        self.render = render
+        self.decorate = decorate
+        self.filters = filters
+        self.tables = tables
+
+
+REPORTS = {
+    "complaints": Report("Complaint Report", build_complaint_report, render_complaint,
+                         user_names, ("status", "priority", "user_id"), ("complaint", "user")),
+    "systems": Report("System Inventory Report", build_system_report, render_system,
+                      system_names, ("department_id", "network_id"),
+                      ("system", "user", "department", "network")),
+    "logs": Report("Activity Log Report", build_log_report, render_log,
+                   user_names, ("from", "to"), ("log", "user")),
+    "peripherals": Report("Peripheral Devices Report", build_peripheral_report, render_peripheral,
+                          None, (), ("peripheral", "system")),
+}
+
+
+def generate_report_pdf(name, query_string=""):
     try:
-        filters = parse_qs(query_string)
-        conditions = []
-        values = []
-
-        if "status" in filters:
-            conditions.append("c.status = %s")
-            values.append(filters["status"][0])
-        if "priority" in filters:
-            conditions.append("c.priority = %s")
-            values.append(filters["priority"][0])
-        if "user_id" in filters:
-            conditions.append("c.user_id = %s")
-            values.append(filters["user_id"][0])
-
-        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"""
-            SELECT c.*, u.full_name
-            FROM complaint c
-            JOIN user u ON c.user_id = u.user_id
-            {where_clause}
-            ORDER BY c.created_at DESC
-        """, values)
-
-        complaints = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        buffer = io.BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        y = height - 40
-
-        pdf.setFont("Helvetica-Bold", 14)
-        pdf.drawString(50, y, "Complaint Report")
-        y -= 30
-        pdf.setFont("Helvetica", 10)
-
-        for complaint in complaints:
-            if y < 100:
-                pdf.showPage()
-                y = height - 40
-                pdf.setFont("Helvetica", 10)
-
-            pdf.drawString(50, y, f"ID: {complaint['complaint_id']} | User: {complaint['full_name']}")
-            y -= 15
-            pdf.drawString(50, y, f"Subject: {complaint['subject']}")
-            y -= 15
-            pdf.drawString(50, y, f"Status: {complaint['status']}, Priority: {complaint['priority']}, Created: {complaint['created_at']}")
-            y -= 15
-            pdf.drawString(50, y, f"Description: {complaint['description'][:100]}...")
-            y -= 25
-
-        pdf.save()
-        buffer.seek(0)
-        return 200, buffer.getvalue(), "application/pdf"
-
-    except Exception as e:
-        print("[PDF EXPORT ERROR]", e)
+        report = REPORTS[name]
+        query, values = report.build(parse_qs(query_string))
+        stream = stream_pdf_report(query, values, report.title, report.render, report.decorate)
+        if stream is None:
+            return 500, b"Database connection failed", "text/plain"
+        return 200, stream, "application/pdf"
+
+    except InvalidPageRequest as e:
+        return 400, str(e).encode(), "text/plain"
+    except Exception:
+        log.exception("pdf export failed", report=name)
         return 500, b"Internal server error", "text/plain"
 
 
-def generate_system_pdf(query_string=""):
-    try:
-        filters = parse_qs(query_string)
-        conditions = []
-        values = []
-
-        if "department_id" in filters:
-            conditions.append("d.department_id = %s")
-            values.append(filters["department_id"][0])
-        if "network_id" in filters:
-            conditions.append("n.network_id = %s")
-            values.append(filters["network_id"][0])
-
-        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"""
-            SELECT s.*, u.full_name AS user_name, d.name AS department, n.name AS network
-            FROM `system` s
-            LEFT JOIN `user` u ON s.user_id = u.user_id
-            LEFT JOIN department d ON u.department_id = d.department_id
-            LEFT JOIN network n ON s.network_id = n.network_id
-            {where_clause}
-            ORDER BY s.hostname
-        """, values)
-
-        systems = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        buffer = io.BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        y = height - 40
-
-        pdf.setFont("Helvetica-Bold", 14)
-        pdf.drawString(50, y, "System Inventory Report")
-        y -= 30
-        pdf.setFont("Helvetica", 10)
-
-        for sys in systems:
-            if y < 100:
-                pdf.showPage()
-                y = height - 40
-                pdf.setFont("Helvetica", 10)
-
-            pdf.drawString(50, y, f"Host: {sys['hostname']} | IP: {sys['ip_address']} | MAC: {sys['mac_address']}")
-            y -= 15
-            pdf.drawString(50, y, f"OS: {sys['os_name']} {sys['os_version']}, RAM: {sys['ram_size_gb']} GB, CPU: {sys['cpu_model']}")
-            y -= 15
-            pdf.drawString(50, y, f"User: {sys.get('user_name')}, Dept: {sys.get('department')}, Network: {sys.get('network')}")
-            y -= 25
-
-        pdf.save()
-        buffer.seek(0)
-        return 200, buffer.getvalue(), "application/pdf"
-
-    except Exception as e:
-        print("[SYSTEM PDF EXPORT ERROR]", e)
-        return 500, b"Internal server error", "text/plain"
+def generate_complaint_pdf(query_string):
+    return generate_report_pdf("complaints", query_string)
 
 
-def generate_log_pdf():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT l.*, u.full_name AS user_name
-            FROM log_entry l
-            LEFT JOIN user u ON l.user_id = u.user_id
-            ORDER BY l.created_at DESC
-        """)
-        logs = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        buffer = io.BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        y = height - 40
-
-        pdf.setFont("Helvetica-Bold", 14)
-        pdf.drawString(50, y, "Activity Log Report")
-        y -= 30
-        pdf.setFont("Helvetica", 10)
-
-        for log in logs:
-            if y < 100:
-                pdf.showPage()
-                y = height - 40
-                pdf.setFont("Helvetica", 10)
-
-            time_str = log['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            pdf.drawString(50, y, f"{time_str} | User: {log.get('user_name', 'N/A')} | Action: {log['action']}")
-            y -= 15
-            pdf.drawString(70, y, f"Resource: {log['resource_type']}#{log['resource_id']} | Context: {log.get('context', '')}")
-            y -= 25
-
-        pdf.save()
-        buffer.seek(0)
-        return 200, buffer.getvalue(), "application/pdf"
-
-    except Exception as e:
-        print("[LOG PDF EXPORT ERROR]", e)
-        return 500, b"Internal server error", "text/plain"
+def generate_system_pdf(query_string=""):
+    return generate_report_pdf("systems", query_string)
+
 
+def generate_log_pdf(query_string=""):
+    return generate_report_pdf("logs", query_string)
@@ -1,17 +1,30 @@
 import json
-from decimal import Decimal
-from backend.db.connection import get_db_connection
+from backend.db.connection import db_connection
 from backend.routes.log import log_action
-from backend.utils.pdf_export import export_peripherals_pdf
-
-def convert_types(obj):
-    if isinstance(obj, list):
-        return [convert_types(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_types(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    return obj
+from backend.utils.bulk_import import (
+    ImportTable, InvalidImportRequest, as_enum, as_int, as_text,
+    import_format, parse_records, run_import
+)
+from backend.utils.changes import record_change
+from backend.utils.logger import get_logger
+from backend.utils.pagination import (
+    InvalidPageRequest, keyset_clause, keyset_order, parse_page_params
+)
+from backend.utils.streaming import stream_query
+from urllib.parse import parse_qs
+
+log = get_logger("peripheral")
+
+# Columns a client may set on a peripheral
+PERIPHERAL_FIELDS = ["type", "model", "serial_number", "assigned_to_system_id"]
+
+# Bulk import upserts on the unique serial_number
+PERIPHERAL_IMPORT = ImportTable("peripheral", key="serial_number", columns={
+    "type": as_enum("Printer", "Router", "Switch", "UPS", "Other"),
+    "model": as_text(100),
+    "serial_number": as_text(100),
+    "assigned_to_system_id": as_int,
+}, required=("type", "serial_number"))
 
 def add_peripheral(request_body):
     try:
@@ -24,18 +37,20 @@ def add_peripheral(request_body):
             if not data.get(field):
                 return 400, {"error": f"Missing field: {field}"}
 
-        fields = ["type", "model", "serial_number", "assigned_to_system_id"]
+        fields = PERIPHERAL_FIELDS
         values = [data.get(field) for field in fields]
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            INSERT INTO peripheral ({", ".join(fields)})
-            VALUES ({", ".join(["%s"] * len(fields))})
-        """, values)
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                INSERT INTO peripheral ({", ".join(fields)})
+                VALUES ({", ".join(["%s"] * len(fields))})
+            """, values)
+            conn.commit()
+            cursor.close()
+        record_change("peripheral", "added", cursor.lastrowid)
 
         if data.get("user_id"):
             log_action(
@@ -47,37 +62,109 @@ def add_peripheral(request_body):
             )
 
         return 201, {"message": "Peripheral added successfully"}
-    except Exception as e:
-        print("[ADD PERIPHERAL ERROR]", e)
+    except Exception:
+        log.exception("add peripheral failed")
         return 500, {"error": "Internal server error"}
 
-def get_peripherals():
+def import_peripherals(lines, content_type, requested_format=None, user_id=None):
+    fmt = import_format(content_type, requested_format)
+    if fmt is None:
+        return 415, {"error": "Send text/csv or application/x-ndjson (or ?format=csv|ndjson)"}
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT p.*, s.hostname AS assigned_system
-            FROM peripheral p
-            LEFT JOIN system s ON p.assigned_to_system_id = s.system_id
-            ORDER BY p.created_at DESC
-        """)
-        peripherals = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return 200, {"peripherals": convert_types(peripherals)}
-    except Exception as e:
-        print("[GET PERIPHERALS ERROR]", e)
+        report = run_import(PERIPHERAL_IMPORT, parse_records(lines, fmt))
+    except InvalidImportRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("import peripherals failed")
+        return 500, {"error": "Internal server error"}
+
+    if report["written"]:
+        record_change("peripheral", "imported")
+    if user_id:
+        # One entry for the whole import, not one per row
+        log_action(
+            user_id=user_id,
+            action="Imported peripherals",
+            resource_type="peripheral",
+            resource_id=None,
+            context=f"{report['written']} written, {report['failed']} rejected of {report['rows']} rows"
+        )
+    return (400 if "error" in report else 200), report
+
+PERIPHERAL_SELECT = """
+    SELECT p.*, s.hostname AS assigned_system
+    FROM peripheral p
+    LEFT JOIN system s ON p.assigned_to_system_id = s.system_id
+"""
+
+
+def build_peripherals_query(filters, page_size=None, after=None):
+    conditions = []
+    values = []
+
+    if after:
+        clause, cursor_values = keyset_clause("p.created_at", "p.peripheral_id", after)
+        conditions.append(clause)
+        values.extend(cursor_values)
+
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    limit_sql = ""
+    if page_size:
+        limit_sql = "LIMIT %s"
+        values.append(page_size + 1)
+
+    query = f"""
+        {PERIPHERAL_SELECT}
+        {where_sql}
+        {keyset_order("p.created_at", "p.peripheral_id")}
+        {limit_sql}
+    """
+    return query, values
+
+
+def get_peripherals(query_string=""):
+    try:
+        filters = parse_qs(query_string)
+        limit, after = parse_page_params(filters)
+        query, values = build_peripherals_query(filters, limit, after)
+
+        stream = stream_query(query, values, "peripherals", limit, "peripheral_id")
+        if stream is None:
+            return 500, {"error": "Database connection failed"}
+        return 200, stream
+    except InvalidPageRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("get peripherals failed")
+        return 500, {"error": "Internal server error"}
+
+
+def get_peripheral(peripheral_id):
+    try:
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(PERIPHERAL_SELECT + " WHERE p.peripheral_id = %s", (peripheral_id,))
+            peripheral = cursor.fetchone()
+            cursor.close()
+
+        if not peripheral:
+            return 404, {"error": "Peripheral not found"}
+        return 200, peripheral
+
+    except Exception:
+        log.exception("get peripheral failed")
         return 500, {"error": "Internal server error"}
 
 
 def update_peripheral(peripheral_id, request_body, user_id=None):
     try:
         data = json.loads(request_body)
-        fields = ["type", "model", "serial_number", "assigned_to_system_id"]
 
         updates = []
         values = []
-        for field in fields:
+        for field in PERIPHERAL_FIELDS:
             if field in data:
                 updates.append(f"{field} = %s")
                 values.append(data[field])
@@ -87,59 +174,47 @@ def update_peripheral(peripheral_id, request_body, user_id=None):
 
         values.append(peripheral_id)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            UPDATE peripheral SET {', '.join(updates)}
-            WHERE peripheral_id = %s
-        """, values)
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE peripheral SET {', '.join(updates)}
+                WHERE peripheral_id = %s
+            """, values)
+            conn.commit()
+            cursor.close()
+        record_change("peripheral", "updated", peripheral_id)
 
         if user_id:
             log_action(user_id, "Updated peripheral", "peripheral", peripheral_id, f"Updated fields: {', '.join(data.keys())}")
 
         return 200, {"message": "Peripheral updated successfully"}
-    except Exception as e:
-        print("[UPDATE PERIPHERAL ERROR]", e)
+    except Exception:
+        log.exception("update peripheral failed")
         return 500, {"error": "Internal server error"}
     
 def delete_peripheral(peripheral_id, user_id=None):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM peripheral WHERE peripheral_id = %s", (peripheral_id,))
-        conn.commit()
-
-        if cursor.rowcount == 0:
-            return 404, {"error": "Peripheral not found"}
-
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM peripheral WHERE peripheral_id = %s", (peripheral_id,))
+            # close() resets rowcount
+            deleted = cursor.rowcount
+            conn.commit()
+            cursor.close()
+
+            if deleted == 0:
+                return 404, {"error": "Peripheral not found"}
+        record_change("peripheral", "deleted", peripheral_id)
 
         if user_id:
             log_action(user_id, "Deleted peripheral", "peripheral", peripheral_id, f"Peripheral deleted")
 
         return 200, {"message": "Peripheral deleted successfully"}
 
-    except Exception as e:
-        print("[DELETE PERIPHERAL ERROR]", e)
+    except Exception:
+        log.exception("delete peripheral failed")
         return 500, {"error": "Internal server error"}
-    
-def export_peripherals():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM peripheral")
-        peripherals = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        export_peripherals_pdf(peripherals)
-        return 200, {"message": "Peripherals exported successfully", "file": "peripherals.pdf"}
-
-    except Exception as e:
-        print("[EXPORT PERIPHERALS ERROR]", e)
-        return 500, {"error": "Internal server error"}
-
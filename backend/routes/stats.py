@@ -0,0 +1,129 @@
+# backend/routes/stats.py
+from backend.config import get_float
+from backend.db.connection import db_connection
+from backend.utils.cache import TTLCache
+from backend.utils.changes import on_change
+from backend.utils.logger import get_logger
+from backend.utils.versions import version_token
+
+log = get_logger("stats")
+
+STATS_TABLES = ("system", "peripheral", "complaint", "user", "department", "network")
+
+# Covered by idx_complaint_status_priority
+COMPLAINT_COUNTS_SQL = """
+    SELECT status, priority, COUNT(*) AS total
+    FROM complaint
+    GROUP BY status, priority
+"""
+
+# Walks idx_system_user, then the user and department primary keys
+SYSTEMS_BY_DEPARTMENT_SQL = """
+    SELECT d.department_id, d.name AS department, COUNT(*) AS total
+    FROM `system` s
+    LEFT JOIN `user` u ON s.user_id = u.user_id
+    LEFT JOIN department d ON u.department_id = d.department_id
+    GROUP BY d.department_id, d.name
+    ORDER BY total DESC
+"""
+
+# Covered by idx_system_network_created
+SYSTEMS_BY_NETWORK_SQL = """
+    SELECT s.network_id, n.name AS network, COUNT(*) AS total
+    FROM `system` s
+    LEFT JOIN network n ON s.network_id = n.network_id
+    GROUP BY s.network_id, n.name
+    ORDER BY total DESC
+"""
+
+# Covered by idx_peripheral_type
+PERIPHERALS_BY_TYPE_SQL = "SELECT type, COUNT(*) AS total FROM peripheral GROUP BY type"
+
+DEPARTMENT_COUNT_SQL = "SELECT COUNT(*) AS total FROM department"
+
+STATS_QUERIES = (
+    COMPLAINT_COUNTS_SQL, SYSTEMS_BY_DEPARTMENT_SQL, SYSTEMS_BY_NETWORK_SQL,
+    PERIPHERALS_BY_TYPE_SQL, DEPARTMENT_COUNT_SQL,
+)
+
+_stats_cache = TTLCache(ttl=get_float("STATS_CACHE_TTL", 10.0))
+
+
+@on_change
+def _invalidate_stats(resource_type, action, resource_id):
+    if resource_type in STATS_TABLES:
+        _stats_cache.clear()
+
+
+def _query_stats(cursor):
+    cursor.execute(COMPLAINT_COUNTS_SQL)
+    by_status = {}
+    by_priority = {}
+    complaint_total = 0
+    for row in cursor.fetchall():
+        by_status[row["status"]] = by_status.get(row["status"], 0) + row["total"]
+        by_priority[row["priority"]] = by_priority.get(row["priority"], 0) + row["total"]
+        complaint_total += row["total"]
+
+    cursor.execute(SYSTEMS_BY_DEPARTMENT_SQL)
+    systems_by_department = [
+        {"department_id": row["department_id"], "department": row["department"], "count": row["total"]}
+        for row in cursor.fetchall()
+    ]
+
+    cursor.execute(SYSTEMS_BY_NETWORK_SQL)
+    systems_by_network = [
+        {"network_id": row["network_id"], "network": row["network"], "count": row["total"]}
+        for row in cursor.fetchall()
+    ]
+
+    cursor.execute(PERIPHERALS_BY_TYPE_SQL)
+    peripherals_by_type = {row["type"]: row["total"] for row in cursor.fetchall()}
+
+    cursor.execute(DEPARTMENT_COUNT_SQL)
+    department_total = cursor.fetchone()["total"]
+
+    return {
+        "systems": {
+            "total": sum(item["count"] for item in systems_by_department),
+            "by_department": systems_by_department,
+            "by_network": systems_by_network,
+        },
+        "peripherals": {
+            "total": sum(peripherals_by_type.values()),
+            "by_type": peripherals_by_type,
+        },
+        "complaints": {
+            "total": complaint_total,
+            "by_status": by_status,
+            "by_priority": by_priority,
+        },
+        "departments": {
+            "total": department_total,
+        },
+    }
+
+
+def get_stats():
+    try:
+        # Keyed on the shared version counters, so a write handled by
+        # another prefork worker also retires this worker's copy
+        key = version_token(STATS_TABLES)
+        stats = _stats_cache.get(key)
+        if stats is not None:
+            return 200, stats
+        generation = _stats_cache.generation
+
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor(dictionary=True)
+            stats = _query_stats(cursor)
+            cursor.close()
+
+        _stats_cache.set(key, stats, generation)
+        return 200, stats
+
+    except Exception:
+        log.exception("get stats failed")
+        return 500, {"error": "Internal server error"}
@@ -1,38 +1,67 @@
 # backend/routes/system.py
 
 import json
-from decimal import Decimal
-from datetime import datetime
-from backend.db.connection import get_db_connection
+from backend.db.connection import db_connection
 from backend.routes.log import log_action
+from backend.utils.bulk_import import (
+    ImportTable, InvalidImportRequest, as_decimal, as_enum, as_int, as_text,
+    import_format, parse_records, run_import
+)
+from backend.utils.changes import record_change
+from backend.utils.logger import get_logger
+from backend.utils.refdata import for_stream, system_names
+from backend.utils.pagination import (
+    InvalidPageRequest, keyset_clause, keyset_order, parse_page_params
+)
+from backend.utils.streaming import stream_query
 from urllib.parse import parse_qs
 
+log = get_logger("system")
+
+# Columns a client may set on a system
+SYSTEM_FIELDS = [
+    "hostname", "os_name", "os_version", "ram_size_gb",
+    "cpu_model", "storage_size_gb", "ip_address", "mac_address",
+    "antivirus_status", "user_id", "network_id"
+]
+
+# Bulk import upserts on the unique hostname; the parsers follow the schema
+SYSTEM_IMPORT = ImportTable("system", key="hostname", columns={
+    "hostname": as_text(100),
+    "os_name": as_text(50),
+    "os_version": as_text(50),
+    "ram_size_gb": as_decimal(1000),
+    "cpu_model": as_text(150),
+    "storage_size_gb": as_decimal(100000),
+    "ip_address": as_text(45),
+    "mac_address": as_text(50),
+    "antivirus_status": as_enum("Installed", "Not Installed", "Unknown"),
+    "user_id": as_int,
+    "network_id": as_int,
+}, required=("hostname", "os_name", "ram_size_gb", "ip_address", "mac_address"))
+
 def add_system(request_body):
     try:
         data = json.loads(request_body)
-        fields = [
-            "hostname", "os_name", "os_version", "ram_size_gb",
-            "cpu_model", "storage_size_gb", "ip_address", "mac_address",
-            "antivirus_status", "user_id", "network_id"
-        ]
+        fields = SYSTEM_FIELDS
         values = [data.get(field) for field in fields]
 
         if not data.get("hostname") or not data.get("ip_address") or not data.get("os_name"):
             return 400, {"error": "Missing required fields"}
 
-        conn = get_db_connection()
-        if not conn:
-            return 500, {"error": "Database connection failed"}
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
 
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            INSERT INTO `system` ({", ".join(fields)})
-            VALUES ({", ".join(["%s"] * len(fields))})
-        """, values)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                INSERT INTO `system` ({", ".join(fields)})
+                VALUES ({", ".join(["%s"] * len(fields))})
+            """, values)
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
+        record_change("system", "added", cursor.lastrowid)
         if data.get("user_id"):  # Only log if user_id is available
             log_action(
                 user_id=data["user_id"],
@@ -47,64 +76,108 @@ def add_system(request_body):
 
     except json.JSONDecodeError:
         return 400, {"error": "Invalid JSON"}
-    except Exception as e:
-        print("[ADD SYSTEM ERROR]", e)
+    except Exception:
+        log.exception("add system failed")
+        return 500, {"error": "Internal server error"}
+
+
+def import_systems(lines, content_type, requested_format=None, user_id=None):
+    fmt = import_format(content_type, requested_format)
+    if fmt is None:
+        return 415, {"error": "Send text/csv or application/x-ndjson (or ?format=csv|ndjson)"}
+    try:
+        report = run_import(SYSTEM_IMPORT, parse_records(lines, fmt))
+    except InvalidImportRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("import systems failed")
         return 500, {"error": "Internal server error"}
 
+    if report["written"]:
+        record_change("system", "imported")
+    if user_id:
+        # One entry for the whole import, not one per row
+        log_action(
+            user_id=user_id,
+            action="Imported systems",
+            resource_type="system",
+            resource_id=None,
+            context=f"{report['written']} written, {report['failed']} rejected of {report['rows']} rows"
+        )
+    return (400 if "error" in report else 200), report
+
+
+# user_name, department and network are filled in from the refdata cache
+SYSTEM_SELECT = "SELECT s.* FROM `system` s"
+
+
+def build_systems_query(filters, page_size=None, after=None):
+    department_id = filters.get("department_id", [None])[0]
+    network_id = filters.get("network_id", [None])[0]
+
+    query = SYSTEM_SELECT
 
-def convert_types(obj):
-    """Convert Decimal and datetime objects in dicts/lists."""
-    if isinstance(obj, list):
-        return [convert_types(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {
-            k: convert_types(v) for k, v in obj.items()
-        }
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    return obj
+    conditions = []
+    values = []
+
+    if department_id:
+        conditions.append("s.user_id IN (SELECT user_id FROM `user` WHERE department_id = %s)")
+        values.append(department_id)
+    if network_id:
+        conditions.append("s.network_id = %s")
+        values.append(network_id)
+    if after:
+        clause, cursor_values = keyset_clause("s.created_at", "s.system_id", after)
+        conditions.append(clause)
+        values.extend(cursor_values)
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += " " + keyset_order("s.created_at", "s.system_id")
+    if page_size:
+        query += " LIMIT %s"
+        values.append(page_size + 1)
+
+    return query, values
 
 
 def get_systems(query_string=""):
     try:
         filters = parse_qs(query_string)
-        department_id = filters.get("department_id", [None])[0]
-        network_id = filters.get("network_id", [None])[0]
-
-        query = """
-            SELECT s.*, u.full_name AS user_name, d.name AS department, n.name AS network
-            FROM `system` s
-            LEFT JOIN `user` u ON s.user_id = u.user_id
-            LEFT JOIN department d ON u.department_id = d.department_id
-            LEFT JOIN network n ON s.network_id = n.network_id
-        """
-
-        conditions = []
-        values = []
+        limit, after = parse_page_params(filters)
+        query, values = build_systems_query(filters, limit, after)
 
-        if department_id:
-            conditions.append("u.department_id = %s")
-            values.append(department_id)
-        if network_id:
-            conditions.append("s.network_id = %s")
-            values.append(network_id)
+        stream = stream_query(query, values, "systems", limit, "system_id",
+                              decorate=for_stream(system_names, "user_id", "network_id"))
+        if stream is None:
+            return 500, {"error": "Database connection failed"}
+        return 200, stream
 
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+    except InvalidPageRequest as e:
+        return 400, {"error": str(e)}
+    except Exception:
+        log.exception("get systems failed")
+        return 500, {"error": "Internal server error"}
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, values)
-        systems = cursor.fetchall()
-        cursor.close()
-        conn.close()
 
-        return 200, {"systems": convert_types(systems)}
+def get_system(system_id):
+    try:
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(SYSTEM_SELECT + " WHERE s.system_id = %s", (system_id,))
+            system = cursor.fetchone()
+            cursor.close()
+
+        if not system:
+            return 404, {"error": "System not found"}
+        system.update(system_names([system])[0])
+        return 200, system
 
-    except Exception as e:
-        print("[GET SYSTEMS ERROR]", e)
+    except Exception:
+        log.exception("get system failed")
         return 500, {"error": "Internal server error"}
 
     
@@ -116,16 +189,10 @@ def update_system(system_id, request_body, user_id=None):
         if not data:
             return 400, {"error": "No data provided"}
 
-        allowed_fields = [
-            "hostname", "os_name", "os_version", "ram_size_gb", "cpu_model",
-            "storage_size_gb", "ip_address", "mac_address", "antivirus_status",
-            "user_id", "network_id"
-        ]
-
         updates = []
         values = []
 
-        for field in allowed_fields:
+        for field in SYSTEM_FIELDS:
             if field in data:
                 updates.append(f"{field} = %s")
                 values.append(data[field])
@@ -135,17 +202,19 @@ def update_system(system_id, request_body, user_id=None):
 
         values.append(system_id)  # For WHERE clause
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            UPDATE `system`
-            SET {', '.join(updates)}
-            WHERE system_id = %s
-        """, values)
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                UPDATE `system`
+                SET {', '.join(updates)}
+                WHERE system_id = %s
+            """, values)
+
+            conn.commit()
+            cursor.close()
+        record_change("system", "updated", system_id)
         if user_id:
             log_action(
                 user_id=user_id,
@@ -160,22 +229,26 @@ def update_system(system_id, request_body, user_id=None):
 
     except json.JSONDecodeError:
         return 400, {"error": "Invalid JSON"}
-    except Exception as e:
-        print("[UPDATE SYSTEM ERROR]", e)
+    except Exception:
+        log.exception("update system failed")
         return 500, {"error": "Internal server error"}
 
 
 def delete_system(system_id, user_id=None):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM `system` WHERE system_id = %s", (system_id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        if cursor.rowcount == 0:
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM `system` WHERE system_id = %s", (system_id,))
+            # close() resets rowcount
+            deleted = cursor.rowcount
+            conn.commit()
+            cursor.close()
+
+        if deleted == 0:
             return 404, {"error": "System not found"}
+        record_change("system", "deleted", system_id)
         if user_id:
             log_action(
                 user_id=user_id,
@@ -188,7 +261,7 @@ def delete_system(system_id, user_id=None):
 
         return 200, {"message": "System deleted successfully"}
 
-    except Exception as e:
-        print("[DELETE SYSTEM ERROR]", e)
+    except Exception:
+        log.exception("delete system failed")
         return 500, {"error": "Internal server error"}
 
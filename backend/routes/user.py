@@ -1,48 +1,56 @@
 # backend/routes/user.py
 import json
 from urllib.parse import parse_qs
-from backend.db.connection import get_db_connection
-from backend.utils.security import hash_password
+from backend.db.connection import db_connection
+from backend.utils.security import PasswordPoolBusy, hash_password_pooled
+from backend.utils.changes import record_change
+from backend.utils.logger import get_logger
+from backend.utils.tokens import issue_token, revoke
 
-def register_user(request_body):
+log = get_logger("user")
+
+def register_user(request_body, caller_role=None):
+    """Self-registration always creates a User; only a signed-in Admin may pick another role."""
     try:
         data = json.loads(request_body)
 
         full_name = data.get("full_name")
         email = data.get("email")
         password = data.get("password")
-        role = data.get("role", "User")  # default to 'User'
+        role = data.get("role", "User") if caller_role == "Admin" else "User"
         department_id = data.get("department_id")
 
         if not all([full_name, email, password]):
             return 400, {"error": "Missing required fields"}
 
-        hashed_password = hash_password(password)
+        hashed_password = hash_password_pooled(password)
 
-        conn = get_db_connection()
-        if not conn:
-            return 500, {"error": "Database connection failed"}
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
 
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO user (full_name, email, password_hash, role, department_id)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (full_name, email, hashed_password, role, department_id))
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO user (full_name, email, password_hash, role, department_id)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (full_name, email, hashed_password, role, department_id))
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
+        record_change("user", "added", cursor.lastrowid)
 
         return 201, {"message": "User registered successfully"}
 
     except json.JSONDecodeError:
         return 400, {"error": "Invalid JSON"}
-    except Exception as e:
-        print("[REGISTER ERROR]", e)
+    except PasswordPoolBusy as e:
+        return 503, {"error": str(e)}
+    except Exception:
+        log.exception("register failed")
         return 500, {"error": "Internal server error"}
 
 # backend/routes/user.py
-from backend.utils.security import verify_password
+from backend.utils.security import verify_password_pooled
 
 def login_user(request_body):
     try:
@@ -54,21 +62,22 @@ def login_user(request_body):
         if not email or not password:
             return 400, {"error": "Email and password required"}
 
-        conn = get_db_connection()
-        if not conn:
-            return 500, {"error": "Database connection failed"}
+        with db_connection() as conn:
+            if not conn:
+                return 500, {"error": "Database connection failed"}
 
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT user_id, full_name, email, password_hash, role FROM user WHERE email = %s AND is_active = TRUE", (email,))
-        user = cursor.fetchone()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SELECT user_id, full_name, email, password_hash, role FROM user WHERE email = %s AND is_active = TRUE", (email,))
+            user = cursor.fetchone()
 
-        cursor.close()
-        conn.close()
+            cursor.close()
 
-        if user and verify_password(user["password_hash"], password):
-            # You can later generate a token/session ID here
+        if user and verify_password_pooled(user["password_hash"], password):
+            token, expires = issue_token(user["user_id"], user["role"])
             return 200, {
                 "message": "Login successful",
+                "token": token,
+                "expires_at": expires,
                 "user": {
                     "id": user["user_id"],
                     "name": user["full_name"],
@@ -81,6 +90,17 @@ def login_user(request_body):
 
     except json.JSONDecodeError:
         return 400, {"error": "Invalid JSON"}
-    except Exception as e:
-        print("[LOGIN ERROR]", e)
+    except PasswordPoolBusy as e:
+        return 503, {"error": str(e)}
+    except Exception:
+        log.exception("login failed")
         return 500, {"error": "Internal server error"}
+
+def logout_user(claims):
+    """Revoke the session token the request was made with."""
+    if claims is None:
+        return 401, {"error": "Not logged in"}
+    if not revoke(claims):
+        log.error("logout failed, token denylist is full")
+        return 503, {"error": "Could not end the session, try again later"}
+    return 200, {"message": "Logged out"}
@@ -1,295 +1,615 @@
 # backend/server.py
 
-import json
+import hmac
+import itertools
 import os
-import mimetypes
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import time
+from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
-from backend.routes.user import register_user, login_user
-from backend.routes.system import add_system, get_systems, update_system, delete_system
+from backend.routes.user import register_user, login_user, logout_user
+from backend.routes.system import add_system, get_system, get_systems, update_system, delete_system
+from backend.routes.system import import_systems
 from backend.routes.log import get_logs
-from backend.routes.complaint import add_complaint, get_complaints, update_complaint
-from backend.routes.pdf_export import generate_complaint_pdf
-from backend.routes.pdf_export import generate_complaint_pdf
-from backend.routes.pdf_export import generate_complaint_pdf, generate_system_pdf
-from backend.routes.pdf_export import generate_log_pdf
-from backend.routes.peripheral import add_peripheral, get_peripherals
-from backend.routes.peripheral import update_peripheral, delete_peripheral, export_peripherals
+from backend.routes.stats import STATS_TABLES, get_stats
+from backend.routes.complaint import add_complaint, get_complaint, get_complaints, update_complaint
+from backend.routes.complaint import search_complaints
+from backend.routes.pdf_export import generate_complaint_pdf, generate_system_pdf, generate_log_pdf
+from backend.routes.peripheral import add_peripheral, get_peripheral, get_peripherals
+from backend.routes.peripheral import update_peripheral, delete_peripheral, import_peripherals
+from backend.routes.exports import create_export, get_export, submit_export
+from backend.routes.batch import BATCH_RESOURCES, batch_delete, batch_update
+from backend.config import get_setting, get_int, get_float, get_bool
+from backend.db.connection import get_pool_stats
+from backend.db.log_partitions import run_log_maintenance, start_log_maintenance
+from backend.export_jobs import export_jobs
+from backend.middleware import DEFAULT_MIDDLEWARE
+from backend.router import Router
+from backend.utils.audit import audit_writer
+from backend.utils.bulk_import import iter_body_lines
+from backend.utils import refdata
+from backend.async_serving import AsyncHTTPServer
+from backend.serving import SERVING_MODES, make_server, serve_prefork
+from backend.static_assets import send_file, start_static_watch, static_assets
+from backend.utils.compression import (
+    COMPRESSION_ENABLED, GzipChunker, accepts_encoding, gzip_body, gzip_etag, should_gzip
+)
+from backend.utils.encoder import dumps
+from backend.utils.events import event_hub
+from backend.utils import logger, metrics
+from backend.utils.security import password_pool
+from backend.utils import tokens
+from backend.utils.streaming import JsonStream
+
+# Trust X-User-ID / X-User-Role (or ?user_id= / ?user_role=) from clients
+# that do not send a session token. Only for migrating old clients: anyone
+# can set those headers.
+AUTH_LEGACY_HEADERS = get_bool("AUTH_LEGACY_HEADERS", False)
+
+log = logger.get_logger("server")
+
+# Tables each cacheable GET reads. Their version counters make up the
+# response's ETag (see the etag middleware).
+SYSTEM_TABLES = ("system", "user", "department", "network")
+COMPLAINT_TABLES = ("complaint", "user")
+PERIPHERAL_TABLES = ("peripheral", "system")
+LOG_TABLES = ("log", "user")
+
+
+class CountingWriter:
+    """Wraps the handler's wfile to count the bytes written (http_response_bytes_total)."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return self._wfile.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._wfile, name)
+
 
 class MyHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so list responses can use chunked transfer encoding. Under the
+    # thread-per-connection modes every response still closes the connection,
+    # so worker threads are never parked on idle keep-alive sockets; the
+    # async front end holds idle connections itself and sets keep_alive.
+    protocol_version = "HTTP/1.1"
+    keep_alive = False
+
+    # Set per request by _dispatch(); middleware adds headers (CORS) that
+    # every response of the request carries
+    default_headers = {}
+    response_started = False
+    # 0 until a status line goes out
+    response_status = 0
+
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+
+    def log_request(self, code="-", size="-"):
+        # The instrument middleware writes the access log
+        pass
+
+    def log_message(self, format, *args):
+        # Malformed requests and timeouts reported by BaseHTTPRequestHandler
+        log.warning("http protocol error", client=self.client_address[0], detail=format % args)
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        if not self.keep_alive:
+            self.send_header("Connection", "close")
+        for name, value in self.default_headers.items():
+            self.send_header(name, value)
+        self.response_started = True
+        self.response_status = code
+
+    def _session_token(self):
+        # Authorization: Bearer <token>, or ?token= for plain download links
+        authorization = self.headers.get("Authorization", "")
+        if authorization[:7].lower() == "bearer ":
+            return authorization[7:].strip()
+        query_params = parse_qs(urlparse(self.path).query)
+        return query_params.get("token", [None])[0]
+
+    def _claims(self):
+        """The verified session token's Claims, or None (no token, or a bad one)."""
+        token = self._session_token()
+        if not token:
+            return None
+        # Cached per token: a request asks several times, and a kept-alive
+        # connection may carry several requests
+        cached = getattr(self, "_cached_claims", None)
+        if cached is None or cached[0] != token:
+            cached = self._cached_claims = (token, tokens.verify_token(token))
+        return cached[1]
+
     def _parse_user_id(self):
-        # First try to get from headers
+        claims = self._claims()
+        if claims is not None:
+            return claims.user_id
+        if not AUTH_LEGACY_HEADERS:
+            return None
+
         user_id = self.headers.get("X-User-ID")
         if user_id and user_id.isdigit():
             return int(user_id)
-        
-        # Then try to get from query parameters
-        parsed_path = urlparse(self.path)
-        query_params = parse_qs(parsed_path.query)
+        query_params = parse_qs(urlparse(self.path).query)
         if 'user_id' in query_params and query_params['user_id'][0].isdigit():
             return int(query_params['user_id'][0])
-        
         return None
 
     def _parse_role(self):
-        # First try to get from headers
+        claims = self._claims()
+        if claims is not None:
+            return claims.role
+        if not AUTH_LEGACY_HEADERS:
+            return "User"
+
         role = self.headers.get("X-User-Role")
         if role:
             return role
-        
-        # Then try to get from query parameters
-        parsed_path = urlparse(self.path)
-        query_params = parse_qs(parsed_path.query)
+        query_params = parse_qs(urlparse(self.path).query)
         if 'user_role' in query_params:
             return query_params['user_role'][0]
-        
         return "User"  # Default to 'User'
 
     def _read_body(self):
         content_length = int(self.headers.get('Content-Length', 0))
         return self.rfile.read(content_length).decode()
 
-    def _set_cors_headers(self):
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type, Accept, X-User-ID, X-User-Role")
-
-    def _send_json(self, status, response):
+    def _send_json(self, status, response, extra_headers=None):
+        if isinstance(response, JsonStream):
+            self._send_stream(status, response, extra_headers)
+            return
+        started = time.perf_counter()
+        body = dumps(response).encode()
+        metrics.json_encode_duration.observe(time.perf_counter() - started, "response")
+        headers = dict(extra_headers or {})
+        if COMPRESSION_ENABLED:
+            headers["Vary"] = "Accept-Encoding"
+        if should_gzip(self.headers.get("Accept-Encoding"), len(body)):
+            body = gzip_body(body)
+            self._mark_gzip(headers)
         self.send_response(status)
-        self._set_cors_headers()
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(json.dumps(response).encode())
-        
-    def _serve_static_file(self, file_path):
-        """Serve a static file from the webapp directory"""
-        # Get the absolute path to the webapp directory
-        webapp_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'webapp')
-        
-        # Normalize the file path to prevent directory traversal attacks
-        normalized_path = os.path.normpath(file_path)
-        if normalized_path.startswith('/'):
-            normalized_path = normalized_path[1:]
-            
-        # Get the full path to the requested file
-        full_path = os.path.join(webapp_dir, normalized_path)
-        
-        # Check if the file exists
-        if not os.path.exists(full_path) or not os.path.isfile(full_path):
-            # If the path doesn't exist, try serving index.html
-            if file_path == '/' or file_path == '':
-                full_path = os.path.join(webapp_dir, 'index.html')
-                if not os.path.exists(full_path):
-                    self.send_response(404)
-                    self.end_headers()
-                    self.wfile.write(b'File not found')
-                    return
-            else:
-                self.send_response(404)
-                self.end_headers()
-                self.wfile.write(b'File not found')
-                return
-        
-        # Determine the content type
-        content_type, _ = mimetypes.guess_type(full_path)
-        if content_type is None:
-            content_type = 'application/octet-stream'
-        
-        # Serve the file
-        try:
-            with open(full_path, 'rb') as file:
-                self.send_response(200)
-                self.send_header('Content-Type', content_type)
-                self.end_headers()
-                self.wfile.write(file.read())
-        except Exception as e:
-            print(f"Error serving file {full_path}: {e}")
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(b'Internal server error')
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self._set_cors_headers()
-        self.end_headers()
+        self.wfile.write(body)
 
+    def _send_bytes(self, status, body, content_type, extra_headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
 
-    def do_POST(self):
-        request_body = self._read_body()
-        path = self.path
-        
-        print(f"POST request to {path}")
-        print(f"Headers: {dict(self.headers)}")
-        print(f"Body: {request_body}")
-
-        if path == "/register":
-            status, response = register_user(request_body)
-        elif path == "/login":
-            status, response = login_user(request_body)
-        elif path == "/add-system":
-            status, response = add_system(request_body)
-        elif path == "/add-complaint":
-            status, response = add_complaint(request_body)
-        elif path == "/add-peripheral":
-            print("Processing add-peripheral request")
-            status, response = add_peripheral(request_body)
-            print(f"add-peripheral response: {status}, {response}")
-
+    def _send_export(self, status, body, content_type, filename=None):
+        """Send an export: a report stream on success, a plain-text error otherwise."""
+        headers = {"Content-Disposition": f"attachment; filename={filename}"} if filename else None
+        if isinstance(body, bytes):
+            self._send_bytes(status, body, content_type, headers)
         else:
-            status, response = 404, {"error": "Route not found"}
-
-        self._send_json(status, response)
-
-    def do_GET(self):
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        query = parsed_path.query  # Parse the query string once
-        
-        # API endpoints
-        if path == "/systems":
-            status, response = get_systems(query)
+            self._send_stream(status, body, headers)
+
+    def _send_export_file(self, job_id):
+        """Send a finished background export from the export cache."""
+        pdf_path = export_jobs.result_path(job_id)
+        job = export_jobs.status(job_id)
+        if job is None:
+            self._send_json(404, {"error": "Export not found"})
+            return
+        if pdf_path is None:
+            self._send_json(409, {"error": "Export is not finished", "status": job["status"]})
+            return
 
-        elif path.startswith("/complaints"):
-            status, response = get_complaints(query)
+        try:
+            size = os.path.getsize(pdf_path)
+        except OSError:
+            # Pruned since the check above
+            self._send_json(404, {"error": "Export not found"})
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(size))
+        self.send_header('Content-Disposition', f"attachment; filename={job['report'] or 'export'}.pdf")
+        # The id changes with the data, so the file behind it never does
+        self.send_header('Cache-Control', 'private, max-age=3600')
+        self.end_headers()
+        try:
+            self.wfile.bytes_written += send_file(self.connection, self.wfile, pdf_path, size)
+        except OSError as e:
+            log.error("export file not sent", path=pdf_path, error=e)
+
+    def _send_event_stream(self, query=""):
+        """Open a GET /events feed and hand the connection to the event hub."""
+        detach = getattr(self.server, "detach", None)
+        if detach is None or event_hub.full():
+            # SERVER_MODE=single cannot give its only thread to one client
+            self._send_json(503, {"error": "Live updates are not available"}, {"Retry-After": "30"})
+            return
+        types = [t for t in parse_qs(query).get("types", [""])[0].split(",") if t]
 
-        elif path == "/logs":
-            status, response = get_logs()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        # Tells nginx not to buffer the feed
+        self.send_header('X-Accel-Buffering', 'no')
+        if self.keep_alive:
+            # The feed has no length: it ends when the connection does
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        event_hub.subscribe(detach(self), self.headers.get("Last-Event-ID"), types)
+
+    def _mark_gzip(self, headers):
+        headers["Content-Encoding"] = "gzip"
+        if "ETag" in headers:
+            headers["ETag"] = gzip_etag(headers["ETag"])
+
+    def _send_stream(self, status, stream, extra_headers=None):
+        """Send an iterable body with chunked encoding (raw bytes to HTTP/1.0 clients)."""
+        chunked = self.request_version != "HTTP/1.0"
+        if not chunked:
+            # The end of the body is where the connection closes
+            self.close_connection = True
+        headers_sent = False
+        try:
+            chunks = iter(stream)
+            # The first chunk decides the encoding: a stream that fits in one
+            # short chunk is not worth compressing
+            first = next(chunks, b"")
+            headers = dict(extra_headers or {})
+            gzipper = None
+            # Only JSON is negotiated; PDF pages are already deflated
+            json_body = stream.content_type == "application/json"
+            if COMPRESSION_ENABLED and json_body:
+                headers["Vary"] = "Accept-Encoding"
+            if json_body and should_gzip(self.headers.get("Accept-Encoding"), len(first)):
+                gzipper = GzipChunker()
+                self._mark_gzip(headers)
 
-        elif path == "/export-complaints":
-            if self._parse_role() != "Admin":
-                self._send_json(403, {"error": "Only Admins can export complaints"})
-                return
-            status, pdf_bytes, content_type = generate_complaint_pdf(query)
             self.send_response(status)
-            self.send_header("Content-Type", content_type)
-            self.send_header("Content-Disposition", "attachment; filename=complaints.pdf")
+            self.send_header('Content-Type', stream.content_type)
+            if chunked:
+                self.send_header('Transfer-Encoding', 'chunked')
+            for name, value in headers.items():
+                self.send_header(name, value)
             self.end_headers()
-            self.wfile.write(pdf_bytes)
-            return
+            headers_sent = True
 
-        elif path == "/export-systems":
-            if self._parse_role() != "Admin":
-                self._send_json(403, {"error": "Only Admins can export systems"})
-                return
-            status, pdf_bytes, content_type = generate_system_pdf(query)
-            self.send_response(status)
-            self.send_header("Content-Type", content_type)
-            self.send_header("Content-Disposition", "attachment; filename=systems.pdf")
-            self.end_headers()
-            self.wfile.write(pdf_bytes)
+            def write(data):
+                if not data:
+                    return
+                if chunked:
+                    self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+                else:
+                    self.wfile.write(data)
+                # Each chunk goes out as it is made (a no-op on a socket)
+                self.wfile.flush()
+
+            for chunk in itertools.chain((first,), chunks):
+                if chunk:
+                    write(gzipper.compress(chunk) if gzipper else chunk)
+            if gzipper:
+                write(gzipper.finish())
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            log.info("client disconnected during stream", path=urlparse(self.path).path)
+        except Exception:
+            log.exception("stream failed", path=urlparse(self.path).path)
+            if not headers_sent:
+                self._send_json(500, {"error": "Internal server error"})
+            else:
+                # Headers are already out; the missing terminating chunk and
+                # the closed connection tell the client the body is incomplete
+                self.close_connection = True
+        finally:
+            stream.close()
+        
+    def _serve_static_file(self, file_path, query=""):
+        """Serve a webapp file from the in-memory asset store"""
+        asset = static_assets.get(file_path)
+        if asset is None:
+            self._send_bytes(404, b'File not found', 'text/plain')
             return
 
-        elif path == "/export-logs":
-            if self._parse_role() != "Admin":
-                self._send_json(403, {"error": "Only Admins can export logs"})
-                return
-            status, pdf_bytes, content_type = generate_log_pdf()
-            self.send_response(status)
-            self.send_header("Content-Type", content_type)
-            self.send_header("Content-Disposition", "attachment; filename=logs.pdf")
+        headers = {
+            "ETag": asset.etag,
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": static_assets.cache_control(asset, query),
+        }
+        if asset.not_modified(self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")):
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
             self.end_headers()
-            self.wfile.write(pdf_bytes)
             return
 
-        elif path == "/peripherals":
-            status, response = get_peripherals()
-
-        elif path == "/export/peripherals":
-            status, response = export_peripherals()
-
-        elif path == "/export/system-pdf":
-            query_string = parsed_path.query
-            status, content, content_type = generate_system_pdf(query_string)
-            self.send_response(status)
-            self.send_header("Content-Type", content_type)
+        if not asset.in_memory:
+            self.send_response(200)
+            self.send_header('Content-Type', asset.content_type)
+            self.send_header('Content-Length', str(asset.size))
+            for name, value in headers.items():
+                self.send_header(name, value)
             self.end_headers()
-            self.wfile.write(content)
+            try:
+                self.wfile.bytes_written += send_file(self.connection, self.wfile, asset.disk_path, asset.size)
+            except OSError as e:
+                log.error("static file not sent", path=asset.disk_path, error=e)
             return
-            
-        # If not an API endpoint, try to serve a static file
-        elif path.startswith('/js/') or path.startswith('/css/') or path.startswith('/img/') or path == '/' or path == '/index.html' or path == '/login.html':
-            self._serve_static_file(path)
+
+        body = asset.body
+        if asset.gzip_body is not None:
+            headers["Vary"] = "Accept-Encoding"
+            if accepts_encoding(self.headers.get("Accept-Encoding"), "gzip"):
+                body = asset.gzip_body
+                headers["Content-Encoding"] = "gzip"
+        self._send_bytes(200, body, asset.content_type, headers)
+
+    def _send_response(self, response):
+        """Send a Response that middleware or a handler returned."""
+        if response.body is not None:
+            self._send_json(response.status, response.body, response.headers)
             return
+        self.send_response(response.status)
+        for name, value in (response.headers or {}).items():
+            self.send_header(name, value)
+        if response.status != 304:
+            self.send_header('Content-Length', '0')
+        self.end_headers()
 
-        else:
-            # Try to serve as a static file first
-            try:
-                self._serve_static_file(path)
-                return
-            except:
-                # If that fails, return a 404 API response
-                status, response = 404, {"error": "Route not found"}
+    def _dispatch(self, method):
+        self.default_headers = {}
+        self.response_started = False
+        self.response_status = 0
+        self.wfile.bytes_written = 0
+        response = router.dispatch(self, method)
+        if response is not None:
+            self._send_response(response)
 
-        self._send_json(status, response)
+    def do_GET(self):
+        self._dispatch("GET")
 
+    def do_POST(self):
+        self._dispatch("POST")
 
     def do_PUT(self):
-        parsed_path = urlparse(self.path)
-        path_parts = parsed_path.path.strip("/").split("/")
-        request_body = self._read_body()
-        user_id = self._parse_user_id()
-        
-        print(f"PUT request to {parsed_path.path}")
-        print(f"Headers: {dict(self.headers)}")
-        print(f"Body: {request_body}")
-
-        if len(path_parts) == 2 and path_parts[0] == "system":
-            try:
-                system_id = int(path_parts[1])
-                print(f"Updating system {system_id}")
-                status, response = update_system(system_id, request_body, user_id=user_id)
-                print(f"Update system response: {status}, {response}")
-            except ValueError:
-                status, response = 400, {"error": "Invalid system ID"}
-
-        elif len(path_parts) == 2 and path_parts[0] == "complaint":
-            try:
-                complaint_id = int(path_parts[1])
-                print(f"Updating complaint {complaint_id}")
-                status, response = update_complaint(complaint_id, request_body, user_id=user_id)
-                print(f"Update complaint response: {status}, {response}")
-            except ValueError:
-                status, response = 400, {"error": "Invalid complaint ID"}
-        elif len(path_parts) == 2 and path_parts[0] == "peripheral":
-            try:
-                peripheral_id = int(path_parts[1])
-                print(f"Updating peripheral {peripheral_id}")
-                status, response = update_peripheral(peripheral_id, request_body, user_id=user_id)
-                print(f"Update peripheral response: {status}, {response}")
-            except ValueError:
-                status, response = 400, {"error": "Invalid peripheral ID"}
-        else:
-            status, response = 404, {"error": "Route not found"}
-
-        self._send_json(status, response)
+        self._dispatch("PUT")
 
     def do_DELETE(self):
-        parsed_path = urlparse(self.path)
-        path_parts = parsed_path.path.strip("/").split("/")
-        user_id = self._parse_user_id()
+        self._dispatch("DELETE")
 
-        if len(path_parts) == 2 and path_parts[0] == "system":
-            try:
-                system_id = int(path_parts[1])
-                status, response = delete_system(system_id, user_id=user_id)
-            except ValueError:
-                status, response = 400, {"error": "Invalid system ID"}
-        elif len(path_parts) == 2 and path_parts[0] == "peripheral":
-            try:
-                peripheral_id = int(path_parts[1])
-                status, response = delete_peripheral(peripheral_id, user_id=user_id)
-            except ValueError:
-                status, response = 400, {"error": "Invalid peripheral ID"}
-        else:
-            status, response = 404, {"error": "Route not found"}
-
-        self._send_json(status, response)
-
-
-def run(host='0.0.0.0', port=8000):
-    server_address = (host, port)
-    httpd = HTTPServer(server_address, MyHandler)
-    print(f"🚀 Server running at http://{host}:{port}/")
-    httpd.serve_forever()
+    def do_OPTIONS(self):
+        self._dispatch("OPTIONS")
+
+
+# Route handlers take a backend.router.Request. Most adapt one of the route
+# functions in backend/routes/; those returning None have written their
+# response themselves.
+
+def serve_static(request):
+    # Anything no route claims is looked up in the webapp directory (404 if absent)
+    request.handler._serve_static_file(request.path, request.query)
+
+
+def send_pdf(generate, filename=None):
+    def handler(request):
+        status, body, content_type = generate(request.query)
+        request.handler._send_export(status, body, content_type, filename)
+    return handler
+
+
+def handle_import(importer):
+    def handler(request):
+        """Bulk import: the body is parsed as it is read, never buffered whole."""
+        headers = request.headers
+        lines = iter_body_lines(
+            request.handler.rfile,
+            int(headers.get('Content-Length', 0)),
+            chunked="chunked" in headers.get('Transfer-Encoding', "").lower(),
+        )
+        return importer(lines, headers.get('Content-Type'),
+                        parse_qs(request.query).get("format", [None])[0],
+                        user_id=request.user_id)
+    return handler
+
+
+def stream_events(request):
+    request.handler._send_event_stream(request.query)
+
+
+def send_export_file(request):
+    request.handler._send_export_file(request.params["job_id"])
+
+
+def server_stats(request):
+    return 200, {
+        "db_pool": get_pool_stats(),
+        "refdata_pool": get_pool_stats("refdata"),
+        "refdata_cache": refdata.stats(),
+        "audit_log": audit_writer.stats(),
+        "static_assets": static_assets.stats(),
+        "export_jobs": export_jobs.stats(),
+        "auth": {"tokens": tokens.stats(), "password_pool": password_pool.stats()},
+        "logging": logger.stats(),
+        "events": event_hub.stats(),
+    }
+
+
+def serve_metrics(request):
+    if metrics.METRICS_TOKEN:
+        supplied = request.handler._session_token() or ""
+        if not hmac.compare_digest(supplied.encode(), metrics.METRICS_TOKEN.encode()):
+            return 401, {"error": "Invalid metrics token"}
+    request.handler._send_bytes(200, metrics.registry.render().encode(), metrics.CONTENT_TYPE)
+
+
+def build_router():
+    r = Router()
+    for middleware in DEFAULT_MIDDLEWARE:
+        r.use(middleware)
+    r.fallback("GET", serve_static)
+
+    # Authentication
+    # Verified claims only: legacy X-User-Role headers must not mint Admins
+    r.post("/register", lambda req: register_user(
+        req.body, caller_role=getattr(req.handler._claims(), "role", None)))
+    r.post("/login", lambda req: login_user(req.body), public=True)
+    r.post("/logout", lambda req: logout_user(req.handler._claims()))
+
+    # Systems
+    r.get("/systems", lambda req: get_systems(req.query), etag=SYSTEM_TABLES)
+    r.get("/system/{id:int}", lambda req: get_system(req.params["id"]),
+          etag=SYSTEM_TABLES, invalid="Invalid system ID")
+    r.post("/add-system", lambda req: add_system(req.body))
+    r.put("/system/{id:int}", lambda req: update_system(req.params["id"], req.body, user_id=req.user_id),
+          invalid="Invalid system ID")
+    r.delete("/system/{id:int}", lambda req: delete_system(req.params["id"], user_id=req.user_id),
+             invalid="Invalid system ID")
+    r.post("/import/systems", handle_import(import_systems),
+           role="Admin", forbidden="Only Admins can import inventory")
+
+    # Peripherals
+    r.get("/peripherals", lambda req: get_peripherals(req.query), etag=PERIPHERAL_TABLES)
+    r.get("/peripheral/{id:int}", lambda req: get_peripheral(req.params["id"]),
+          etag=PERIPHERAL_TABLES, invalid="Invalid peripheral ID")
+    r.post("/add-peripheral", lambda req: add_peripheral(req.body))
+    r.put("/peripheral/{id:int}", lambda req: update_peripheral(req.params["id"], req.body, user_id=req.user_id),
+          invalid="Invalid peripheral ID")
+    r.delete("/peripheral/{id:int}", lambda req: delete_peripheral(req.params["id"], user_id=req.user_id),
+             invalid="Invalid peripheral ID")
+    r.post("/import/peripherals", handle_import(import_peripherals),
+           role="Admin", forbidden="Only Admins can import inventory")
+
+    # Complaints
+    r.get("/complaints", lambda req: get_complaints(req.query), etag=COMPLAINT_TABLES)
+    r.get("/complaints/search", lambda req: search_complaints(req.query), etag=COMPLAINT_TABLES)
+    r.get("/complaint/{id:int}", lambda req: get_complaint(req.params["id"]),
+          etag=COMPLAINT_TABLES, invalid="Invalid complaint ID")
+    r.post("/add-complaint", lambda req: add_complaint(req.body))
+    r.put("/complaint/{id:int}", lambda req: update_complaint(req.params["id"], req.body, user_id=req.user_id),
+          invalid="Invalid complaint ID")
+
+    # Batch changes
+    for name in BATCH_RESOURCES:
+        r.put(f"/{name}/batch", lambda req, name=name: batch_update(name, req.body, user_id=req.user_id),
+              role="Admin", forbidden="Only Admins can run batch changes")
+        r.delete(f"/{name}/batch", lambda req, name=name: batch_delete(name, req.body, user_id=req.user_id),
+                 role="Admin", forbidden="Only Admins can run batch changes")
+
+    # Logs and stats
+    r.get("/logs", lambda req: get_logs(req.query), etag=LOG_TABLES)
+    r.get("/stats", lambda req: get_stats(), etag=STATS_TABLES)
+    # Server-Sent Events; EventSource cannot set headers, so it passes ?token=
+    r.get("/events", stream_events)
+    r.get("/internal/stats", server_stats,
+          role="Admin", forbidden="Only Admins can view server stats")
+    # For Prometheus; guarded by METRICS_TOKEN rather than a session
+    r.get("/metrics", serve_metrics, public=True)
+
+    # Exports
+    r.get("/export-complaints", send_pdf(generate_complaint_pdf, "complaints.pdf"),
+          role="Admin", forbidden="Only Admins can export complaints")
+    r.get("/export-systems", send_pdf(generate_system_pdf, "systems.pdf"),
+          role="Admin", forbidden="Only Admins can export systems")
+    r.get("/export-logs", send_pdf(generate_log_pdf, "logs.pdf"),
+          role="Admin", forbidden="Only Admins can export logs")
+    r.get("/export/system-pdf", send_pdf(generate_system_pdf))
+    # Rendered by the export job queue; poll the returned status_url
+    r.get("/export/peripherals", lambda req: submit_export("peripherals", {}),
+          role="Admin", forbidden="Only Admins can export peripherals")
+    r.post("/exports", lambda req: create_export(req.body),
+           role="Admin", forbidden="Only Admins can export reports")
+    r.get("/exports/{job_id}", lambda req: get_export(req.params["job_id"]),
+          role="Admin", forbidden="Only Admins can export reports")
+    r.get("/exports/{job_id}/file", send_export_file,
+          role="Admin", forbidden="Only Admins can export reports")
+
+    return r.compile()
+
+
+router = build_router()
+
+
+def _worker_start():
+    metrics.registry.start_worker()
+    start_static_watch()
+
+
+def _worker_exit():
+    metrics.registry.close()
+    audit_writer.close()
+    event_hub.close()
+    export_jobs.close()
+    password_pool.close()
+
+
+def run(host=None, port=None, mode=None):
+    host = host or get_setting("SERVER_HOST", "0.0.0.0")
+    port = port or get_int("SERVER_PORT", 8000)
+    mode = mode or get_setting("SERVER_MODE", "threaded")
+    if mode not in SERVING_MODES:
+        raise ValueError(f"Unknown SERVER_MODE {mode!r}, expected one of {SERVING_MODES}")
+
+    max_workers = get_int("SERVER_THREADS", 4 if mode == "prefork" else 16)
+    queue_depth = get_int("SERVER_QUEUE_DEPTH", 32 if mode == "prefork" else 64)
+    backlog = get_int("SERVER_BACKLOG", 128)
+    maintenance_hours = get_float("LOG_MAINTENANCE_INTERVAL_HOURS", 24)
+
+    # Loaded before forking so prefork workers share the pages
+    asset_count = static_assets.load()
+    log.info("static assets loaded", assets=asset_count, root=static_assets.root)
+
+    if mode == "prefork":
+        if maintenance_hours > 0:
+            # No threads before fork(): one pass now, cron for the rest
+            run_log_maintenance()
+        metrics.registry.enable_multiprocess(metrics.METRICS_DIR, metrics.METRICS_FLUSH_INTERVAL)
+        processes = get_int("SERVER_PROCESSES", os.cpu_count() or 1)
+        log.info("server running", url=f"http://{host}:{port}/", mode=mode, processes=processes,
+                 threads=max_workers, queue=queue_depth)
+        serve_prefork(MyHandler, host, port, processes=processes, max_workers=max_workers,
+                      queue_depth=queue_depth, backlog=backlog,
+                      on_worker_start=_worker_start, on_worker_exit=_worker_exit)
+        return
+
+    if mode == "async":
+        httpd = AsyncHTTPServer(
+            MyHandler, host, port, max_workers=max_workers, queue_depth=queue_depth, backlog=backlog,
+            max_connections=get_int("SERVER_MAX_CONNECTIONS", 10000),
+            keepalive_timeout=get_float("SERVER_KEEPALIVE_TIMEOUT", 75.0),
+            header_timeout=get_float("SERVER_HEADER_TIMEOUT", 10.0),
+            io_timeout=get_float("SERVER_IO_TIMEOUT", 30.0),
+        )
+    else:
+        httpd = make_server(MyHandler, host, port, mode=mode, max_workers=max_workers,
+                            queue_depth=queue_depth, backlog=backlog)
+    if maintenance_hours > 0:
+        start_log_maintenance(maintenance_hours)
+    start_static_watch()
+    if mode == "threaded":
+        log.info("server running", url=f"http://{host}:{port}/", mode=mode,
+                 threads=max_workers, queue=queue_depth)
+    elif mode == "async":
+        log.info("server running", url=f"http://{host}:{port}/", mode=mode,
+                 threads=max_workers, queue=queue_depth, max_connections=httpd.max_connections)
+    else:
+        log.info("server running", url=f"http://{host}:{port}/", mode=mode)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        _worker_exit()
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,263 @@
+# backend/serving.py
+#
+# Serving modes for the HTTP server:
+#   single   - the original one-request-at-a-time HTTPServer
+#   threaded - one process, a bounded pool of worker threads
+#   prefork  - N forked worker processes, each with its own SO_REUSEPORT
+#              listening socket (the kernel spreads connections across them)
+#              and its own bounded thread pool
+#   async    - an asyncio loop holding keep-alive connections in front of a
+#              bounded thread pool (backend/async_serving.py)
+#
+# All bounded modes admit at most `max_workers` requests in flight plus
+# `queue_depth` waiting for a thread; anything beyond that gets an immediate
+# 503 instead of piling up behind a slow PDF export or login.
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+from backend.utils import logger
+
+SERVING_MODES = ("single", "threaded", "prefork", "async")
+
+log = logger.get_logger("serving")
+
+_OVERLOADED_BODY = json.dumps({"error": "Server busy, please retry"}).encode()
+OVERLOADED_RESPONSE = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"Content-Length: " + str(len(_OVERLOADED_BODY)).encode() + b"\r\n\r\n"
+    + _OVERLOADED_BODY
+)
+
+
+class SocketSink:
+    """Non-blocking writer for a detached connection, used from any thread.
+
+    send() never waits: what the socket does not take stays here, and
+    `pending` tells the owner how far behind the client is so it can give
+    up on it.
+    """
+
+    def __init__(self, sock):
+        sock.setblocking(False)
+        self._sock = sock
+        self._backlog = bytearray()
+        self.closed = False
+
+    @property
+    def pending(self):
+        return len(self._backlog)
+
+    def send(self, data):
+        self._backlog += data
+        return self.flush()
+
+    def flush(self):
+        if self.closed:
+            return False
+        try:
+            while self._backlog:
+                sent = self._sock.send(self._backlog)
+                del self._backlog[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class BoundedThreadPoolHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a fixed-size thread pool."""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, max_workers=16,
+                 queue_depth=64, backlog=128, reuse_port=False):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.request_queue_size = backlog
+        self.allow_reuse_port = reuse_port
+        # One slot per running request plus one per request allowed to wait
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="http-worker"
+        )
+        self.rejected_requests = 0
+        # Connections handed over by detach(), left open when their handler returns
+        self._detached = set()
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self.rejected_requests += 1
+            self._reject(request)
+            return
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Executor already shut down
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def detach(self, handler):
+        """Take the connection from a handler that has sent its headers; returns a sink for the rest.
+
+        The worker thread is freed when the handler returns, but the
+        connection stays open; the sink's owner closes it.
+        """
+        handler.wfile.flush()
+        self._detached.add(handler.connection)
+        return SocketSink(handler.connection)
+
+    def shutdown_request(self, request):
+        if request in self._detached:
+            self._detached.discard(request)
+            return
+        super().shutdown_request(request)
+
+    def _reject(self, request):
+        try:
+            request.sendall(OVERLOADED_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # Let requests that were already admitted finish
+        self._executor.shutdown(wait=True)
+
+
+def make_server(handler_class, host, port, mode="threaded", max_workers=16,
+                queue_depth=64, backlog=128, reuse_port=False):
+    if mode == "single":
+        return HTTPServer((host, port), handler_class)
+    return BoundedThreadPoolHTTPServer(
+        (host, port), handler_class,
+        max_workers=max_workers, queue_depth=queue_depth,
+        backlog=backlog, reuse_port=reuse_port,
+    )
+
+
+def _install_graceful_stop(httpd):
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever returns, so it cannot run
+        # on the thread that is inside serve_forever
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+
+def _run_worker(handler_class, host, port, max_workers, queue_depth, backlog):
+    httpd = make_server(
+        handler_class, host, port, mode="threaded",
+        max_workers=max_workers, queue_depth=queue_depth,
+        backlog=backlog, reuse_port=True,
+    )
+    _install_graceful_stop(httpd)
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+
+
+def serve_prefork(handler_class, host, port, processes=None, max_workers=4,
+                  queue_depth=32, backlog=128, on_worker_start=None, on_worker_exit=None):
+    """Fork `processes` workers that each bind host:port with SO_REUSEPORT.
+
+    The parent only supervises: it restarts workers that die unexpectedly and
+    forwards SIGTERM/SIGINT so every worker drains its in-flight requests.
+    Workers leave through os._exit(), which skips atexit handlers, so
+    per-process cleanup goes in `on_worker_exit` (the log queue is drained
+    here, after it).
+    """
+    if not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+        raise RuntimeError("prefork mode needs SO_REUSEPORT and fork() (Linux/BSD)")
+
+    processes = processes or os.cpu_count() or 1
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                if on_worker_start:
+                    on_worker_start()
+                _run_worker(handler_class, host, port, max_workers, queue_depth, backlog)
+                if on_worker_exit:
+                    on_worker_exit()
+            except BaseException as e:
+                log.error("worker failed", pid=os.getpid(), error=e)
+                exit_code = 1
+            finally:
+                # os._exit() skips atexit, which would write out queued lines
+                logger.close()
+                os._exit(exit_code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(processes):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code != 0 and time.monotonic() - started < 1.0:
+            # Crashing straight after start (e.g. port in use): respawning
+            # would just spin, so bring the whole server down instead
+            log.error("worker failed on startup, stopping", pid=pid, exit_code=exit_code)
+            stop(None, None)
+            continue
+        log.warning("worker exited, restarting", pid=pid, exit_code=exit_code)
+        spawn()
@@ -0,0 +1,227 @@
+# backend/static_assets.py
+#
+# Serves the webapp directory from memory. At startup every file is read
+# once, hashed and (when it pays off) gzip-compressed, so a request is a
+# dict lookup plus one write, with no stat/open/read or mimetypes call.
+#
+#   - ETags are content hashes; If-None-Match / If-Modified-Since get 304.
+#   - HTML pages reference their scripts and stylesheets as
+#     js/app.js?v=<hash>. A request carrying the current ?v= is immutable
+#     and cached for a year; anything else must revalidate (no-cache), so
+#     a deploy is picked up on the next page load.
+#   - Files over STATIC_MAX_CACHED_FILE bytes are not held in memory; they
+#     are sent from disk with os.sendfile().
+#   - STATIC_WATCH=true rescans the directory every STATIC_WATCH_INTERVAL
+#     seconds and swaps in a fresh index when anything changed (development).
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from backend.config import get_bool, get_float, get_int
+from backend.utils.logger import get_logger
+from backend.utils.versions import etag_matches
+
+log = get_logger("static")
+
+WEBAPP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "webapp"
+)
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/javascript", "application/json", "image/svg+xml",
+)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+_ASSET_REF_RE = re.compile(r'(src|href)="((?:js|css|img)/[^"?#]+)"')
+
+
+class Asset:
+    __slots__ = (
+        "path", "content_type", "body", "gzip_body", "size", "etag",
+        "version", "mtime", "last_modified", "disk_path",
+    )
+
+    def __init__(self, path, content_type, body, disk_path, mtime, size):
+        self.path = path
+        self.content_type = content_type
+        self.body = body
+        self.disk_path = disk_path
+        self.mtime = mtime
+        self.size = size
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.gzip_body = None
+        if body is not None:
+            digest = hashlib.sha256(body).hexdigest()
+            self.version = digest[:12]
+            self.etag = f'"{digest[:32]}"'
+        else:
+            # Too large to hash on every scan: identify by size and mtime
+            self.version = f"{int(mtime):x}{size:x}"
+            self.etag = f'"{self.version}"'
+
+    @property
+    def in_memory(self):
+        return self.body is not None
+
+    def not_modified(self, if_none_match, if_modified_since):
+        if if_none_match:
+            return etag_matches(if_none_match, self.etag)
+        if if_modified_since:
+            try:
+                return int(self.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class StaticAssets:
+    def __init__(self, root=WEBAPP_DIR, max_cached_file=1024 * 1024,
+                 gzip_level=9, min_gzip_size=256):
+        self.root = root
+        self.max_cached_file = max_cached_file
+        self.gzip_level = gzip_level
+        self.min_gzip_size = min_gzip_size
+        self._assets = {}
+        self._signature = None
+        self._watcher = None
+
+    def _scan(self):
+        """{relative path: (disk path, mtime, size)} for every servable file."""
+        files = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                disk_path = os.path.join(dirpath, filename)
+                stat = os.stat(disk_path)
+                relative = os.path.relpath(disk_path, self.root).replace(os.sep, "/")
+                files[relative] = (disk_path, stat.st_mtime, stat.st_size)
+        return files
+
+    def _build(self, disk_path, relative, mtime, size, rewrite=None):
+        content_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+        if size > self.max_cached_file:
+            return Asset(relative, content_type, None, disk_path, mtime, size)
+
+        with open(disk_path, "rb") as f:
+            body = f.read()
+        if rewrite:
+            body = rewrite(body)
+        asset = Asset(relative, content_type, body, disk_path, mtime, len(body))
+        if len(body) >= self.min_gzip_size and content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(body, self.gzip_level, mtime=0)
+            if len(compressed) < len(body):
+                asset.gzip_body = compressed
+        return asset
+
+    def load(self):
+        files = self._scan()
+        assets = {}
+        pages = []
+        for relative, (disk_path, mtime, size) in files.items():
+            if relative.endswith(".html"):
+                pages.append(relative)
+                continue
+            assets[relative] = self._build(disk_path, relative, mtime, size)
+
+        # Pages last, so their asset references can carry content versions
+        def rewrite(body):
+            def versioned(match):
+                asset = assets.get(match.group(2))
+                if asset is None:
+                    return match.group(0)
+                return f'{match.group(1)}="{match.group(2)}?v={asset.version}"'
+            return _ASSET_REF_RE.sub(versioned, body.decode("utf-8")).encode("utf-8")
+
+        for relative in pages:
+            disk_path, mtime, size = files[relative]
+            assets[relative] = self._build(disk_path, relative, mtime, size, rewrite)
+
+        self._assets = assets
+        self._signature = {path: entry[1:] for path, entry in files.items()}
+        return len(assets)
+
+    def get(self, url_path):
+        if self._signature is None:
+            self.load()
+        relative = url_path.lstrip("/") or "index.html"
+        return self._assets.get(relative)
+
+    def cache_control(self, asset, query):
+        if asset.content_type != "text/html" and f"v={asset.version}" in query.split("&"):
+            return IMMUTABLE_CACHE_CONTROL
+        return REVALIDATE_CACHE_CONTROL
+
+    def watch(self, interval):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    current = {path: entry[1:] for path, entry in self._scan().items()}
+                    if current != self._signature:
+                        count = self.load()
+                        log.info("static assets reloaded", assets=count)
+                except OSError as e:
+                    log.error("static asset reload failed", error=e)
+
+        self._watcher = threading.Thread(target=loop, name="static-watch", daemon=True)
+        self._watcher.start()
+
+    def stats(self):
+        assets = list(self._assets.values())
+        return {
+            "files": len(assets),
+            "in_memory_bytes": sum(a.size for a in assets if a.in_memory),
+            "gzip_bytes": sum(len(a.gzip_body) for a in assets if a.gzip_body),
+            "sendfile_files": sum(1 for a in assets if not a.in_memory),
+        }
+
+
+static_assets = StaticAssets(
+    max_cached_file=get_int("STATIC_MAX_CACHED_FILE", 1024 * 1024),
+    gzip_level=get_int("STATIC_GZIP_LEVEL", 9),
+)
+
+
+def start_static_watch():
+    """Start the reload thread if STATIC_WATCH is set (once per process)."""
+    if get_bool("STATIC_WATCH", False):
+        static_assets.watch(get_float("STATIC_WATCH_INTERVAL", 1.0))
+
+
+def send_file(sock, wfile, disk_path, size):
+    """Copy a file to the client with sendfile(), falling back to read/write.
+
+    Returns the bytes sent with sendfile(), which bypass `wfile`. With no
+    `sock` (the async front end owns the socket) the file goes through `wfile`.
+    """
+    with open(disk_path, "rb") as f:
+        if sock is not None and hasattr(os, "sendfile"):
+            offset = 0
+            try:
+                wfile.flush()
+                while offset < size:
+                    sent = os.sendfile(sock.fileno(), f.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return offset
+            except (OSError, AttributeError) as e:
+                # E.g. a TLS-wrapped socket. Only safe to fall back if
+                # nothing has gone out yet
+                if offset:
+                    raise
+                log.warning("sendfile unavailable, copying", error=e)
+        while True:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                break
+            wfile.write(chunk)
+    return 0
@@ -0,0 +1,153 @@
+# backend/utils/audit.py
+#
+# Write-behind audit log. log_action() drops an entry on an in-process
+# queue and returns; a background thread writes queued entries to
+# log_entry with one multi-row INSERT per batch. A batch is flushed when it
+# reaches AUDIT_LOG_BATCH_SIZE entries or AUDIT_LOG_FLUSH_INTERVAL seconds
+# after its first entry, whichever comes first.
+#
+# When the queue is full, callers block for up to AUDIT_LOG_PUT_TIMEOUT
+# seconds (backpressure) and then write their entry themselves, so audit
+# entries are delayed but never dropped. AUDIT_LOG_SYNC=true turns the
+# queue off and writes every entry before log_action() returns.
+import atexit
+import os
+import queue
+import threading
+import time
+
+from backend.config import get_bool, get_float, get_int
+from backend.db.connection import db_connection
+from backend.utils.logger import get_logger
+from backend.utils.versions import bump
+
+INSERT_LOG_SQL = """
+    INSERT INTO log_entry (user_id, action, resource_type, resource_id, context, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+log = get_logger("audit")
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    def __init__(self, batch_size=200, flush_interval=1.0, queue_size=10000,
+                 put_timeout=2.0, synchronous=False):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.synchronous = synchronous
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.overflow_writes = 0
+
+    def _ensure_started(self):
+        # Threads do not survive fork(): each prefork worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, entry):
+        """Queue one (user_id, action, resource_type, resource_id, context, created_at) row."""
+        if self.synchronous:
+            self._write([entry])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(entry, timeout=self.put_timeout)
+        except queue.Full:
+            self.overflow_writes += 1
+            self._write([entry])
+
+    def _write(self, batch):
+        try:
+            with db_connection() as conn:
+                if not conn:
+                    raise ConnectionError("Database connection failed")
+                cursor = conn.cursor()
+                cursor.executemany(INSERT_LOG_SQL, batch)
+                conn.commit()
+                cursor.close()
+            self.written += len(batch)
+            self.batches += 1
+            bump("log")
+        except Exception as e:
+            self.failed += len(batch)
+            log.error("audit entries not written", entries=len(batch), error=e)
+
+    def _run(self):
+        q = self._queue
+        while True:
+            entry = q.get()
+            if entry is _STOP:
+                q.task_done()
+                return
+
+            batch = [entry]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                q.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Block until everything queued so far has been written."""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "overflow_writes": self.overflow_writes,
+            "synchronous": self.synchronous,
+        }
+
+
+audit_writer = AuditLogWriter(
+    batch_size=get_int("AUDIT_LOG_BATCH_SIZE", 200),
+    flush_interval=get_float("AUDIT_LOG_FLUSH_INTERVAL", 1.0),
+    queue_size=get_int("AUDIT_LOG_QUEUE_SIZE", 10000),
+    put_timeout=get_float("AUDIT_LOG_PUT_TIMEOUT", 2.0),
+    synchronous=get_bool("AUDIT_LOG_SYNC", False),
+)
+
+atexit.register(audit_writer.close)
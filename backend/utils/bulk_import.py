@@ -0,0 +1,304 @@
+# backend/utils/bulk_import.py
+#
+# Bulk upserts for POST /import/systems and /import/peripherals. The request
+# body is read from the socket a block at a time and parsed as CSV (header
+# row first) or NDJSON, so memory stays at one chunk of rows however large
+# the upload is.
+#
+# Valid rows are written IMPORT_CHUNK_SIZE at a time with one executemany()
+# of INSERT ... ON DUPLICATE KEY UPDATE keyed on the table's unique column,
+# and committed every IMPORT_TRANSACTION_ROWS rows. Columns a row leaves out
+# keep their current value on update. If the database rejects a chunk (a
+# foreign key to a missing user, say), the chunk is rolled back to a
+# savepoint and retried row by row, so the bad rows are reported and the
+# rest of the chunk is still written.
+#
+# A body that stops parsing part-way (bad UTF-8, an over-long line) ends
+# the import: the open transaction is rolled back and the report says how
+# many rows earlier transactions committed.
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from mysql.connector.errors import DataError, IntegrityError
+
+from backend.config import get_int
+from backend.db.connection import db_connection
+
+CHUNK_SIZE = get_int("IMPORT_CHUNK_SIZE", 500)
+TRANSACTION_ROWS = get_int("IMPORT_TRANSACTION_ROWS", 5000)
+MAX_ERRORS = get_int("IMPORT_MAX_ERRORS", 1000)
+MAX_LINE_BYTES = 64 * 1024
+READ_SIZE = 64 * 1024
+
+FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+class InvalidImportRequest(ValueError):
+    pass
+
+
+class RowError(ValueError):
+    """One row that cannot be imported; the message goes in the error report."""
+
+
+def import_format(content_type, requested=None):
+    """"csv" or "ndjson" from ?format= or the Content-Type; None if neither says."""
+    if requested:
+        return requested if requested in ("csv", "ndjson") else None
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return FORMATS.get(media_type)
+
+
+def _sized_blocks(rfile, length):
+    remaining = length
+    while remaining > 0:
+        block = rfile.read(min(remaining, READ_SIZE))
+        if not block:
+            raise InvalidImportRequest("Request body ended early")
+        remaining -= len(block)
+        yield block
+
+
+def _chunked_blocks(rfile):
+    while True:
+        try:
+            size = int(rfile.readline(1024).split(b";")[0], 16)
+        except ValueError:
+            raise InvalidImportRequest("Malformed chunked request body")
+        if size == 0:
+            # Skip any trailer fields up to the blank line
+            while rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+                pass
+            return
+        yield from _sized_blocks(rfile, size)
+        rfile.readline(3)
+
+
+def iter_body_lines(rfile, content_length=0, chunked=False):
+    """The request body as text lines, read incrementally from `rfile`."""
+    blocks = _chunked_blocks(rfile) if chunked else _sized_blocks(rfile, content_length)
+    pending = b""
+    first = True
+    for block in blocks:
+        pending += block
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > MAX_LINE_BYTES:
+            raise InvalidImportRequest(f"Line longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            yield _decode(line, first)
+            first = False
+    if pending:
+        yield _decode(pending, first)
+
+
+def _decode(line, first):
+    try:
+        text = line.decode("utf-8-sig" if first else "utf-8")
+    except UnicodeDecodeError:
+        raise InvalidImportRequest("Request body is not valid UTF-8")
+    return text.rstrip("\r")
+
+
+def parse_records(lines, fmt):
+    """(row number, record dict or None, error or None) for each data row."""
+    if fmt == "csv":
+        for number, record in enumerate(csv.DictReader(lines), 1):
+            if None in record:
+                yield number, None, "More values than header columns"
+            else:
+                yield number, record, None
+        return
+
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        if isinstance(record, dict):
+            yield number, record, None
+        else:
+            yield number, None, "Expected a JSON object"
+
+
+def as_text(max_length):
+    def parse(value):
+        value = str(value).strip()
+        if len(value) > max_length:
+            raise RowError(f"longer than {max_length} characters")
+        return value
+    return parse
+
+
+def as_int(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise RowError("not an integer")
+
+
+def as_decimal(limit):
+    def parse(value):
+        try:
+            number = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise RowError("not a number")
+        if not number.is_finite() or abs(number) >= limit:
+            raise RowError(f"must be below {limit}")
+        return number
+    return parse
+
+
+def as_enum(*choices):
+    def parse(value):
+        if value not in choices:
+            raise RowError(f"must be one of {', '.join(choices)}")
+        return value
+    return parse
+
+
+class ImportTable:
+    """How rows for one table are validated and upserted.
+
+    `columns` maps each importable column to a parser that returns the
+    value to store or raises RowError. `key` is the table's unique column.
+    """
+
+    def __init__(self, table, key, columns, required):
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.required = required
+        self._sql = {}
+
+    def validate(self, record):
+        """{column: value} for the known columns the record has."""
+        values = {}
+        for name, parse in self.columns.items():
+            if name not in record:
+                continue
+            raw = record[name]
+            if raw is None or (isinstance(raw, str) and not raw.strip()):
+                values[name] = None
+                continue
+            try:
+                values[name] = parse(raw)
+            except RowError as e:
+                raise RowError(f"{name}: {e}")
+        missing = [name for name in self.required if values.get(name) is None]
+        if missing:
+            raise RowError(f"Missing field: {', '.join(missing)}")
+        return values
+
+    def upsert_sql(self, fields):
+        sql = self._sql.get(fields)
+        if sql is None:
+            updates = ", ".join(f"{field} = VALUES({field})" for field in fields if field != self.key)
+            sql = self._sql[fields] = f"""
+                INSERT INTO `{self.table}` ({", ".join(fields)})
+                VALUES ({", ".join(["%s"] * len(fields))})
+                ON DUPLICATE KEY UPDATE {updates or f"{self.key} = {self.key}"}
+            """
+        return sql
+
+
+def _write_chunk(cursor, table, chunk, fail):
+    """Upsert one chunk inside the open transaction; returns rows written."""
+    # Rows with the same columns share one statement
+    groups = {}
+    for number, values in chunk:
+        groups.setdefault(tuple(values), []).append((number, values))
+
+    cursor.execute("SAVEPOINT import_chunk")
+    try:
+        for fields, rows in groups.items():
+            cursor.executemany(table.upsert_sql(fields),
+                               [tuple(values[field] for field in fields) for _, values in rows])
+        return len(chunk)
+    except (IntegrityError, DataError):
+        cursor.execute("ROLLBACK TO SAVEPOINT import_chunk")
+
+    written = 0
+    for fields, rows in groups.items():
+        sql = table.upsert_sql(fields)
+        for number, values in rows:
+            cursor.execute("SAVEPOINT import_row")
+            try:
+                cursor.execute(sql, tuple(values[field] for field in fields))
+                written += 1
+            except (IntegrityError, DataError) as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                fail(number, e.msg)
+    return written
+
+
+def run_import(table, records, chunk_size=None, transaction_rows=None, max_errors=None):
+    """Validate and upsert `records` from parse_records(); returns the report."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    transaction_rows = transaction_rows or TRANSACTION_ROWS
+    max_errors = MAX_ERRORS if max_errors is None else max_errors
+    report = {"rows": 0, "written": 0, "failed": 0, "transactions": 0, "errors": []}
+
+    def fail(number, message):
+        report["failed"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"row": number, "error": message})
+
+    with db_connection() as conn:
+        if not conn:
+            raise ConnectionError("Database connection failed")
+        cursor = conn.cursor()
+        chunk = []
+        pending_rows = 0
+        pending_written = 0
+
+        def commit():
+            nonlocal pending_rows, pending_written
+            conn.commit()
+            report["transactions"] += 1
+            report["written"] += pending_written
+            pending_rows = pending_written = 0
+
+        try:
+            for number, record, error in records:
+                report["rows"] += 1
+                if error:
+                    fail(number, error)
+                    continue
+                try:
+                    chunk.append((number, table.validate(record)))
+                except RowError as e:
+                    fail(number, str(e))
+                    continue
+
+                if len(chunk) >= chunk_size:
+                    pending_written += _write_chunk(cursor, table, chunk, fail)
+                    pending_rows += len(chunk)
+                    chunk.clear()
+                    if pending_rows >= transaction_rows:
+                        commit()
+
+            if chunk:
+                pending_written += _write_chunk(cursor, table, chunk, fail)
+                pending_rows += len(chunk)
+            if pending_rows:
+                commit()
+        except InvalidImportRequest as e:
+            conn.rollback()
+            report["error"] = str(e)
+        finally:
+            cursor.close()
+
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
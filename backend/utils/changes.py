@@ -0,0 +1,24 @@
+# backend/utils/changes.py
+#
+# Write routes call record_change() after they commit. Caches, version
+# counters and other derived state register a listener here instead of
+# every route having to know about each of them.
+from backend.utils.logger import get_logger
+
+log = get_logger("changes")
+
+_listeners = []
+
+
+def on_change(listener):
+    """Register listener(resource_type, action, resource_id); usable as a decorator."""
+    _listeners.append(listener)
+    return listener
+
+
+def record_change(resource_type, action, resource_id=None):
+    for listener in list(_listeners):
+        try:
+            listener(resource_type, action, resource_id)
+        except Exception:
+            log.exception("change listener failed", resource_type=resource_type, action=action)
@@ -0,0 +1,64 @@
+# backend/utils/compression.py
+#
+# Content-Encoding negotiation for API responses. JSON bodies of at least
+# COMPRESSION_MIN_SIZE bytes are gzip-compressed at COMPRESSION_LEVEL when
+# the client's Accept-Encoding allows it; smaller ones are not worth the
+# CPU. Streamed bodies are compressed chunk by chunk with a sync flush after
+# each, so the client can still parse rows as they arrive.
+import gzip
+import zlib
+
+from backend.config import get_bool, get_int
+
+COMPRESSION_ENABLED = get_bool("COMPRESSION_ENABLED", True)
+COMPRESSION_LEVEL = get_int("COMPRESSION_LEVEL", 6)
+COMPRESSION_MIN_SIZE = get_int("COMPRESSION_MIN_SIZE", 1024)
+
+
+def accepts_encoding(accept_encoding, coding):
+    """True if an Accept-Encoding header allows `coding` (q=0 refuses it)."""
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() not in (coding, "*"):
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def should_gzip(accept_encoding, size):
+    return (
+        COMPRESSION_ENABLED
+        and size >= COMPRESSION_MIN_SIZE
+        and accepts_encoding(accept_encoding, "gzip")
+    )
+
+
+def gzip_body(body):
+    return gzip.compress(body, COMPRESSION_LEVEL, mtime=0)
+
+
+def gzip_etag(etag):
+    # The gzip representation is a different byte sequence, so a strong
+    # ETag has to differ from the identity one
+    return etag[:-1] + '-gzip"'
+
+
+class GzipChunker:
+    """Compresses a sequence of chunks into a single gzip member."""
+
+    def __init__(self, level=None):
+        self._compressor = zlib.compressobj(
+            COMPRESSION_LEVEL if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
@@ -0,0 +1,121 @@
+# backend/utils/encoder.py
+#
+# One JSON encoder for every route. Result rows are encoded straight from
+# the cursor's tuples: the column list in cursor.description picks a
+# converter per column once, and each row is then joined into a JSON object
+# string in a single pass, with no intermediate dict or converted copy.
+import enum
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii as _encode_str
+
+from mysql.connector import FieldType
+
+
+def json_default(obj):
+    """`default=` hook for json.dumps: the same conversions RowEncoder applies."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8", "replace")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    return json.dumps(obj, default=json_default)
+
+
+def _encode_any(value):
+    return json.dumps(value, default=json_default)
+
+
+# Column converters. Each one takes the fast path for the type the MySQL
+# driver normally returns for that column and falls back to _encode_any
+# for anything else (e.g. bytearray from a binary collation).
+
+def _encode_int(value):
+    if value.__class__ is int:
+        return int.__repr__(value)
+    return _encode_any(value)
+
+
+def _encode_float(value):
+    if value.__class__ is float:
+        return float.__repr__(value)
+    return _encode_any(value)
+
+
+def _encode_decimal(value):
+    if value.__class__ is Decimal:
+        return float.__repr__(float(value))
+    return _encode_any(value)
+
+
+def _encode_datetime(value):
+    if value.__class__ is datetime or value.__class__ is date:
+        return '"' + value.isoformat() + '"'
+    return _encode_any(value)
+
+
+def _encode_text(value):
+    if value.__class__ is str:
+        return _encode_str(value)
+    return _encode_any(value)
+
+
+_CONVERTERS = {}
+for _name in ("TINY", "SHORT", "LONG", "LONGLONG", "INT24", "YEAR", "BIT"):
+    _CONVERTERS[getattr(FieldType, _name)] = _encode_int
+for _name in ("FLOAT", "DOUBLE"):
+    _CONVERTERS[getattr(FieldType, _name)] = _encode_float
+for _name in ("DECIMAL", "NEWDECIMAL"):
+    _CONVERTERS[getattr(FieldType, _name)] = _encode_decimal
+for _name in ("DATETIME", "TIMESTAMP", "DATE", "NEWDATE"):
+    _CONVERTERS[getattr(FieldType, _name)] = _encode_datetime
+for _name in ("VARCHAR", "VAR_STRING", "STRING", "ENUM"):
+    _CONVERTERS[getattr(FieldType, _name)] = _encode_text
+for _name in ("TINY_BLOB", "MEDIUM_BLOB", "LONG_BLOB", "BLOB"):
+    # TEXT columns are reported as BLOB types
+    _CONVERTERS[getattr(FieldType, _name)] = _encode_text
+
+
+class RowEncoder:
+    """Encodes tuple rows from one cursor as JSON objects.
+
+    Build it from cursor.description after execute(); encode(row) returns
+    the JSON text for one row.
+    """
+
+    def __init__(self, description):
+        self.names = [column[0] for column in description]
+        self._converters = [
+            _CONVERTERS.get(column[1], _encode_any) for column in description
+        ]
+        self._prefixes = [
+            ("{" if i == 0 else ", ") + _encode_str(name) + ": "
+            for i, name in enumerate(self.names)
+        ]
+        self._columns = list(zip(self._prefixes, self._converters))
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def encode(self, row):
+        if not self._columns:
+            return "{}"
+        return "".join([
+            prefix + ("null" if value is None else convert(value))
+            for (prefix, convert), value in zip(self._columns, row)
+        ]) + "}"
+
+    def as_dict(self, row):
+        return dict(zip(self.names, row))
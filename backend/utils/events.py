@@ -0,0 +1,282 @@
+# backend/utils/events.py
+#
+# Change feed behind GET /events (Server-Sent Events). Write routes already
+# call record_change() after they commit; the hub listens there, so adding,
+# updating or deleting a system, peripheral or complaint becomes
+#     event: change
+#     data: {"type": "complaint", "action": "updated", "id": 42}
+# on every open feed, and a change to any table /stats counts becomes a
+# fresh `event: stats` with the same body as GET /stats, at most once every
+# EVENTS_STATS_INTERVAL seconds however many writes land in between.
+#
+# Nothing here ever waits on a client. The listener only appends to the
+# hub's inbox; one "event-pump" thread per process formats each batch once
+# and hands it to every subscriber's sink without blocking. A subscriber
+# whose unsent output passes EVENTS_BUFFER_BYTES is disconnected. Its
+# EventSource reconnects with Last-Event-ID and gets the events it missed
+# from the last EVENTS_REPLAY, or `event: resync` (refetch everything)
+# when they are gone. Feeds do not hold a request thread: the connection
+# is handed over to the pump (see MyHandler._send_event_stream).
+#
+# Prefork workers each run their own hub. Writes handled by another worker
+# are noticed through the shared version counters (backend/utils/versions.py)
+# every EVENTS_POLL_INTERVAL seconds, as counters that moved further than
+# this worker's own writes account for, and sent as {"type": ..., "action":
+# "changed", "id": null}: which rows changed is only known to that worker.
+import os
+import threading
+import time
+from collections import deque
+
+from backend.config import get_float, get_int
+from backend.utils import metrics
+from backend.utils.changes import on_change
+from backend.utils.encoder import dumps
+from backend.utils.logger import get_logger
+from backend.utils import versions
+
+log = get_logger("events")
+
+# Resource types whose changes are sent to the feed
+FEED_TYPES = ("system", "peripheral", "complaint")
+
+# Sent first on every feed: how long EventSource waits before reconnecting
+RETRY_MS = 3000
+
+subscribers_open = metrics.registry.gauge(
+    "events_subscribers", "Open GET /events feeds.")
+subscribers_dropped = metrics.registry.counter(
+    "events_subscribers_dropped_total", "Feeds disconnected for falling behind or going away.", ("reason",))
+
+
+def format_event(event_id, name, data):
+    return f"id: {event_id}\nevent: {name}\ndata: {dumps(data)}\n\n".encode()
+
+
+class Subscriber:
+    """One open feed: a sink to write to and the resource types it asked for."""
+
+    def __init__(self, sink, types=None):
+        self.sink = sink
+        self.types = frozenset(types) if types else None
+
+    def wants(self, resource_type):
+        return self.types is None or resource_type in self.types
+
+
+class EventHub:
+    def __init__(self, max_subscribers=1000, buffer_bytes=65536, replay=256, poll_interval=1.0,
+                 stats_interval=2.0, heartbeat=15.0):
+        self.max_subscribers = max_subscribers
+        self.buffer_bytes = buffer_bytes
+        self.poll_interval = poll_interval
+        self.stats_interval = stats_interval
+        self.heartbeat = heartbeat
+
+        # Held while events are numbered and sent, so a feed that subscribes
+        # in between gets each event once: from the replay or the broadcast
+        self._lock = threading.RLock()
+        self._subscribers = []
+        # Local changes, appended by request threads and drained by the pump
+        self._inbox = deque()
+        self._wake = threading.Event()
+        self._replay = deque(maxlen=replay)
+        self._epoch = format(time.time_ns() // 1000, "x")
+        self._seq = 0
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+        self.published = 0
+        self.dropped = 0
+
+    # -- request threads ---------------------------------------------------
+
+    def record(self, resource_type, action, resource_id):
+        """Queue a committed change; the pump sends it. Never blocks."""
+        if self._thread is None or self._pid != os.getpid():
+            # No feed open in this process
+            return
+        self._inbox.append((resource_type, action, resource_id))
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def full(self):
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self, sink, last_event_id=None, types=None):
+        """Start sending to `sink`, beginning with anything missed since `last_event_id`."""
+        self._ensure_started()
+        subscriber = Subscriber(sink, types)
+        with self._lock:
+            backlog = [f"retry: {RETRY_MS}\n\n".encode()]
+            if last_event_id:
+                missed = self._missed_since(last_event_id)
+                if missed is None:
+                    backlog.append(format_event(f"{self._epoch}-{self._seq}", "resync", {}))
+                else:
+                    backlog.extend(message for _, kind, message in missed if subscriber.wants(kind))
+            if not sink.send(b"".join(backlog)):
+                sink.close()
+                return
+            self._subscribers.append(subscriber)
+        subscribers_open.inc()
+
+    def _missed_since(self, last_event_id):
+        """Replayable events after `last_event_id`; None if some are no longer held."""
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq >= self._seq:
+            return []
+        if not self._replay or self._replay[0][0] > seq + 1:
+            return None
+        return [entry for entry in self._replay if entry[0] > seq]
+
+    # -- pump thread -------------------------------------------------------
+
+    def _ensure_started(self):
+        # Threads do not survive fork(): each prefork worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._subscribers = []
+                self._inbox = deque()
+                self._wake = threading.Event()
+                self._stopping = False
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="event-pump", daemon=True)
+                self._thread.start()
+
+    def _publish(self, name, data, resource_type=None):
+        self._seq += 1
+        message = format_event(f"{self._epoch}-{self._seq}", name, data)
+        self._replay.append((self._seq, resource_type, message))
+        self.published += 1
+        return resource_type, message
+
+    def _run(self):
+        from backend.routes.stats import STATS_TABLES, get_stats
+
+        seen = versions.snapshot()
+        stats_due = False
+        last_stats = 0.0
+        last_sent = time.monotonic()
+
+        while not self._stopping:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                events = []
+                while self._inbox:
+                    resource_type, action, resource_id = self._inbox.popleft()
+                    if resource_type in FEED_TYPES:
+                        events.append((
+                            "change", {"type": resource_type, "action": action, "id": resource_id},
+                            resource_type,
+                        ))
+
+                current = versions.snapshot()
+                changed = set()
+                for i, table in enumerate(versions.VERSIONED_TABLES):
+                    total = current[0][i] - seen[0][i]
+                    if not total:
+                        continue
+                    changed.add(table)
+                    if table in FEED_TYPES and total > current[1][i] - seen[1][i]:
+                        # Written by another worker
+                        events.append(("change", {"type": table, "action": "changed", "id": None}, table))
+                seen = current
+
+                if changed & set(STATS_TABLES):
+                    stats_due = True
+                now = time.monotonic()
+                if stats_due and self._subscribers and now - last_stats >= self.stats_interval:
+                    status, stats = get_stats()
+                    if status == 200:
+                        events.append(("stats", stats, None))
+                        stats_due = False
+                    last_stats = now
+
+                with self._lock:
+                    messages = [self._publish(*event) for event in events]
+                    if messages or now - last_sent >= self.heartbeat:
+                        # A comment keeps proxies from timing the feed out and finds dead clients
+                        self._broadcast(messages or [(None, b": heartbeat\n\n")])
+                        last_sent = now
+                    else:
+                        self._flush()
+            except Exception:
+                log.exception("event pump failed")
+
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.sink.close()
+            self._subscribers = []
+
+    def _broadcast(self, messages):
+        everything = b"".join(message for _, message in messages)
+        for subscriber in list(self._subscribers):
+            if subscriber.types is None:
+                data = everything
+            else:
+                data = b"".join(message for kind, message in messages
+                                if kind is None or subscriber.wants(kind))
+            self._check(subscriber, subscriber.sink.send(data) if data else subscriber.sink.flush())
+
+    def _flush(self):
+        # Finish writes a slow client left half done
+        for subscriber in list(self._subscribers):
+            self._check(subscriber, subscriber.sink.flush())
+
+    def _check(self, subscriber, alive):
+        if not alive:
+            self._drop(subscriber, "closed")
+        elif subscriber.sink.pending > self.buffer_bytes:
+            # Never waited for: it reconnects and catches up from the replay ring
+            self._drop(subscriber, "slow")
+
+    def _drop(self, subscriber, reason):
+        with self._lock:
+            if subscriber not in self._subscribers:
+                return
+            self._subscribers.remove(subscriber)
+        subscriber.sink.close()
+        self.dropped += 1
+        subscribers_open.dec()
+        subscribers_dropped.inc(reason)
+
+    def close(self):
+        """Stop the pump and close every feed (clients reconnect elsewhere)."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        subscribers_open.set(0)
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "backlog": len(self._inbox),
+        }
+
+
+event_hub = EventHub(
+    max_subscribers=get_int("EVENTS_MAX_SUBSCRIBERS", 1000),
+    buffer_bytes=get_int("EVENTS_BUFFER_BYTES", 65536),
+    replay=get_int("EVENTS_REPLAY", 256),
+    poll_interval=get_float("EVENTS_POLL_INTERVAL", 1.0),
+    stats_interval=get_float("EVENTS_STATS_INTERVAL", 2.0),
+    heartbeat=get_float("EVENTS_HEARTBEAT", 15.0),
+)
+
+
+@on_change
+def _queue_event(resource_type, action, resource_id):
+    event_hub.record(resource_type, action, resource_id)
@@ -0,0 +1,386 @@
+# backend/utils/logger.py
+#
+# Structured application and access logging on top of the standard logging
+# module. Call sites log an event name plus keyword fields,
+#     log = get_logger("system")
+#     log.error("database connection failed", pool=pool, error=e)
+# and never format anything themselves: each method checks the level before
+# building anything, and formatting (logfmt, or JSON with
+# LOGGING_FORMAT=json) happens on a background thread. Entries go onto a
+# bounded in-process queue and the request thread moves on; when the queue
+# is full the entry is dropped and counted rather than making a request wait
+# on disk or a slow terminal. The writer thread drains the queue in batches,
+# one write and one flush per batch.
+#
+# Loggers are ordinary logging.Logger objects named "it_mgmt.<name>", so
+# levels can be set per logger; LOGGING_LEVEL sets the default.
+#
+# Output is stderr, or with LOGGING_DIR set, rotating files there: app.log
+# for everything but requests and access.log for the one line per request
+# (LOGGING_MAX_BYTES, LOGGING_BACKUP_COUNT). Prefork workers and export
+# processes each write their own files (app.<pid>.log) so no two processes
+# rotate one file.
+#
+# Values of fields named in LOGGING_REDACT_FIELDS (passwords, tokens, ...)
+# are replaced with "[redacted]", in nested dicts too, before anything is
+# written.
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from backend.config import get_setting, get_int, get_float
+
+LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+REDACTED = "[redacted]"
+DEFAULT_REDACT_FIELDS = "password,new_password,token,authorization,secret,cookie"
+
+ROOT_LOGGER = "it_mgmt"
+ACCESS_LOGGER = ROOT_LOGGER + ".access"
+
+
+def redact(fields, names):
+    """A copy of `fields` with the values of sensitive keys replaced."""
+    clean = {}
+    for key, value in fields.items():
+        if key.lower() in names:
+            clean[key] = REDACTED
+        elif isinstance(value, dict):
+            clean[key] = redact(value, names)
+        else:
+            clean[key] = value
+    return clean
+
+
+def _text(value):
+    if isinstance(value, BaseException):
+        return f"{type(value).__name__}: {value}"
+    return value if isinstance(value, str) else str(value)
+
+
+class LogfmtFormatter(logging.Formatter):
+    """`time level logger event key=value ...`, values quoted when needed."""
+
+    def __init__(self, redact_fields):
+        super().__init__()
+        self.redact_fields = redact_fields
+
+    def _fields(self, record):
+        return redact(getattr(record, "fields", None) or {}, self.redact_fields)
+
+    @staticmethod
+    def _timestamp(record):
+        return datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")
+
+    def format(self, record):
+        parts = [self._timestamp(record), record.levelname, record.name, record.getMessage()]
+        for key, value in self._fields(record).items():
+            if value is None:
+                continue
+            text = _text(value)
+            if not text or any(c in text for c in ' ="\n'):
+                text = json.dumps(text)
+            parts.append(f"{key}={text}")
+        line = " ".join(parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(LogfmtFormatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self._timestamp(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for key, value in self._fields(record).items():
+            plain = isinstance(value, (int, float, bool, type(None), dict, list))
+            entry[key] = value if plain else _text(value)
+        if record.exc_info:
+            entry["traceback"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class StreamSink:
+    """Destination for formatted lines.
+
+    `access` selects the access log only (True), everything else (False) or
+    both (None).
+    """
+
+    def __init__(self, stream, access=None):
+        self.stream = stream
+        self.access = access
+
+    def accepts(self, record):
+        return self.access is None or (record.name == ACCESS_LOGGER) == self.access
+
+    def write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class RotatingFileSink(StreamSink):
+    """A log file moved to .1, .2, ... (oldest dropped) once it passes max_bytes."""
+
+    def __init__(self, path, max_bytes, backup_count, access=None):
+        super().__init__(open(path, "a", encoding="utf-8"), access)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.size = self.stream.tell()
+
+    def write(self, text):
+        if self.max_bytes and self.size and self.size + len(text) > self.max_bytes:
+            self._rotate()
+        super().write(text)
+        self.size += len(text)
+
+    def _rotate(self):
+        self.stream.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stream = open(self.path, "a", encoding="utf-8")
+        self.size = 0
+
+    def close(self):
+        self.stream.close()
+
+
+class BackgroundHandler(logging.Handler):
+    """Hands records to a writer thread that formats and writes them in batches.
+
+    The queue is a deque: appending is a single atomic operation, so the
+    logging thread takes no lock. The writer is woken by an Event that is
+    only set when it is not set already, and otherwise checks back every
+    `interval` seconds.
+    """
+
+    def __init__(self, formatter, make_sinks, queue_size=10000, interval=0.1):
+        super().__init__()
+        self.setFormatter(formatter)
+        self.queue_size = queue_size
+        self.interval = interval
+        self._make_sinks = make_sinks
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._sinks = ()
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._parent_pid = os.getpid()
+
+        self.queued = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def _ensure_started(self):
+        # Threads do not survive fork(): each prefork worker starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = deque()
+                self._wake = threading.Event()
+                self._stopping = False
+                self._pid = os.getpid()
+                self._sinks = self._make_sinks(forked=self._pid != self._parent_pid)
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, entry):
+        """Queue a LogRecord, or a (created, level, logger, event, fields, exc_info) tuple."""
+        self._ensure_started()
+        if len(self._queue) >= self.queue_size:
+            self.dropped += 1
+            return
+        self._queue.append(entry)
+        self.queued += 1
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def handle(self, record):
+        # For plain logging calls under "it_mgmt"; no handler lock needed
+        self.submit(record)
+        return record
+
+    def emit(self, record):
+        self.submit(record)
+
+    @staticmethod
+    def _record(entry):
+        if isinstance(entry, logging.LogRecord):
+            return entry
+        created, level, name, event, fields, exc_info = entry
+        record = logging.LogRecord(name, level, "", 0, event, (), exc_info)
+        record.created = created
+        record.fields = fields
+        return record
+
+    def _run(self):
+        q = self._queue
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            batch = []
+            while q:
+                batch.append(self._record(q.popleft()))
+            if batch:
+                self._write(batch)
+            if self._stopping and not q:
+                break
+        for sink in self._sinks:
+            sink.close()
+
+    def _write(self, batch):
+        for sink in self._sinks:
+            lines = [self.format(record) for record in batch if sink.accepts(record)]
+            if not lines:
+                continue
+            try:
+                sink.write("\n".join(lines) + "\n")
+            except (OSError, ValueError):
+                self.write_errors += len(lines)
+
+    def close(self):
+        """Write out everything queued, then stop the writer thread."""
+        if self._thread is not None and self._pid == os.getpid():
+            self._stopping = True
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        super().close()
+
+    def stats(self):
+        return {
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "backlog": len(self._queue),
+        }
+
+
+class StructuredLogger:
+    """A logging.Logger taking an event name and keyword fields."""
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def enabled(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level, event, fields, exc_info=None):
+        if self._logger.isEnabledFor(level):
+            # Straight to the queue as a tuple: the LogRecord is built on the
+            # writer thread, and no stack walk for the caller's line
+            background_handler.submit(
+                (time.time(), level, self._logger.name, event, fields, exc_info)
+            )
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event, **fields):
+        """error() plus the traceback of the exception being handled."""
+        self._log(logging.ERROR, event, fields, exc_info=sys.exc_info())
+
+
+LOGGING_LEVEL = LEVELS.get(get_setting("LOGGING_LEVEL", "INFO").upper(), logging.INFO)
+LOGGING_FORMAT = get_setting("LOGGING_FORMAT", "logfmt")
+LOGGING_DIR = get_setting("LOGGING_DIR", "")
+LOGGING_MAX_BYTES = get_int("LOGGING_MAX_BYTES", 10 * 1024 * 1024)
+LOGGING_BACKUP_COUNT = get_int("LOGGING_BACKUP_COUNT", 5)
+REDACT_FIELDS = frozenset(
+    name.strip().lower()
+    for name in get_setting("LOGGING_REDACT_FIELDS", DEFAULT_REDACT_FIELDS).split(",")
+    if name.strip()
+)
+# Share of ordinary requests written to the access log. Errors (status
+# >= 500) and requests slower than ACCESS_LOG_SLOW_MS are always written
+ACCESS_LOG_SAMPLE = get_float("ACCESS_LOG_SAMPLE", 1.0)
+ACCESS_LOG_SLOW_MS = get_float("ACCESS_LOG_SLOW_MS", 1000.0)
+
+
+def _make_sinks(forked):
+    if not LOGGING_DIR:
+        return (StreamSink(sys.stderr),)
+    os.makedirs(LOGGING_DIR, exist_ok=True)
+    # Prefork workers and export renderer processes get files of their own
+    child = forked or multiprocessing.parent_process() is not None
+    suffix = f".{os.getpid()}.log" if child else ".log"
+    return tuple(
+        RotatingFileSink(os.path.join(LOGGING_DIR, name + suffix),
+                         LOGGING_MAX_BYTES, LOGGING_BACKUP_COUNT, access=access)
+        for name, access in (("app", False), ("access", True))
+    )
+
+
+background_handler = BackgroundHandler(
+    (JsonFormatter if LOGGING_FORMAT == "json" else LogfmtFormatter)(REDACT_FIELDS),
+    _make_sinks, queue_size=get_int("LOGGING_QUEUE_SIZE", 10000),
+)
+
+_root = logging.getLogger(ROOT_LOGGER)
+_root.setLevel(LOGGING_LEVEL)
+_root.addHandler(background_handler)
+_root.propagate = False
+
+atexit.register(background_handler.close)
+
+
+def get_logger(name):
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"))
+
+
+access_log = get_logger("access")
+
+
+def sample_access(status, seconds):
+    """Whether this request's access line is written (see ACCESS_LOG_SAMPLE)."""
+    if ACCESS_LOG_SAMPLE >= 1.0 or status >= 500 or seconds * 1000 >= ACCESS_LOG_SLOW_MS:
+        return True
+    return random.random() < ACCESS_LOG_SAMPLE
+
+
+def close():
+    background_handler.close()
+
+
+def stats():
+    return background_handler.stats()
@@ -0,0 +1,300 @@
+# backend/utils/metrics.py
+#
+# Request, database and encoding metrics, served by GET /metrics in the
+# Prometheus text format (version 0.0.4).
+#
+# Recording is cheap enough to leave on: an observation is a bisect over a
+# dozen bucket bounds and a couple of increments under a per-metric lock,
+# about a microsecond (benchmarks/metrics_bench.py). Label values are kept
+# low-cardinality on purpose: routes are labelled by template
+# ("/system/{id}"), never by the requested path.
+#
+# Under prefork every worker records into its own memory and writes a
+# snapshot to METRICS_DIR every METRICS_FLUSH_INTERVAL seconds; whichever
+# worker answers the scrape adds up its live numbers and the others'
+# snapshots. Snapshots of workers that have exited are still counted, so
+# counters never go backwards when a worker is replaced; gauges only count
+# workers that are alive.
+import json
+import os
+import threading
+from bisect import bisect_left
+
+from backend.config import get_setting, get_float
+from backend.utils.logger import get_logger
+
+log = get_logger("metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from a cached lookup to a slow PDF export
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DEFAULT_METRICS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache", "metrics"
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    @staticmethod
+    def merge(total, values):
+        for labels, value in values.items():
+            total[labels] = total.get(labels, 0) + value
+
+    def samples(self, values):
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self._values = {}
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: list(entry) for labels, entry in self._values.items()}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    @staticmethod
+    def merge(total, values):
+        for labels, entry in values.items():
+            current = total.get(labels)
+            if current is None:
+                total[labels] = list(entry)
+            else:
+                for i, value in enumerate(entry):
+                    current[i] += value
+
+    def samples(self, values):
+        bounds = [_format_value(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, entry in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, entry):
+                cumulative += count
+                label_text = _format_labels(self.labelnames, labels, 'le="' + bound + '"')
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(entry[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._dir = None
+        self._interval = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    # -- prefork ---------------------------------------------------------
+
+    def enable_multiprocess(self, directory, interval):
+        """Share metrics through snapshot files; call in the parent before forking."""
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(directory, name))
+        self._dir = directory
+        self._interval = interval
+
+    def start_worker(self):
+        """In a freshly forked worker: drop the parent's numbers, start writing snapshots."""
+        if self._dir is None:
+            return
+        for metric in self._metrics:
+            metric.reset()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self._interval):
+            try:
+                self.flush()
+            except OSError as e:
+                log.error("metrics snapshot not written", error=e)
+
+    def flush(self):
+        if self._dir is None:
+            return
+        data = {
+            metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+            for metric in self._metrics
+        }
+        path = os.path.join(self._dir, f"{os.getpid()}.json")
+        with open(path + ".part", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".part", path)
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _other_workers(self):
+        """(alive, {name: {labels: value}}) for every other worker's last snapshot."""
+        own = f"{os.getpid()}.json"
+        for name in os.listdir(self._dir):
+            if not name.endswith(".json") or name == own:
+                continue
+            try:
+                with open(os.path.join(self._dir, name)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # Removed or being replaced; its numbers show at the next scrape
+                continue
+            values = {
+                metric: {tuple(labels): value for labels, value in samples}
+                for metric, samples in data.items()
+            }
+            yield _process_alive(int(name[:-5])), values
+
+    # -- exposition ------------------------------------------------------
+
+    def collect(self):
+        """{metric: {labels: value}} for this process, plus other workers under prefork."""
+        totals = {metric.name: metric.snapshot() for metric in self._metrics}
+        if self._dir is not None:
+            by_name = {metric.name: metric for metric in self._metrics}
+            for alive, values in self._other_workers():
+                for name, samples in values.items():
+                    metric = by_name.get(name)
+                    if metric is None or (metric.kind == "gauge" and not alive):
+                        continue
+                    metric.merge(totals[name], samples)
+        return totals
+
+    def render(self):
+        totals = self.collect()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(totals[metric.name]))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+METRICS_DIR = get_setting("METRICS_DIR", DEFAULT_METRICS_DIR)
+METRICS_FLUSH_INTERVAL = get_float("METRICS_FLUSH_INTERVAL", 1.0)
+# Optional bearer token a scraper must send; unset leaves /metrics open
+METRICS_TOKEN = get_setting("METRICS_TOKEN", "")
+
+requests_total = registry.counter(
+    "http_requests_total", "Requests answered, by route template, method and status code "
+    "(status 0: the client went away before a response started).",
+    ("route", "method", "status"))
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time from routing a request to its last byte being written.",
+    ("route", "method"))
+response_bytes = registry.counter(
+    "http_response_bytes_total", "Bytes written to clients, headers included.", ("route", "method"))
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests being handled right now.")
+db_connection_wait = registry.histogram(
+    "db_connection_wait_seconds", "Time spent in get_db_connection() borrowing a pooled connection.",
+    ("pool",))
+db_connection_errors = registry.counter(
+    "db_connection_errors_total", "get_db_connection() calls that returned no connection.", ("pool",))
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Time in cursor calls: execute (query run, first results) "
+    "and fetch (rows read).", ("operation",))
+json_encode_duration = registry.histogram(
+    "json_encode_duration_seconds", "Time spent JSON-encoding one response body "
+    "(response: encoded at once; stream: summed over the rows of a streamed list).", ("kind",))
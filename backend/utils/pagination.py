@@ -0,0 +1,76 @@
+# backend/utils/pagination.py
+#
+# Keyset pagination over (created_at, id), newest first. A page is fetched
+# with
+#     WHERE created_at < :ts OR (created_at = :ts AND id < :id)
+#     ORDER BY created_at DESC, id DESC LIMIT :limit + 1
+# which a (created_at, id) index answers by seeking straight to the cursor,
+# so page 1000 costs the same as page 1 (unlike OFFSET, which reads and
+# throws away every earlier row). created_at must be NOT NULL on every paged
+# table: a NULL never compares less than the cursor, so such rows would be
+# skipped (db/migrations/004_keyset_pagination.sql).
+import base64
+from datetime import datetime
+
+from backend.config import get_int
+
+DEFAULT_PAGE_SIZE = get_int("PAGE_SIZE_DEFAULT", 50)
+MAX_PAGE_SIZE = get_int("PAGE_SIZE_MAX", 500)
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidPageRequest("Invalid cursor")
+
+
+def parse_page_params(filters):
+    """Read ?limit= and ?cursor= from parse_qs() output."""
+    limit = filters.get("limit", [None])[0]
+    if limit is None or limit == "":
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise InvalidPageRequest("limit must be an integer")
+        if limit < 1:
+            raise InvalidPageRequest("limit must be at least 1")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    cursor = filters.get("cursor", [None])[0]
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def keyset_clause(created_col, id_col, cursor):
+    """SQL condition and values selecting rows after `cursor`."""
+    created_at, row_id = cursor
+    return (
+        f"({created_col} < %s OR ({created_col} = %s AND {id_col} < %s))",
+        [created_at, created_at, row_id],
+    )
+
+
+def keyset_order(created_col, id_col):
+    return f"ORDER BY {created_col} DESC, {id_col} DESC"
+
+
+def split_page(rows, limit, id_key):
+    """Trim the look-ahead row fetched with LIMIT limit + 1; return (rows, next_cursor)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last["created_at"], last[id_key])
@@ -0,0 +1,170 @@
+# backend/utils/pdf_stream.py
+#
+# Streams text reports as PDF. reportlab's canvas keeps every page in memory
+# until save() and then serialises the whole document, so an export held
+# the full row set, the rendered document and its BytesIO copy at once.
+#
+# PdfWriter writes the file as it goes: each finished page's content stream
+# and page object are emitted straight away, and only the byte offsets
+# needed for the cross-reference table are kept. The page tree object
+# number is reserved up front and written last, which PDF allows.
+#
+# PdfReportStream drives it from an unbuffered cursor, one FETCH_BATCH_SIZE
+# batch of rows at a time, yielding each page's bytes as soon as it is
+# complete. Memory is one batch plus one page, whatever the report's size.
+import zlib
+
+from reportlab.lib.pagesizes import A4
+
+from backend.db.connection import get_db_connection
+from backend.utils.streaming import FETCH_BATCH_SIZE, CursorStream
+
+# The standard Type 1 fonts every reader has; nothing is embedded
+FONTS = {"Helvetica": b"/F1", "Helvetica-Bold": b"/F2"}
+
+_CATALOG, _PAGES, _FIRST_FONT = 1, 2, 3
+
+
+def _escape(text):
+    """Text as a PDF string literal body (WinAnsi, unmappable characters as ?)."""
+    data = str(text).replace("\r", "").replace("\n", " ").encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class PdfWriter:
+    """Minimal PDF 1.4 writer for pages of single-line text.
+
+    Call draw_string()/show_page() like the reportlab canvas and take() to
+    collect the bytes produced so far; finish() ends the document.
+    """
+
+    def __init__(self, pagesize=A4):
+        self.width, self.height = pagesize
+        self._pending = bytearray()
+        self._offset = 0
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = _FIRST_FONT + len(FONTS)
+        self._content = bytearray()
+        self._font = (FONTS["Helvetica"], 12)
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES)
+        for number, name in enumerate(FONTS, _FIRST_FONT):
+            self._object(number, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s "
+                                 b"/Encoding /WinAnsiEncoding >>" % name.encode())
+
+    def _write(self, data):
+        self._pending += data
+        self._offset += len(data)
+
+    def _object(self, number, body):
+        self._offsets[number] = self._offset
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+
+    def set_font(self, name, size):
+        self._font = (FONTS[name], size)
+
+    def draw_string(self, x, y, text):
+        font, size = self._font
+        self._content += b"BT %s %g Tf %.2f %.2f Td (%s) Tj ET\n" % (font, size, x, y, _escape(text))
+
+    def show_page(self):
+        content = zlib.compress(bytes(self._content))
+        self._content.clear()
+        content_id, page_id = self._next_id, self._next_id + 1
+        self._next_id += 2
+        self._object(content_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+                     % (len(content), content))
+        fonts = b" ".join(b"%s %d 0 R" % (font, number)
+                          for number, font in enumerate(FONTS.values(), _FIRST_FONT))
+        self._object(page_id, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+                              b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+                     % (_PAGES, self.width, self.height, fonts, content_id))
+        self._page_ids.append(page_id)
+
+    def finish(self):
+        if self._content or not self._page_ids:
+            self.show_page()
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._object(_PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)))
+
+        xref_offset = self._offset
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next_id)
+        for number in range(1, self._next_id):
+            self._write(b"%010d 00000 n \n" % self._offsets[number])
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (self._next_id, _CATALOG, xref_offset))
+
+    def take(self):
+        data = bytes(self._pending)
+        self._pending.clear()
+        return data
+
+
+class PdfReportStream(CursorStream):
+    """Response body rendering one block of text lines per row.
+
+    `render(row)` returns the row's lines as (x, text) pairs, drawn 15pt
+    apart with a 25pt gap after the block, in the layout the reportlab
+    exports used. `decorate(rows)`, if given, returns one dict of extra
+    fields per row of each batch (refdata names), merged into the rows.
+    `progress(rows)`, if given, is called with the running row count after
+    each batch has been drawn.
+    """
+
+    content_type = "application/pdf"
+
+    def __init__(self, conn, cursor, title, render, decorate=None, progress=None):
+        super().__init__(conn, cursor)
+        self._title = title
+        self._render = render
+        self._decorate = decorate
+        self._progress = progress
+
+    def __iter__(self):
+        pdf = PdfWriter(A4)
+        y = pdf.height - 40
+        pdf.set_font("Helvetica-Bold", 14)
+        pdf.draw_string(50, y, self._title)
+        y -= 30
+        pdf.set_font("Helvetica", 10)
+
+        rows = 0
+        while True:
+            batch = self._cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                self._exhausted = True
+                break
+            if self._decorate is not None:
+                for row, extra in zip(batch, self._decorate(batch)):
+                    row.update(extra)
+            for row in batch:
+                if y < 100:
+                    pdf.show_page()
+                    yield pdf.take()
+                    y = pdf.height - 40
+                for x, text in self._render(row):
+                    pdf.draw_string(x, y, text)
+                    y -= 15
+                y -= 10
+            rows += len(batch)
+            if self._progress is not None:
+                self._progress(rows)
+
+        pdf.finish()
+        yield pdf.take()
+
+
+def stream_pdf_report(query, values, title, render, decorate=None, progress=None):
+    """Run `query` on an unbuffered dictionary cursor; None if no connection is available."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, values)
+    except Exception:
+        conn.close()
+        raise
+    return PdfReportStream(conn, cursor, title, render, decorate, progress)
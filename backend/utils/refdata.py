@@ -0,0 +1,150 @@
+# backend/utils/refdata.py
+#
+# Process-wide cache of the small lookup tables (user, department, network)
+# that list and export queries used to join only to turn ids into names.
+# Queries now select the ids and fill in names here, one batched lookup
+# per page of rows for whatever is not cached yet.
+#
+# Entries expire after REFDATA_CACHE_TTL seconds and the least recently
+# used ones are evicted past REFDATA_CACHE_SIZE per table. Writes invalidate
+# through the per-table version counters, shared by prefork workers (forked)
+# and export renderers (handed over, see backend/export_jobs.py), so a user
+# renamed in one process is seen by all of them on their next lookup.
+#
+# Misses are loaded on the small "refdata" connection pool: a streaming
+# list response is still holding its main-pool connection at that point.
+from backend.config import get_float, get_int
+from backend.db.connection import db_connection
+from backend.utils.cache import LRUCache
+from backend.utils.logger import get_logger
+from backend.utils.versions import version_token
+
+log = get_logger("refdata")
+
+_MISSING = object()
+
+
+class ReferenceTable:
+    def __init__(self, table, id_column, columns, maxsize, ttl):
+        self.table = table
+        self.id_column = id_column
+        self.columns = columns
+        self._cache = LRUCache(maxsize, ttl)
+        self._version = None
+        self.load_errors = 0
+
+    def _check_version(self):
+        token = version_token((self.table,))
+        if token != self._version:
+            # Set before clearing: a write racing with this check bumps the
+            # token again and the next lookup clears once more
+            self._version = token
+            self._cache.clear()
+
+    def get_many(self, ids):
+        """{id: row dict, or None if there is no such row} for `ids`."""
+        self._check_version()
+        found = {}
+        missing = []
+        for row_id in set(ids):
+            if row_id is None:
+                continue
+            row = self._cache.get(row_id, _MISSING)
+            if row is _MISSING:
+                missing.append(row_id)
+            else:
+                found[row_id] = row
+        if missing:
+            found.update(self._load(missing))
+        return found
+
+    def get(self, row_id):
+        if row_id is None:
+            return None
+        return self.get_many((row_id,)).get(row_id)
+
+    def _load(self, ids):
+        loaded = dict.fromkeys(ids)
+        # A write seen while this query runs clears the cache; rows read
+        # before it must not be stored afterwards
+        generation = self._cache.generation
+        try:
+            with db_connection("refdata") as conn:
+                if not conn:
+                    raise ConnectionError("Database connection failed")
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(f"""
+                    SELECT {self.id_column}, {", ".join(self.columns)}
+                    FROM `{self.table}`
+                    WHERE {self.id_column} IN ({", ".join(["%s"] * len(ids))})
+                """, ids)
+                for row in cursor.fetchall():
+                    loaded[row.pop(self.id_column)] = row
+                cursor.close()
+        except Exception as e:
+            # Names are decoration: show the row without them rather than fail
+            self.load_errors += 1
+            log.error("reference data lookup failed", table=self.table, error=e)
+            return loaded
+        for row_id, row in loaded.items():
+            self._cache.set(row_id, row, generation)
+        return loaded
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats["load_errors"] = self.load_errors
+        return stats
+
+
+_size = get_int("REFDATA_CACHE_SIZE", 10000)
+_ttl = get_float("REFDATA_CACHE_TTL", 300.0)
+
+users = ReferenceTable("user", "user_id", ("full_name", "department_id"), _size, _ttl)
+departments = ReferenceTable("department", "department_id", ("name",), _size, _ttl)
+networks = ReferenceTable("network", "network_id", ("name",), _size, _ttl)
+
+
+def _name(row, column="name"):
+    return row[column] if row else None
+
+
+def user_names(rows, id_key="user_id"):
+    """[{"user_name": ...}] for each row (dict or any mapping with `id_key`)."""
+    found = users.get_many(row[id_key] for row in rows)
+    return [{"user_name": _name(found.get(row[id_key]), "full_name")} for row in rows]
+
+
+def system_names(rows):
+    """[{"user_name", "department", "network"}] for system rows."""
+    found_users = users.get_many(row["user_id"] for row in rows)
+    found_departments = departments.get_many(
+        user["department_id"] for user in found_users.values() if user
+    )
+    found_networks = networks.get_many(row["network_id"] for row in rows)
+
+    names = []
+    for row in rows:
+        user = found_users.get(row["user_id"])
+        department = found_departments.get(user["department_id"]) if user else None
+        names.append({
+            "user_name": _name(user, "full_name"),
+            "department": _name(department),
+            "network": _name(found_networks.get(row["network_id"])),
+        })
+    return names
+
+
+def for_stream(names, *keys):
+    """Adapt user_names/system_names to JsonStream's decorate(batch, encoder) hook."""
+    def decorate(batch, encoder):
+        indexes = [(key, encoder.index(key)) for key in keys]
+        return names([{key: row[i] for key, i in indexes} for row in batch])
+    return decorate
+
+
+def stats():
+    return {
+        "users": users.stats(),
+        "departments": departments.stats(),
+        "networks": networks.stats(),
+    }
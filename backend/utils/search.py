@@ -0,0 +1,100 @@
+# backend/utils/search.py
+#
+# Helpers for ranked full-text search: turning ?q= into the terms MySQL's
+# FULLTEXT index will match, paging by relevance, and marking the matched
+# terms in snippets for display.
+#
+# Pages are keyset-paged on (score DESC, id DESC), like the list endpoints
+# page on (created_at, id). Scores depend on how common each term is across
+# the table, so a write between two page requests can shift rows across
+# the page boundary; the cursor never repeats a row within one ranking.
+import base64
+import html
+import re
+
+from backend.config import get_int
+from backend.utils.pagination import InvalidPageRequest
+
+# InnoDB does not index words shorter than innodb_ft_min_token_size (3)
+MIN_TERM_LENGTH = get_int("SEARCH_MIN_TERM_LENGTH", 3)
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 10
+SNIPPET_CHARS = 160
+
+_WORD = re.compile(r"\w+")
+
+
+class InvalidSearchRequest(ValueError):
+    pass
+
+
+def search_terms(query):
+    """The distinct words of `query` long enough to be in the index, in order."""
+    query = (query or "").strip()
+    if not query:
+        raise InvalidSearchRequest("q is required")
+    if len(query) > MAX_QUERY_LENGTH:
+        raise InvalidSearchRequest(f"q must be at most {MAX_QUERY_LENGTH} characters")
+    terms = []
+    for word in _WORD.findall(query.lower()):
+        if len(word) >= MIN_TERM_LENGTH and word not in terms:
+            terms.append(word)
+    if not terms:
+        raise InvalidSearchRequest(f"Search for at least one word of {MIN_TERM_LENGTH} or more characters")
+    return terms[:MAX_TERMS]
+
+
+def encode_score_cursor(score, row_id):
+    raw = f"{score!r}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_score_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return float(score), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidPageRequest("Invalid cursor")
+
+
+def _pattern(terms):
+    # Whole words and their longer forms ("print" marks "printer"), as a
+    # stemming-free approximation of what the index matched
+    return re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+
+
+def highlight(text, terms):
+    """`text` HTML-escaped, with matched words wrapped in <mark>."""
+    return _mark(text or "", _pattern(terms))
+
+
+def snippet(text, terms, width=SNIPPET_CHARS):
+    """About `width` characters of `text` around its first match, highlighted."""
+    text = " ".join((text or "").split())
+    pattern = _pattern(terms)
+    match = pattern.search(text)
+    start = 0
+    if match and match.start() > width // 3:
+        start = match.start() - width // 3
+        # Begin on a word boundary
+        space = text.find(" ", start)
+        if space != -1 and space < match.start():
+            start = space + 1
+    end = min(len(text), start + width)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+    return ("…" if start else "") + _mark(text[start:end], pattern) + ("…" if end < len(text) else "")
+
+
+def _mark(text, pattern):
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append("<mark>" + html.escape(match.group(0)) + "</mark>")
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
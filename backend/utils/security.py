@@ -1,15 +1,108 @@
 # backend/utils/security.py
+#
+# Password hashing (PBKDF2-SHA256, 100k iterations, stored as "salt:hash").
+# Each hash costs tens of milliseconds of CPU, so /login and /register run
+# it on a small dedicated thread pool (AUTH_HASH_WORKERS) instead of on the
+# request thread: a burst of logins then occupies at most that many cores,
+# and API requests keep the rest. pbkdf2_hmac releases the GIL, so threads
+# are enough. At most AUTH_HASH_QUEUE hashes may wait for the pool; beyond
+# that hash_password_pooled/verify_password_pooled raise PasswordPoolBusy and
+# the route answers 503 rather than tying up more request threads.
+import atexit
 import hashlib
+import hmac
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.config import get_float, get_int
+
+ITERATIONS = 100000
+
+
+class PasswordPoolBusy(RuntimeError):
+    pass
+
 
 def hash_password(password: str, salt: bytes = None):
     if salt is None:
         salt = os.urandom(16)
-    hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
+    hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, ITERATIONS)
     return salt.hex() + ':' + hashed.hex()
 
 def verify_password(stored_password: str, provided_password: str) -> bool:
     salt_hex, hashed_hex = stored_password.split(':')
     salt = bytes.fromhex(salt_hex)
-    hashed = hashlib.pbkdf2_hmac('sha256', provided_password.encode(), salt, 100000)
-    return hashed.hex() == hashed_hex
+    hashed = hashlib.pbkdf2_hmac('sha256', provided_password.encode(), salt, ITERATIONS)
+    return hmac.compare_digest(hashed.hex(), hashed_hex)
+
+
+class PasswordPool:
+    def __init__(self, workers=2, queue_size=32, wait_timeout=2.0):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.wait_timeout = wait_timeout
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+        self.hashed = 0
+        self.rejected = 0
+
+    def _executor(self):
+        # Threads do not survive fork(): each prefork worker starts its own
+        if self._pool is not None and self._pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="password-hash")
+                self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+                self._pid = os.getpid()
+            return self._pool
+
+    def run(self, fn, *args):
+        executor = self._executor()
+        slots = self._slots
+        if not slots.acquire(timeout=self.wait_timeout):
+            self.rejected += 1
+            raise PasswordPoolBusy("Too many logins in progress")
+        try:
+            return executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+            self.hashed += 1
+
+    def close(self):
+        if self._pool is None or self._pid != os.getpid():
+            return
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "hashed": self.hashed,
+            "rejected": self.rejected,
+        }
+
+
+password_pool = PasswordPool(
+    workers=get_int("AUTH_HASH_WORKERS", 2),
+    queue_size=get_int("AUTH_HASH_QUEUE", 32),
+    wait_timeout=get_float("AUTH_HASH_WAIT", 2.0),
+)
+
+atexit.register(password_pool.close)
+
+
+def hash_password_pooled(password: str):
+    """hash_password() on the password pool; the caller waits for the result."""
+    return password_pool.run(hash_password, password)
+
+
+def verify_password_pooled(stored_password: str, provided_password: str) -> bool:
+    """verify_password() on the password pool; the caller waits for the result."""
+    return password_pool.run(verify_password, stored_password, provided_password)
@@ -0,0 +1,158 @@
+# backend/utils/streaming.py
+#
+# Streams a list endpoint's rows straight from MySQL to the socket. The
+# query runs on an unbuffered cursor and rows are pulled in batches, encoded
+# one at a time and flushed in ~16 KB chunks. Peak memory is one batch, not
+# the result set plus its converted copy plus one big json.dumps string.
+import json
+import time
+
+from mysql.connector import Error
+
+from backend.db.connection import get_db_connection
+from backend.utils import metrics
+from backend.utils.encoder import RowEncoder, dumps
+from backend.utils.pagination import encode_cursor
+
+FETCH_BATCH_SIZE = 500
+FLUSH_BYTES = 16 * 1024
+
+
+class CursorStream:
+    """Base for response bodies read from an open unbuffered cursor.
+
+    Owns the cursor and its pooled connection until close(). Subclasses set
+    content_type and self._exhausted once every row has been read.
+    """
+
+    content_type = "application/octet-stream"
+
+    def __init__(self, conn, cursor):
+        self._conn = conn
+        self._cursor = cursor
+        self._exhausted = False
+
+    def close(self):
+        if self._conn is None:
+            return
+        try:
+            self._cursor.close()
+        except Error:
+            # Closed mid-result (client went away): the connection still has
+            # unread rows on the wire, so drop it rather than pool it
+            self._exhausted = False
+        if not self._exhausted:
+            try:
+                self._conn.raw.close()
+            except Error:
+                pass
+        self._conn.close()
+        self._conn = None
+
+
+class JsonStream(CursorStream):
+    """Response body for `{"<key>": [rows...], "next_cursor": ...}`.
+
+    Built by stream_query(), which has already run the query, so connection
+    and SQL errors surface before any response headers go out. The handler
+    iterates it for bytes and must call close() afterwards.
+
+    `decorate`, if given, is called as decorate(batch, encoder) once per
+    fetched batch and returns one dict of extra fields per row, which are
+    appended to that row's object (names looked up from the refdata cache).
+
+    `tail`, if given, is a callable returning more rows as dicts (same
+    columns, same order, extra fields included). It is only called once the query is exhausted
+    with room left on the page, e.g. to continue a listing into archived
+    rows that are no longer in the table.
+    """
+
+    content_type = "application/json"
+
+    def __init__(self, conn, cursor, key, limit=None, id_key=None, tail=None, decorate=None):
+        super().__init__(conn, cursor)
+        self._key = key
+        self._encoder = RowEncoder(cursor.description)
+        self._limit = limit
+        self._id_key = id_key
+        self._tail = tail
+        self._decorate = decorate
+        # Summed per batch and reported once, at close()
+        self._encode_seconds = 0.0
+
+    def close(self):
+        if self._conn is not None:
+            metrics.json_encode_duration.observe(self._encode_seconds, "stream")
+        super().close()
+
+    def _rows(self):
+        """(row, JSON text) pairs, with decorate()'s fields merged into the text."""
+        encode = self._encoder.encode
+        while True:
+            batch = self._cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                self._exhausted = True
+                return
+            extras = self._decorate(batch, self._encoder) if self._decorate is not None else None
+            started = time.perf_counter()
+            if extras is None:
+                texts = [encode(row) for row in batch]
+            else:
+                texts = [encode(row)[:-1] + ", " + dumps(extra)[1:] for row, extra in zip(batch, extras)]
+            self._encode_seconds += time.perf_counter() - started
+            yield from zip(batch, texts)
+
+    def __iter__(self):
+        created_index = self._encoder.index("created_at") if self._limit is not None else None
+        id_index = self._encoder.index(self._id_key) if self._limit is not None else None
+        buffer = bytearray(b'{"' + self._key.encode() + b'": [')
+        sent = 0
+        last = None
+        next_cursor = None
+
+        for row, text in self._rows():
+            if self._limit is not None and sent == self._limit:
+                # The look-ahead row fetched by LIMIT limit + 1: more pages exist
+                next_cursor = encode_cursor(*last)
+                continue
+            if sent:
+                buffer += b", "
+            buffer += text.encode()
+            sent += 1
+            if self._limit is not None:
+                last = (row[created_index], row[id_index])
+            if len(buffer) >= FLUSH_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+
+        if self._tail is not None and next_cursor is None:
+            for row in self._tail():
+                if self._limit is not None and sent == self._limit:
+                    next_cursor = encode_cursor(*last)
+                    break
+                if sent:
+                    buffer += b", "
+                buffer += dumps(row).encode()
+                sent += 1
+                if self._limit is not None:
+                    last = (row["created_at"], row[self._id_key])
+                if len(buffer) >= FLUSH_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
+
+        buffer += b'], "next_cursor": ' + json.dumps(next_cursor).encode() + b"}"
+        yield bytes(buffer)
+
+
+def stream_query(query, values, key, limit=None, id_key=None, tail=None, decorate=None):
+    """Run `query` on an unbuffered cursor; None if no connection is available."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(query, values)
+    except Exception:
+        conn.close()
+        raise
+    return JsonStream(conn, cursor, key, limit=limit, id_key=id_key, tail=tail, decorate=decorate)
@@ -0,0 +1,132 @@
+# backend/utils/tokens.py
+#
+# Stateless session tokens. /login issues
+#     base64url("<user_id>:<role>:<expires>:<token_id>") "." base64url(HMAC-SHA256)
+# and every request checks the signature and expiry with no database or
+# password hashing, a few microseconds of work.
+#
+# The key is AUTH_TOKEN_SECRET. Without one, a random key is made at import
+# time, before prefork forks, so every worker shares it; tokens then stop
+# working when the server restarts.
+#
+# /logout revokes a token by adding its id to a denylist, kept until the
+# token would have expired anyway. Like the version counters, the denylist
+# is a shared-memory array allocated before fork, so a logout handled by one
+# worker is seen by all of them. It is a fixed-size open-addressing hash
+# table (AUTH_DENYLIST_SIZE slots); expired entries are reused.
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import secrets
+import time
+
+from backend.config import get_int, get_setting
+
+TOKEN_TTL = get_int("AUTH_TOKEN_TTL", 8 * 3600)
+DENYLIST_SIZE = get_int("AUTH_DENYLIST_SIZE", 4096)
+ROLES = ("Admin", "IT_Personnel", "User")
+
+_secret = get_setting("AUTH_TOKEN_SECRET")
+_SECRET = _secret.encode() if _secret else secrets.token_bytes(32)
+
+# Slot i holds token id _denied_ids[i] until _denied_until[i]; 0 is empty
+_denied_ids = multiprocessing.Array("q", DENYLIST_SIZE)
+_denied_until = multiprocessing.Array("q", DENYLIST_SIZE, lock=False)
+
+# Unsigned tokens, bad signatures, expired and revoked tokens
+rejected = 0
+
+
+class Claims:
+    __slots__ = ("user_id", "role", "expires", "token_id")
+
+    def __init__(self, user_id, role, expires, token_id):
+        self.user_id = user_id
+        self.role = role
+        self.expires = expires
+        self.token_id = token_id
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return _b64encode(hmac.new(_SECRET, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(user_id, role, ttl=None):
+    """(token, expires) for a freshly logged-in user."""
+    expires = int(time.time()) + (ttl or TOKEN_TTL)
+    # Non-zero, so it never looks like an empty denylist slot
+    token_id = secrets.randbits(62) + 1
+    payload = _b64encode(f"{int(user_id)}:{role}:{expires}:{token_id}".encode())
+    return f"{payload}.{_sign(payload)}", expires
+
+
+def verify_token(token):
+    """The token's Claims, or None if it is malformed, forged, expired or revoked."""
+    global rejected
+    try:
+        payload, signature = token.split(".")
+        # As bytes: compare_digest() raises TypeError on a non-ASCII str, and
+        # encode() turns that into a UnicodeEncodeError (a ValueError)
+        if not hmac.compare_digest(signature.encode("ascii"), _sign(payload).encode("ascii")):
+            raise ValueError("bad signature")
+        user_id, role, expires, token_id = _b64decode(payload).decode().split(":")
+        claims = Claims(int(user_id), role, int(expires), int(token_id))
+    except (ValueError, UnicodeDecodeError):
+        rejected += 1
+        return None
+    if claims.expires <= time.time() or is_revoked(claims.token_id):
+        rejected += 1
+        return None
+    return claims
+
+
+def _slots(token_id):
+    start = token_id % DENYLIST_SIZE
+    for offset in range(DENYLIST_SIZE):
+        yield (start + offset) % DENYLIST_SIZE
+
+
+def is_revoked(token_id):
+    for slot in _slots(token_id):
+        denied = _denied_ids[slot]
+        if denied == 0:
+            return False
+        if denied == token_id:
+            return _denied_until[slot] > time.time()
+    return False
+
+
+def revoke(claims):
+    """Deny `claims`' token until it expires; False if the denylist is full."""
+    now = time.time()
+    with _denied_ids.get_lock():
+        for slot in _slots(claims.token_id):
+            denied = _denied_ids[slot]
+            # Expired slots are reused rather than emptied, so lookups
+            # never stop short of an entry further along the probe chain
+            if denied in (0, claims.token_id) or _denied_until[slot] <= now:
+                _denied_until[slot] = claims.expires
+                _denied_ids[slot] = claims.token_id
+                return True
+    return False
+
+
+def stats():
+    now = time.time()
+    return {
+        "denylist_size": DENYLIST_SIZE,
+        "revoked": sum(1 for slot in range(DENYLIST_SIZE)
+                       if _denied_ids[slot] and _denied_until[slot] > now),
+        "rejected": rejected,
+        "ttl_seconds": TOKEN_TTL,
+        "ephemeral_secret": not _secret,
+    }
@@ -0,0 +1,89 @@
+# backend/utils/versions.py
+#
+# Per-table change counters, bumped by record_change() after every committed
+# write. GET handlers derive strong ETags from the counters of the tables a
+# response reads, so an unchanged list can be answered with 304 before any
+# query runs.
+#
+# The counters live in shared memory allocated at import time, i.e. before
+# prefork forks its workers, so a write handled by one worker changes the
+# ETags every worker hands out. A per-boot epoch is folded in so ETags from
+# before a restart never match. Writes that bypass the API (other hosts,
+# manual SQL) are not seen; run one server per database, or accept that
+# clients may keep a stale list until the next API write. Export processes
+# are spawned rather than forked and are handed the same counters through
+# use_shared_state().
+import multiprocessing
+import time
+
+from backend.utils.changes import on_change
+
+VERSIONED_TABLES = ("system", "peripheral", "complaint", "user", "department", "network", "log")
+
+_INDEX = {table: i for i, table in enumerate(VERSIONED_TABLES)}
+# From the "spawn" context so the array (and its lock) can also be handed to
+# spawned export processes; forked workers inherit it either way
+_counters = multiprocessing.get_context("spawn").Array("q", len(VERSIONED_TABLES))
+# How much of each counter this process's writes account for
+_local_counts = [0] * len(VERSIONED_TABLES)
+_EPOCH = format(time.time_ns() // 1000, "x")
+
+
+@on_change
+def _bump_version(resource_type, action, resource_id):
+    bump(resource_type)
+
+
+def bump(table):
+    index = _INDEX.get(table)
+    if index is None:
+        return
+    with _counters.get_lock():
+        _counters[index] += 1
+        _local_counts[index] += 1
+
+
+def shared_state():
+    """What a "spawn" child needs to follow these counters (see use_shared_state)."""
+    return _counters, _EPOCH
+
+
+def use_shared_state(counters, epoch):
+    # A spawned process re-imports this module and would get counters of
+    # its own that never move; forked ones inherit the parent's anyway
+    global _counters, _EPOCH
+    _counters = counters
+    _EPOCH = epoch
+
+
+def snapshot():
+    """(all writes, this process's writes) per table, in VERSIONED_TABLES order."""
+    with _counters.get_lock():
+        return list(_counters), list(_local_counts)
+
+
+def version_token(tables):
+    """Opaque string that changes whenever any of `tables` is written."""
+    return _EPOCH + "-" + ".".join(str(_counters[_INDEX[table]]) for table in tables)
+
+
+def make_etag(tables):
+    # Read before the response is built: a write landing in between can
+    # only make the body newer than its ETag, which costs one extra full
+    # response later but never passes stale data off as current
+    return '"' + version_token(tables) + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,164 @@
+# benchmarks/auth_bench.py
+#
+# Throughput of authenticated requests, without needing MySQL. A synthetic
+# handler authorises every request one of three ways and answers a tiny
+# JSON body:
+#   /headers   trusts X-User-ID / X-User-Role, as the API did before tokens
+#              (free, and forgeable)
+#   /password  checks a password on every request (PBKDF2, the cost of
+#              authenticating each call against the user table's hash)
+#   /token     verifies the signed session token from /login
+# Then /token is driven again while other clients hammer /login, once with
+# the PBKDF2 check run inline on the request thread and once on the
+# AUTH_HASH_WORKERS password pool, to show what a login burst costs
+# everyone else.
+#
+# Usage: python -m benchmarks.auth_bench [--clients 16] [--login-clients 16] [--seconds 5]
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+from backend.serving import make_server
+from backend.utils.security import hash_password, password_pool, verify_password
+from backend.utils.tokens import issue_token, verify_token
+
+PORT = 8766
+PASSWORD = "correct horse battery staple"
+
+
+class AuthHandler(BaseHTTPRequestHandler):
+    stored_hash = None
+    pooled_logins = False
+
+    def log_message(self, format, *args):
+        pass
+
+    def _authorised(self):
+        if self.path == "/headers":
+            return self.headers.get("X-User-Role") == "Admin"
+        if self.path == "/password":
+            return verify_password(self.stored_hash, self.headers.get("X-Password", ""))
+        if self.path == "/token":
+            claims = verify_token(self.headers.get("Authorization", "")[7:])
+            return claims is not None and claims.role == "Admin"
+        if self.path == "/login":
+            check = password_pool.run if self.pooled_logins else (lambda fn, *args: fn(*args))
+            return check(verify_password, self.stored_hash, PASSWORD)
+        return False
+
+    def do_GET(self):
+        status = 200 if self._authorised() else 401
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(pooled_logins, threads):
+    AuthHandler.stored_hash = hash_password(PASSWORD)
+    AuthHandler.pooled_logins = pooled_logins
+    httpd = make_server(AuthHandler, "127.0.0.1", PORT, mode="threaded",
+                        max_workers=threads, queue_depth=256)
+    signal.signal(signal.SIGTERM, lambda *a: threading.Thread(target=httpd.shutdown).start())
+    httpd.serve_forever()
+    httpd.server_close()
+
+
+def _drive(path, headers, clients, deadline, results):
+    done = 0
+    errors = 0
+    lock = threading.Lock()
+
+    def client():
+        nonlocal done, errors
+        local_done = local_errors = 0
+        while time.monotonic() < deadline:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                conn.close()
+                if resp.status == 200:
+                    local_done += 1
+                else:
+                    local_errors += 1
+            except OSError:
+                local_errors += 1
+        with lock:
+            done += local_done
+            errors += local_errors
+
+    workers = [threading.Thread(target=client) for _ in range(clients)]
+    for w in workers:
+        w.start()
+
+    def collect():
+        for w in workers:
+            w.join()
+        results[path] = {"done": done, "errors": errors}
+    return threading.Thread(target=collect)
+
+
+def _run(pooled_logins, threads, loads, seconds):
+    """{path: requests/s} for the (path, headers, clients) loads run together."""
+    server = multiprocessing.Process(target=_serve, args=(pooled_logins, threads))
+    server.start()
+    time.sleep(0.5)
+    results = {}
+    try:
+        deadline = time.monotonic() + seconds
+        collectors = [_drive(path, headers, clients, deadline, results)
+                      for path, headers, clients in loads]
+        for c in collectors:
+            c.start()
+        for c in collectors:
+            c.join()
+    finally:
+        os.kill(server.pid, signal.SIGTERM)
+        server.join()
+    return {path: {"rps": round(r["done"] / seconds, 1), "errors": r["errors"]}
+            for path, r in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--login-clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+
+    # Issued here with the per-boot key, which the forked server inherits
+    token, _ = issue_token(1, "Admin")
+    schemes = {
+        "/headers": {"X-User-ID": "1", "X-User-Role": "Admin"},
+        "/password": {"X-Password": PASSWORD},
+        "/token": {"Authorization": f"Bearer {token}"},
+    }
+
+    results = {}
+    for path, headers in schemes.items():
+        results[path] = _run(False, args.threads, [(path, headers, args.clients)], args.seconds)[path]
+        print(path, json.dumps(results[path]))
+
+    for label, pooled in (("login burst, inline", False), ("login burst, pooled", True)):
+        results[label] = _run(pooled, args.threads, [
+            ("/token", schemes["/token"], args.clients),
+            ("/login", {}, args.login_clients),
+        ], args.seconds)
+        print(label, json.dumps(results[label]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/compare.py
+#
+# Compares two result files written by benchmarks/load.py, request label by
+# request label: requests per second, p50/p95/p99 and errors, with the change
+# in percent. Exits with status 1 when the newer run is worse than
+# --threshold percent on throughput or p95/p99 latency anywhere, or has
+# errors the older one did not, so it can gate a commit in a script.
+# Latency changes smaller than --min-ms are never counted: sub-millisecond
+# requests move by more than any sensible threshold from noise alone.
+#
+# Runs with different scenarios, clients, durations or volumes are still
+# compared, with a warning: their numbers mean different things.
+#
+# Usage: python -m benchmarks.compare BASE.json NEW.json [--threshold 10] [--min-ms 1]
+import argparse
+import json
+
+# (key, higher is better)
+COLUMNS = (("rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+# Where a change past the threshold counts as a regression; p50 moves too
+# easily with noise to gate on
+GATED = ("rps", "p95_ms", "p99_ms")
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(old, new):
+    """Percent change from old to new; None when either is missing or old is 0."""
+    if old is None or new is None or old == 0:
+        return None
+    return (new - old) / old * 100
+
+
+def describe(result):
+    git = result.get("git") or {}
+    commit = (git.get("commit") or "unknown")[:8] + (" (dirty)" if git.get("dirty") else "")
+    label = f" [{result['label']}]" if result.get("label") else ""
+    return f"{result['scenario']} at {commit}{label}, {result['started_at']}"
+
+
+def compare(base, new, threshold, min_ms=1.0):
+    """Print the comparison; the list of regressions found."""
+    for key in ("clients", "duration", "volumes"):
+        if base["config"].get(key) != new["config"].get(key):
+            print(f"warning: runs differ in {key}: {base['config'].get(key)} vs {new['config'].get(key)}")
+    if base["scenario"] != new["scenario"]:
+        print(f"warning: different scenarios: {base['scenario']} vs {new['scenario']}")
+
+    print(f"base: {describe(base)}")
+    print(f"new:  {describe(new)}")
+    print(f"{'request':<22}" + "".join(f"{key:>20}" for key, _ in COLUMNS) + f"{'errors':>12}")
+
+    regressions = []
+    rows = [(label, base["requests"].get(label), new["requests"].get(label))
+            for label in sorted(set(base["requests"]) | set(new["requests"]))]
+    rows.append(("all", base["overall"], new["overall"]))
+    for label, old, current in rows:
+        if old is None or current is None:
+            print(f"{label:<22}only in {'new' if old is None else 'base'}")
+            continue
+        cells = []
+        for key, higher_is_better in COLUMNS:
+            delta = change(old[key], current[key])
+            if delta is None:
+                cells.append(f"{current[key] if current[key] is not None else '-':>20}")
+                continue
+            worse = -delta if higher_is_better else delta
+            flag = ""
+            small = key != "rps" and abs(current[key] - old[key]) < min_ms
+            if key in GATED and worse > threshold and not small:
+                flag = " !"
+                regressions.append(f"{label} {key} {old[key]} -> {current[key]}")
+            cells.append(f"{f'{current[key]} ({delta:+.1f}%){flag}':>20}")
+        errors = f"{old['errors']} -> {current['errors']}"
+        if current["errors"] and not old["errors"]:
+            regressions.append(f"{label} errors 0 -> {current['errors']}")
+        print(f"{label:<22}" + "".join(cells) + f"{errors:>12}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent change counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="smallest latency change counted as a regression")
+    args = parser.parse_args()
+
+    regressions = compare(load(args.base), load(args.new), args.threshold, args.min_ms)
+    if regressions:
+        print(f"{len(regressions)} regressions past {args.threshold:g}%:")
+        for line in regressions:
+            print(f"  {line}")
+        raise SystemExit(1)
+    print(f"no regressions past {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
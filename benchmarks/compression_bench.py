@@ -0,0 +1,81 @@
+# benchmarks/compression_bench.py
+#
+# What gzip buys on a large `GET /systems` response, and what it costs.
+# Encodes --rows synthetic system rows (long cpu_model strings, as in the
+# field) the way the server does, then compresses the body at each level:
+#
+#   buffered  one gzip.compress() of the whole body (_send_json)
+#   streamed  FLUSH_BYTES chunks through GzipChunker, with a sync flush per
+#             chunk so the client can parse rows as they arrive (_send_stream)
+#
+# Reports compressed size, bytes saved and CPU milliseconds per response.
+#
+# Usage: python -m benchmarks.compression_bench [--rows 20000] [--levels 1,6,9]
+import argparse
+import gzip
+import time
+
+from benchmarks.encoder_bench import DESCRIPTION, make_rows, row_encoder
+from backend.utils.compression import GzipChunker
+from backend.utils.streaming import FLUSH_BYTES
+
+CPU_MODELS = (
+    "Intel(R) Core(TM) i7-12700 CPU @ 2.10GHz (12 cores / 20 threads, vPro Enterprise)",
+    "AMD Ryzen 7 PRO 5850U with Radeon Graphics (8 cores / 16 threads, 1.90GHz base)",
+    "Intel(R) Xeon(R) W-2245 CPU @ 3.90GHz (8 cores / 16 threads, workstation build)",
+    "Apple M2 Pro (10-core CPU, 16-core GPU, 16-core Neural Engine, custom image)",
+)
+
+
+def make_body(count, description):
+    cpu_index = [column[0] for column in description].index("cpu_model")
+    rows = []
+    for i, row in enumerate(make_rows(count)):
+        row = list(row)
+        row[cpu_index] = CPU_MODELS[i % len(CPU_MODELS)]
+        rows.append(tuple(row))
+    return row_encoder(rows, description)
+
+
+def buffered(body, level):
+    return len(gzip.compress(body, level, mtime=0))
+
+
+def streamed(body, level):
+    chunker = GzipChunker(level)
+    size = 0
+    for start in range(0, len(body), FLUSH_BYTES):
+        size += len(chunker.compress(body[start:start + FLUSH_BYTES]))
+    return size + len(chunker.finish())
+
+
+def measure(fn, body, level, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        size = fn(body, level)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return size, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--levels", default="1,6,9")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    description = [(name, code, None, None, None, None, 1, 0, 0) for name, code in DESCRIPTION]
+    body = make_body(args.rows, description)
+    print(f"{args.rows} rows, {len(body) / 1024:.0f} KiB uncompressed, CPU time best of {args.repeat}")
+    print(f"  {'mode':9s} {'level':>5s} {'KiB':>8s} {'saved':>7s} {'CPU ms':>8s}")
+    for level in (int(level) for level in args.levels.split(",")):
+        for name, fn in (("buffered", buffered), ("streamed", streamed)):
+            size, seconds = measure(fn, body, level, args.repeat)
+            print(f"  {name:9s} {level:5d} {size / 1024:8.0f} {1 - size / len(body):7.1%} "
+                  f"{seconds * 1000:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
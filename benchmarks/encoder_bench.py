@@ -0,0 +1,126 @@
+# benchmarks/encoder_bench.py
+#
+# Compares backend/utils/encoder.RowEncoder against the approach it
+# replaced: dict rows -> recursive convert_types() copy -> one json.dumps().
+# Rows mimic `GET /systems` (ints, strings, DECIMAL, DATETIME, NULLs).
+#
+# Usage: python -m benchmarks.encoder_bench [--rows 100000] [--repeat 3]
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from mysql.connector import FieldType
+
+from backend.utils.encoder import RowEncoder
+
+DESCRIPTION = [
+    ("system_id", FieldType.LONG),
+    ("hostname", FieldType.VAR_STRING),
+    ("os_name", FieldType.VAR_STRING),
+    ("os_version", FieldType.VAR_STRING),
+    ("ram_size_gb", FieldType.NEWDECIMAL),
+    ("cpu_model", FieldType.VAR_STRING),
+    ("storage_size_gb", FieldType.NEWDECIMAL),
+    ("ip_address", FieldType.VAR_STRING),
+    ("mac_address", FieldType.VAR_STRING),
+    ("antivirus_status", FieldType.STRING),
+    ("user_id", FieldType.LONG),
+    ("network_id", FieldType.LONG),
+    ("created_at", FieldType.DATETIME),
+    ("updated_at", FieldType.DATETIME),
+    ("user_name", FieldType.VAR_STRING),
+    ("department", FieldType.VAR_STRING),
+    ("network", FieldType.VAR_STRING),
+]
+
+
+def make_rows(count):
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        created = base + timedelta(minutes=i)
+        rows.append((
+            i + 1, f"PC-{i:06d}", "Windows", "11 Pro", Decimal("16.00"),
+            "Intel(R) Core(TM) i7-12700 CPU @ 2.10GHz", Decimal("512.00"),
+            f"10.1.{i // 250 % 256}.{i % 250}", f"00:1A:2B:{i % 256:02X}:{i // 256 % 256:02X}:9F",
+            "Installed", (i % 500) + 1 if i % 7 else None, (i % 3) + 1,
+            created, created, f"User {i % 500}", "IT" if i % 2 else "Finance", "Main Office",
+        ))
+    return rows
+
+
+def convert_types(obj):
+    """The per-route helper RowEncoder replaced."""
+    if isinstance(obj, list):
+        return [convert_types(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {k: convert_types(v) for k, v in obj.items()}
+    elif isinstance(obj, Decimal):
+        return float(obj)
+    elif isinstance(obj, datetime):
+        return obj.isoformat()
+    return obj
+
+
+def legacy(rows, names):
+    # What the dictionary cursor + convert_types + json.dumps path did
+    dict_rows = [dict(zip(names, row)) for row in rows]
+    return json.dumps({"systems": convert_types(dict_rows)}).encode()
+
+
+def row_encoder(rows, description):
+    encoder = RowEncoder(description)
+    encode = encoder.encode
+    chunks = [b'{"systems": [']
+    first = True
+    for row in rows:
+        if not first:
+            chunks.append(b", ")
+        chunks.append(encode(row).encode())
+        first = False
+    chunks.append(b"]}")
+    return b"".join(chunks)
+
+
+def measure(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    description = [(name, code, None, None, None, None, 1, 0, 0) for name, code in DESCRIPTION]
+    names = [column[0] for column in description]
+    rows = make_rows(args.rows)
+
+    assert json.loads(legacy(rows[:50], names)) == json.loads(row_encoder(rows[:50], description))
+
+    results = {
+        "convert_types + json.dumps": measure(legacy, rows, names, repeat=args.repeat),
+        "RowEncoder": measure(row_encoder, rows, description, repeat=args.repeat),
+    }
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, (seconds, peak) in results.items():
+        print(f"  {name:28s} {seconds * 1000:8.1f} ms  {args.rows / seconds:10.0f} rows/s  "
+              f"peak {peak / 1024 / 1024:7.1f} MiB")
+    print("  (RowEncoder peak includes the joined output; streamed responses only hold one chunk)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# benchmarks/explain_audit.py
+#
+# Query-plan regression check. Builds every query shape the list routes can
+# generate (each combination of filters, first page and a later keyset
+# page) with the routes' own build_*_query helpers, plus the /stats
+# aggregates, and runs EXPLAIN on each against the configured database.
+#
+# A shape fails when any table in its plan is read by full scan, or is
+# sorted with a filesort, over more than --max-rows estimated rows. For each
+# failure the composite index that would serve it (equality filters first,
+# then the sort column) is proposed, unless an equivalent one already exists.
+# Exits non-zero when anything fails, so it can gate schema changes.
+#
+# Seed realistic volumes first (python -m benchmarks.seed); plans on a
+# near-empty database say nothing.
+#
+# Usage: python -m benchmarks.explain_audit [--max-rows 1000] [--verbose]
+import argparse
+import itertools
+import sys
+from datetime import datetime, timedelta
+
+from backend.db.connection import db_connection
+from backend.routes.complaint import build_complaints_query
+from backend.routes.log import build_logs_query
+from backend.routes.peripheral import build_peripherals_query
+from backend.routes.stats import STATS_QUERIES
+from backend.routes.system import build_systems_query
+
+PAGE_SIZE = 50
+
+# filter parameter -> (sample value, column on the route's main table, or
+# None when the filter is applied to a joined table)
+ROUTE_QUERIES = (
+    {
+        "route": "GET /systems",
+        "build": build_systems_query,
+        "table": "system",
+        "filters": {"department_id": ("1", None), "network_id": ("1", "network_id")},
+    },
+    {
+        "route": "GET /complaints",
+        "build": build_complaints_query,
+        "table": "complaint",
+        "filters": {
+            "status": ("Open", "status"),
+            "priority": ("High", "priority"),
+            "user_id": ("1", "user_id"),
+        },
+    },
+    {
+        "route": "GET /peripherals",
+        "build": build_peripherals_query,
+        "table": "peripheral",
+        "filters": {},
+    },
+    {
+        "route": "GET /logs",
+        "build": build_logs_query,
+        "table": "log_entry",
+        "filters": {
+            "from": ((datetime.now() - timedelta(days=30)).date().isoformat(), None),
+            "to": (datetime.now().date().isoformat(), None),
+        },
+    },
+)
+
+SORT_COLUMN = "created_at"
+
+
+def query_shapes():
+    """Yield (route spec, filters used, label, sql, values) for every shape the routes build."""
+    later_page = (datetime.now() - timedelta(days=90), 2 ** 31 - 1)
+    for spec in ROUTE_QUERIES:
+        names = list(spec["filters"])
+        for size in range(len(names) + 1):
+            for combo in itertools.combinations(names, size):
+                filters = {name: [spec["filters"][name][0]] for name in combo}
+                for after in (None, later_page):
+                    sql, values = spec["build"](filters, PAGE_SIZE, after)
+                    label = "?" + "&".join(combo) if combo else "(no filters)"
+                    if after:
+                        label += " +cursor"
+                    yield spec, combo, label, sql, values
+
+
+def existing_indexes(cursor, table):
+    cursor.execute(f"SHOW INDEX FROM `{table}`")
+    indexes = {}
+    for row in cursor.fetchall():
+        indexes.setdefault(row["Key_name"], []).append(row["Column_name"])
+    return list(indexes.values())
+
+
+def propose_index(spec, combo):
+    """Columns for a composite index on the route's table: equality filters, then the sort."""
+    columns = []
+    for name in combo:
+        column = spec["filters"][name][1]
+        if column is None:
+            # Ranges (from/to) and joined-table filters cannot precede the sort column
+            continue
+        columns.append(column)
+    columns.append(SORT_COLUMN)
+    return tuple(columns)
+
+
+def problems(plan, max_rows, aggregate=False):
+    found = []
+    for row in plan:
+        rows = row.get("rows") or 0
+        extra = row.get("Extra") or ""
+        if rows <= max_rows:
+            continue
+        if row.get("type") == "ALL":
+            found.append((row["table"], f"full scan of ~{rows} rows"))
+        elif "Using filesort" in extra and not aggregate:
+            # Aggregates sort their grouped output, which is small
+            found.append((row["table"], f"filesort over ~{rows} rows"))
+    return found
+
+
+def summarize(plan):
+    return "; ".join(
+        f"{row['table']}:{row.get('type')}/{row.get('key') or '-'}/{row.get('rows')}"
+        for row in plan
+    )
+
+
+def audit(cursor, max_rows, verbose=False):
+    failures = 0
+    proposals = {}
+    index_cache = {}
+
+    for spec, combo, label, sql, values in query_shapes():
+        cursor.execute("EXPLAIN " + sql, values)
+        plan = cursor.fetchall()
+        found = problems(plan, max_rows)
+        name = f"{spec['route']} {label}"
+        if not found:
+            if verbose:
+                print(f"ok    {name}  [{summarize(plan)}]")
+            continue
+
+        failures += 1
+        for table, reason in found:
+            print(f"FAIL  {name}: {table} {reason}  [{summarize(plan)}]")
+
+        columns = propose_index(spec, combo)
+        table = spec["table"]
+        if table not in index_cache:
+            index_cache[table] = existing_indexes(cursor, table)
+        if any(spec["filters"][name][1] is None and name not in ("from", "to") for name in combo):
+            print("      filter on a joined table: no index on "
+                  f"{table} serves it; consider denormalising or driving from the joined table")
+        elif any(index[:len(columns)] == list(columns) for index in index_cache[table]):
+            print(f"      an index on {table} ({', '.join(columns)}) exists but was not chosen;"
+                  f" run ANALYZE TABLE {table} or check the filter's selectivity")
+        else:
+            proposals.setdefault((table, columns), []).append(name)
+
+    for number, sql in enumerate(STATS_QUERIES, 1):
+        cursor.execute("EXPLAIN " + sql)
+        plan = cursor.fetchall()
+        found = problems(plan, max_rows, aggregate=True)
+        name = f"GET /stats query {number}"
+        if not found:
+            if verbose:
+                print(f"ok    {name}  [{summarize(plan)}]")
+            continue
+        failures += 1
+        for table, reason in found:
+            print(f"FAIL  {name}: {table} {reason}  [{summarize(plan)}]")
+
+    if proposals:
+        print("\nProposed indexes:")
+        for (table, columns), shapes in proposals.items():
+            index_name = "idx_" + table.replace("_entry", "") + "_" + "_".join(
+                column.replace("_id", "").replace("created_at", "created") for column in columns
+            )
+            print(f"    CREATE INDEX {index_name} ON `{table}` ({', '.join(columns)});")
+            for shape in shapes:
+                print(f"        -- {shape}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-rows", type=int, default=1000,
+                        help="estimated rows above which a scan or filesort fails")
+    parser.add_argument("--verbose", action="store_true", help="print passing plans too")
+    args = parser.parse_args()
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("Database connection failed")
+        cursor = conn.cursor(dictionary=True)
+        failures = audit(cursor, args.max_rows, args.verbose)
+        cursor.close()
+
+    print(f"\n{failures} query shape(s) failed" if failures else "\nall query shapes passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/import_bench.py
+#
+# Rows per second for onboarding systems, two ways:
+#   per-row  one add_system() call per row, as POST /add-system does it:
+#            JSON parse, connection checkout, single-row INSERT, commit
+#   import   one import_systems() call over the same rows as NDJSON:
+#            chunked validation, executemany() upserts, a commit every
+#            IMPORT_TRANSACTION_ROWS rows
+# The import is then repeated over the same hostnames to time the
+# ON DUPLICATE KEY UPDATE path.
+#
+# Rows get a unique hostname prefix and are deleted afterwards. Refuses to
+# run against a database whose name does not contain "bench" or "test"
+# unless --force is given.
+#
+# Usage: IT_MGMT_DB_NAME=it_management_bench python -m benchmarks.import_bench [--rows 5000]
+import argparse
+import json
+import time
+
+from backend.config import get_setting
+from backend.db.connection import db_connection
+from backend.routes.system import add_system, import_systems
+
+
+def make_rows(prefix, count):
+    return [{
+        "hostname": f"{prefix}-{i:06d}", "os_name": "Windows", "os_version": "11 Pro",
+        "ram_size_gb": 16, "cpu_model": "Bench CPU", "storage_size_gb": 512,
+        "ip_address": f"10.200.{i // 256 % 256}.{i % 256}", "mac_address": f"02:01:{i:08x}",
+        "antivirus_status": "Installed",
+    } for i in range(count)]
+
+
+def cleanup(prefix):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM `system` WHERE hostname LIKE %s", (prefix + "-%",))
+        conn.commit()
+        cursor.close()
+
+
+def time_per_row(rows):
+    started = time.perf_counter()
+    for row in rows:
+        status, response = add_system(json.dumps(row))
+        if status != 201:
+            raise SystemExit(f"add_system failed: {status} {response}")
+    return time.perf_counter() - started
+
+
+def time_import(rows):
+    lines = [json.dumps(row) for row in rows]
+    started = time.perf_counter()
+    status, report = import_systems(iter(lines), "application/x-ndjson")
+    elapsed = time.perf_counter() - started
+    if status != 200 or report["failed"]:
+        raise SystemExit(f"import_systems failed: {status} {report}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    db_name = get_setting("DB_NAME", "it_management")
+    if not args.force and "bench" not in db_name and "test" not in db_name:
+        parser.error(f"refusing to write to database {db_name!r}; use a *bench*/*test* database or --force")
+
+    prefix = f"importbench{int(time.time())}"
+    results = []
+    try:
+        results.append(("per-row insert", time_per_row(make_rows(prefix + "a", args.rows))))
+        results.append(("import insert", time_import(make_rows(prefix + "b", args.rows))))
+        results.append(("import update", time_import(make_rows(prefix + "b", args.rows))))
+    finally:
+        cleanup(prefix + "a")
+        cleanup(prefix + "b")
+
+    baseline = results[0][1]
+    print(f"{'mode':<16}{'seconds':>10}{'rows/s':>12}{'speedup':>10}")
+    for mode, seconds in results:
+        print(f"{mode:<16}{seconds:>10.2f}{args.rows / seconds:>12.0f}{baseline / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
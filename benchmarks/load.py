@@ -0,0 +1,243 @@
+# benchmarks/load.py
+#
+# HTTP load driver for a running server (python -m backend.server) over a
+# database filled by benchmarks/seed.py. --clients threads each run one
+# scenario from benchmarks/scenarios.py in a loop on their own keep-alive
+# connection for --warmup + --duration seconds; only requests started after
+# the warm-up count. Reported per request label and in total: requests,
+# requests per second, p50/p95/p99/max latency of the successful requests,
+# and errors (unexpected statuses and connection failures).
+#
+# Every run is also written to --output as JSON with the git commit it ran
+# against and its settings, for benchmarks/compare.py:
+#     python -m benchmarks.load --scenario browse --label before
+#     ... change something, restart the server ...
+#     python -m benchmarks.load --scenario browse --label after
+#     python -m benchmarks.compare benchmarks/results/browse-*-before.json benchmarks/results/browse-*-after.json
+#
+# Pass the same --scale (and --users, --complaints, ...) the database was
+# seeded with, so the ids the scenarios ask for exist.
+#
+# Usage: python -m benchmarks.load [--scenario mixed] [--clients 16] [--duration 30]
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from benchmarks.scenarios import ADMIN_SCENARIOS, SCENARIOS, Session
+from benchmarks.seed import VOLUMES, volumes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results")
+
+
+class Timing:
+    __slots__ = ("code", "error")
+
+    def __init__(self):
+        self.code = None
+        self.error = None
+
+    def status(self, code):
+        self.code = code
+
+    def fail(self, reason):
+        self.error = reason
+
+
+class Recorder:
+    """One client's measurements; merged into the run's after the clients stop."""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = defaultdict(Counter)
+
+    @contextmanager
+    def timed(self, label):
+        timing = Timing()
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            if self.start <= started < self.end:
+                if timing.code is not None:
+                    self.statuses[label][str(timing.code)] += 1
+                if timing.error is not None:
+                    self.errors[label][timing.error] += 1
+                else:
+                    self.latencies[label].append(time.perf_counter() - started)
+
+    def merge(self, other):
+        for label, values in other.latencies.items():
+            self.latencies[label].extend(values)
+        for label, counts in other.statuses.items():
+            self.statuses[label].update(counts)
+        for label, counts in other.errors.items():
+            self.errors[label].update(counts)
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def summarize(latencies, statuses, errors, seconds):
+    ordered = sorted(latencies)
+    error_count = sum(errors.values())
+    return {
+        "requests": len(ordered) + error_count,
+        "rps": round((len(ordered) + error_count) / seconds, 1),
+        "p50_ms": _ms(percentile(ordered, 0.50)),
+        "p95_ms": _ms(percentile(ordered, 0.95)),
+        "p99_ms": _ms(percentile(ordered, 0.99)),
+        "max_ms": _ms(ordered[-1] if ordered else None),
+        "errors": error_count,
+        "error_reasons": dict(errors),
+        "statuses": dict(statuses),
+    }
+
+
+def git_info():
+    def git(*args):
+        try:
+            return subprocess.run(("git",) + args, cwd=ROOT, capture_output=True, text=True,
+                                  timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {
+        "commit": git("rev-parse", "HEAD") or None,
+        "subject": git("log", "-1", "--format=%s") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def run(args, table_volumes):
+    scenario = SCENARIOS[args.scenario]
+    admin = args.scenario in ADMIN_SCENARIOS
+    now = time.perf_counter()
+    start = now + args.warmup
+    end = start + args.duration
+    recorders = []
+    failures = []
+
+    def client(index):
+        rng = random.Random(args.seed * 1000003 + index)
+        recorder = Recorder(start, end)
+        session = Session(args.host, args.port, recorder, table_volumes)
+        # Admin scenarios share the one Admin; the rest log in as different users
+        user_id = 1 if admin else 2 + index % max(1, table_volumes["users"] - 1)
+        if not session.login(user_id, label="client login"):
+            failures.append(user_id)
+            return
+        try:
+            while time.perf_counter() < end:
+                scenario(session, rng)
+        finally:
+            session.close()
+            recorders.append(recorder)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise SystemExit(f"{len(failures)} clients could not log in; is the database seeded "
+                         f"(benchmarks/seed.py) and the server running on {args.host}:{args.port}?")
+
+    total = Recorder(start, end)
+    for recorder in recorders:
+        total.merge(recorder)
+    total.latencies.pop("client login", None)
+    total.statuses.pop("client login", None)
+    total.errors.pop("client login", None)
+
+    labels = sorted(set(total.latencies) | set(total.errors))
+    by_label = {
+        label: summarize(total.latencies[label], total.statuses[label], total.errors[label], args.duration)
+        for label in labels
+    }
+    every = Recorder(start, end)
+    for label in labels:
+        every.latencies["all"].extend(total.latencies[label])
+        every.statuses["all"].update(total.statuses[label])
+        every.errors["all"].update(total.errors[label])
+    overall = summarize(every.latencies["all"], every.statuses["all"], every.errors["all"], args.duration)
+    return overall, by_label
+
+
+def print_report(overall, by_label):
+    print(f"{'request':<22}{'count':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'max ms':>9}{'errors':>8}")
+    for label, row in list(by_label.items()) + [("all", overall)]:
+        cells = [row[key] if row[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{label:<22}{row['requests']:>8}{row['rps']:>9}" + "".join(f"{c:>9}" for c in cells)
+              + f"{row['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds run before measuring")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", type=float, default=1.0, help="as given to benchmarks.seed")
+    for name in VOLUMES:
+        parser.add_argument(f"--{name}", type=int, metavar="N", help="as given to benchmarks.seed")
+    parser.add_argument("--label", default="", help="tag for the result file name")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="directory for the JSON result")
+    args = parser.parse_args()
+
+    table_volumes = volumes(args.scale, {name: getattr(args, name) for name in VOLUMES})
+    started_at = datetime.now(timezone.utc)
+    overall, by_label = run(args, table_volumes)
+    print_report(overall, by_label)
+
+    git = git_info()
+    result = {
+        "scenario": args.scenario,
+        "label": args.label,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "git": git,
+        "config": {
+            "host": args.host, "port": args.port, "clients": args.clients,
+            "duration": args.duration, "warmup": args.warmup, "seed": args.seed,
+            "volumes": table_volumes,
+        },
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "overall": overall,
+        "requests": by_label,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    name = "-".join(part for part in (
+        args.scenario, started_at.strftime("%Y%m%d-%H%M%S"), (git["commit"] or "nogit")[:8], args.label,
+    ) if part)
+    path = os.path.join(args.output, name + ".json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/logger_bench.py
+#
+# Cost on the request thread of one log call, without MySQL or sockets:
+#   disabled    log.debug() below LOG_LEVEL: a level check, nothing built
+#   queued      log.info() with six fields, handed to the writer thread
+#   print       the old style: print() of a formatted line to the same
+#               file, written and flushed before the call returns
+# Lines go to --output (default /dev/null) so the terminal's speed does not
+# count. The queued figure excludes the formatting and writing the
+# background thread does; that thread's throughput is reported separately.
+#
+# Usage: python -m benchmarks.logger_bench [--calls 100000] [--output /dev/null]
+import argparse
+import logging
+import sys
+import time
+
+from backend.utils import logger
+
+
+def per_call(fn, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--output", default="/dev/null")
+    args = parser.parse_args()
+
+    out = open(args.output, "w")
+    sys.stderr = out
+    log = logger.get_logger("bench")
+    logging.getLogger(logger.ROOT_LOGGER).setLevel(logging.INFO)
+    # Big enough that nothing is dropped while the writer catches up
+    logger.background_handler.queue_size = args.calls + 1
+
+    def disabled():
+        log.debug("request", method="GET", path="/systems", status=200, ms=4.2, bytes=5120, user_id=7)
+
+    def queued():
+        log.info("request", method="GET", path="/systems", status=200, ms=4.2, bytes=5120, user_id=7)
+
+    def printed():
+        # flush: stdout to a terminal or a pipe under a supervisor is
+        # written line by line
+        print("[ACCESS] GET /systems 200 4.2ms 5120 bytes user 7", file=out, flush=True)
+
+    disabled_us = per_call(disabled, args.calls)
+    queued_us = per_call(queued, args.calls)
+    started = time.perf_counter()
+    logger.close()
+    drained = time.perf_counter() - started
+    print_us = per_call(printed, args.calls)
+    sys.stderr = sys.__stderr__
+
+    print(f"disabled: {disabled_us:.2f} us")
+    print(f"queued:   {queued_us:.2f} us")
+    print(f"print:    {print_us:.2f} us")
+    print(f"writer:   {args.calls / (queued_us * args.calls / 1e6 + drained):,.0f} lines/s "
+          f"(dropped {logger.stats()['dropped']})")
+
+
+if __name__ == "__main__":
+    main()
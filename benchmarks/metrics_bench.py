@@ -0,0 +1,69 @@
+# benchmarks/metrics_bench.py
+#
+# What recording metrics costs per request, without MySQL or sockets:
+#   observe     one histogram observation (a request's duration, a query)
+#   inc         one labelled counter increment
+#   request     everything the instrument middleware records for a request,
+#               plus one connection checkout, --queries queries (execute and
+#               fetch each) and one JSON encoding: the bookkeeping a typical
+#               list request adds
+# and how long rendering GET /metrics takes once --routes routes have been
+# seen, e.g. 80 routes x 3 status codes.
+#
+# Usage: python -m benchmarks.metrics_bench [--calls 200000] [--queries 2] [--routes 80]
+import argparse
+import time
+
+from backend.utils import metrics
+
+
+def per_call(fn, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=2)
+    parser.add_argument("--routes", type=int, default=80)
+    args = parser.parse_args()
+
+    def observe():
+        metrics.request_duration.observe(0.0042, "/systems", "GET")
+
+    def inc():
+        metrics.requests_total.inc("/systems", "GET", "200")
+
+    def request():
+        metrics.requests_in_flight.inc()
+        metrics.db_connection_wait.observe(0.00002, "main")
+        for _ in range(args.queries):
+            metrics.db_query_duration.observe(0.0011, "execute")
+            metrics.db_query_duration.observe(0.0003, "fetch")
+        metrics.json_encode_duration.observe(0.0004, "response")
+        metrics.requests_in_flight.dec()
+        metrics.request_duration.observe(0.0042, "/systems", "GET")
+        metrics.requests_total.inc("/systems", "GET", "200")
+        metrics.response_bytes.inc("/systems", "GET", amount=5120)
+
+    print(f"observe: {per_call(observe, args.calls):.2f} us")
+    print(f"inc:     {per_call(inc, args.calls):.2f} us")
+    print(f"request: {per_call(request, args.calls):.2f} us "
+          f"({args.queries} queries)")
+
+    for i in range(args.routes):
+        for status in ("200", "304", "404"):
+            metrics.requests_total.inc(f"/resource{i}", "GET", status)
+        metrics.request_duration.observe(0.01, f"/resource{i}", "GET")
+        metrics.response_bytes.inc(f"/resource{i}", "GET", amount=1000)
+    renders = max(1, args.calls // 1000)
+    render_ms = per_call(metrics.registry.render, renders) / 1000
+    size = len(metrics.registry.render().encode())
+    print(f"render:  {render_ms:.2f} ms for {args.routes} routes ({size / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
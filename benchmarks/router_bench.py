@@ -0,0 +1,148 @@
+# benchmarks/router_bench.py
+#
+# Cost of finding the handler for a request as the route table grows,
+# without MySQL or sockets. A synthetic API of --resources resources gets
+# seven routes each (list, create, batch update/delete, get/update/delete
+# by id), i.e. 7 x 50 = 350 routes by default, and is looked up two ways:
+#   chain    the old do_GET style: test each route in registration order
+#            until one matches (== for fixed paths, split() and int() for
+#            "/<resource>/<id>")
+#   router   backend.router's compiled dict + trie
+# for a route near the start of the table, one near the end, an id route,
+# and a path nothing matches. The full middleware chain around a no-op
+# handler is timed too, as the per-request overhead routing adds.
+#
+# Usage: python -m benchmarks.router_bench [--resources 50] [--lookups 200000]
+import argparse
+import logging
+import time
+
+from backend.router import Request, Router
+
+
+def make_routes(resources):
+    """(method, template) pairs in registration order."""
+    routes = []
+    for i in range(resources):
+        name = f"resource{i}"
+        routes += [
+            ("GET", f"/{name}s"), ("POST", f"/{name}s"),
+            ("PUT", f"/{name}s/batch"), ("DELETE", f"/{name}s/batch"),
+            ("GET", f"/{name}/{{id:int}}"), ("PUT", f"/{name}/{{id:int}}"),
+            ("DELETE", f"/{name}/{{id:int}}"),
+        ]
+    return routes
+
+
+def chain_lookup(routes):
+    """A lookup that scans the routes in order, like an if/elif chain."""
+    checks = []
+    for method, template in routes:
+        if "{" in template:
+            prefix = template.split("/")[1]
+            checks.append((method, None, prefix))
+        else:
+            checks.append((method, template, None))
+
+    def lookup(method, path):
+        parts = path.strip("/").split("/")
+        for route_method, fixed, prefix in checks:
+            if route_method != method:
+                continue
+            if fixed is not None:
+                if path == fixed:
+                    return fixed
+            elif len(parts) == 2 and parts[0] == prefix:
+                try:
+                    return prefix, int(parts[1])
+                except ValueError:
+                    return None
+        return None
+    return lookup
+
+
+def build_router(routes, middleware=()):
+    router = Router()
+    for m in middleware:
+        router.use(m)
+    for method, template in routes:
+        router.add(method, template, lambda request: (200, None))
+    return router.compile()
+
+
+class FakeWriter:
+    bytes_written = 0
+
+
+class FakeHandler:
+    def __init__(self, path):
+        self.path = path
+        self.headers = {}
+        self.default_headers = {}
+        self.response_started = False
+        self.response_status = 200
+        self.wfile = FakeWriter()
+        self.client_address = ("127.0.0.1", 0)
+
+    def _send_response(self, response):
+        pass
+
+    def _claims(self):
+        return None
+
+    def _session_token(self):
+        return None
+
+    def _parse_role(self):
+        return "User"
+
+
+def per_call(fn, args, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        fn(*args)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resources", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    routes = make_routes(args.resources)
+    last = args.resources - 1
+    cases = {
+        "first route": ("GET", "/resource0s"),
+        "last route": ("GET", f"/resource{last}s"),
+        "id route": ("DELETE", f"/resource{last}/12345"),
+        "no match": ("GET", "/nowhere/at/all"),
+    }
+    chain = chain_lookup(routes)
+    router = build_router(routes)
+
+    def router_lookup(method, path):
+        try:
+            return router.match(method, path)
+        except Exception:
+            return None
+
+    print(f"{len(routes)} routes")
+    print(f"{'case':<14}{'chain us':>10}{'router us':>11}")
+    for label, case in cases.items():
+        print(f"{label:<14}{per_call(chain, case, args.lookups):>10.2f}"
+              f"{per_call(router_lookup, case, args.lookups):>11.2f}")
+
+    from backend.middleware import DEFAULT_MIDDLEWARE
+    # Timed without the access log, which has its own queue (see logger_bench)
+    logging.getLogger("it_mgmt.access").setLevel(logging.WARNING)
+    routed = build_router(routes, DEFAULT_MIDDLEWARE)
+    handler = FakeHandler(f"/resource{last}s?limit=50")
+    dispatch_us = per_call(routed.dispatch, (handler, "GET"), args.lookups)
+    request_us = per_call(Request, (handler, "GET"), args.lookups)
+    print(f"full dispatch through {len(DEFAULT_MIDDLEWARE)} middleware: {dispatch_us:.2f} us "
+          f"(of which building the Request {request_us:.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/scenarios.py
+#
+# What the simulated clients of benchmarks/load.py do. A scenario is a
+# function run over and over by each client,
+#     scenario(session, rng)
+# where every call is one iteration of a user's work: a few requests made
+# through session.request(), each under a label the results are reported
+# by. Ids and filter values come from `rng`, seeded per client, so a run
+# with the same --seed and volumes asks for the same rows in the same order.
+#
+# The ids assume a database filled by benchmarks/seed.py with the same
+# volumes. mass_edits writes to it: reseed with --truncate before comparing
+# runs that include it.
+import gzip
+import http.client
+import json
+from urllib.parse import urlencode
+
+from benchmarks.seed import BENCH_PASSWORD, COMPLAINT_DEVICES, COMPLAINT_PRIORITIES, COMPLAINT_STATUSES, user_email
+
+PAGE_SIZE = 50
+
+
+class Session:
+    """One simulated client: a keep-alive connection, a login and an ETag cache.
+
+    Conditional GETs are sent the way webapp/js/api-service.js sends them,
+    so a 304 counts as a success.
+    """
+
+    def __init__(self, host, port, recorder, volumes, timeout=60):
+        self.host = host
+        self.port = port
+        self.recorder = recorder
+        self.volumes = volumes
+        self.timeout = timeout
+        self.token = None
+        self._conn = None
+        self._etags = {}
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, label, method, path, body=None, ok=(200,)):
+        """Make one timed request; the decoded JSON body, or None on failure or 304."""
+        headers = {"Accept-Encoding": "gzip"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        cached = self._etags.get(path) if method == "GET" else None
+        if cached:
+            headers["If-None-Match"] = cached
+
+        with self.recorder.timed(label) as timing:
+            try:
+                conn = self._connection()
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                raw = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                timing.fail(type(e).__name__)
+                return None
+            if response.will_close:
+                self.close()
+            timing.status(response.status)
+            if response.status == 304 and cached:
+                return None
+            if response.status not in ok:
+                timing.fail(str(response.status))
+                return None
+
+        etag = response.getheader("ETag")
+        if method == "GET" and etag:
+            self._etags[path] = etag
+        if not raw or not response.getheader("Content-Type", "").startswith("application/json"):
+            return None
+        if response.getheader("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        return json.loads(raw)
+
+    def get(self, label, path, **query):
+        if query:
+            path += "?" + urlencode(query)
+        return self.request(label, "GET", path)
+
+    def login(self, user_id, label="login"):
+        data = self.request(label, "POST", "/login", {
+            "email": user_email(user_id), "password": BENCH_PASSWORD,
+        })
+        self.token = data.get("token") if data else None
+        return self.token is not None
+
+    def random_id(self, rng, table):
+        return rng.randint(1, self.volumes[table])
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def dashboard(session, rng):
+    """The landing page: stats, and the newest open complaints and log entries."""
+    session.get("stats", "/stats")
+    session.get("complaints open", "/complaints", status="Open", limit=10)
+    session.get("logs recent", "/logs", limit=10)
+
+
+def browse(session, rng):
+    """Paging through a filtered list, then opening a few of its rows."""
+    kind = rng.choice(("systems", "complaints", "peripherals", "search"))
+    if kind == "search":
+        device = _weighted(rng, COMPLAINT_DEVICES)
+        session.get("complaints search", "/complaints/search", q=device, limit=PAGE_SIZE)
+        return
+
+    query = {"limit": PAGE_SIZE}
+    if kind == "systems" and rng.random() < 0.5:
+        query["network_id"] = session.random_id(rng, "networks")
+    elif kind == "complaints" and rng.random() < 0.5:
+        query["status"] = _weighted(rng, COMPLAINT_STATUSES)
+    rows = []
+    for page in range(rng.randint(1, 3)):
+        data = session.get(f"{kind} page", f"/{kind}", **query)
+        if not data:
+            break
+        rows.extend(data.get(kind) or [])
+        if not data.get("next_cursor"):
+            break
+        query["cursor"] = data["next_cursor"]
+
+    singular = kind[:-1]
+    for row in rng.sample(rows, min(3, len(rows))):
+        session.get(f"{singular} by id", f"/{singular}/{row[f'{singular}_id']}")
+
+
+def mass_edits(session, rng):
+    """An Admin's triage: a batch reprioritisation and a couple of single edits."""
+    ids = sorted({session.random_id(rng, "complaints") for _ in range(rng.randint(10, 100))})
+    session.request("complaints batch", "PUT", "/complaints/batch", {
+        "ids": ids, "patch": {"priority": _weighted(rng, COMPLAINT_PRIORITIES)},
+    })
+    for _ in range(2):
+        complaint_id = session.random_id(rng, "complaints")
+        session.request("complaint update", "PUT", f"/complaint/{complaint_id}", {
+            "status": _weighted(rng, COMPLAINT_STATUSES),
+        })
+    system_ids = sorted({session.random_id(rng, "systems") for _ in range(20)})
+    session.request("systems batch", "PUT", "/systems/batch", {
+        "ids": system_ids, "patch": {"antivirus_status": rng.choice(("Installed", "Not Installed"))},
+    })
+
+
+def pdf_exports(session, rng):
+    """One of the synchronous PDF reports, read to the end."""
+    report = rng.choice(("systems", "complaints", "logs"))
+    session.get(f"export {report}", f"/export-{report}")
+
+
+def login_storm(session, rng):
+    """A fresh login for a random user every iteration, as after a restart or at 9am."""
+    token = session.token
+    session.close()
+    session.login(rng.randint(2, session.volumes["users"]))
+    # Throw the new session away; the client carries on as itself
+    session.token = token
+
+
+def mixed(session, rng):
+    """Roughly a working day's traffic."""
+    _weighted(rng, ((dashboard, 40), (browse, 45), (mass_edits, 5), (login_storm, 8), (pdf_exports, 2)))(
+        session, rng
+    )
+
+
+SCENARIOS = {
+    "dashboard": dashboard,
+    "browse": browse,
+    "mass_edits": mass_edits,
+    "pdf_exports": pdf_exports,
+    "login_storm": login_storm,
+    "mixed": mixed,
+}
+
+# Scenarios with Admin-only routes; their clients log in as admin@bench.local
+ADMIN_SCENARIOS = {"mass_edits", "pdf_exports", "mixed"}
@@ -0,0 +1,62 @@
+# benchmarks/search_bench.py
+#
+# Latency of GET /complaints/search against a seeded database, for a mix of
+# queries: a common word, a rare one, a multi-word query, the same with
+# status/priority filters, and the second page of each. Each query runs
+# --repeat times through search_complaints(), i.e. including snippet
+# building and JSON-ready rows, and p50/p95 are reported in milliseconds.
+#
+# Seed a million complaints first:
+#   IT_MGMT_DB_NAME=it_management_bench python -m benchmarks.seed --scale 10 --truncate
+#   IT_MGMT_DB_NAME=it_management_bench python -m benchmarks.search_bench
+import argparse
+import statistics
+import time
+from urllib.parse import urlencode
+
+from backend.routes.complaint import search_complaints
+
+QUERIES = (
+    {"q": "printer"},
+    {"q": "toner"},
+    {"q": "vpn keeps disconnecting"},
+    {"q": "laptop docking station", "status": "Open"},
+    {"q": "printer", "status": "Open", "priority": "High"},
+)
+
+
+def _time(params, repeat):
+    timings = []
+    next_cursor = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        status, response = search_complaints(urlencode(params))
+        timings.append(time.perf_counter() - started)
+        if status != 200:
+            raise SystemExit(f"search failed for {params}: {status} {response}")
+        next_cursor = response["next_cursor"]
+    timings.sort()
+    return timings, next_cursor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'query':<60}{'p50 ms':>10}{'p95 ms':>10}")
+    for query in QUERIES:
+        params = dict(query, limit=args.limit)
+        timings, next_cursor = _time(params, args.repeat)
+        results = [("", timings)]
+        if next_cursor:
+            results.append((" (page 2)", _time(dict(params, cursor=next_cursor), args.repeat)[0]))
+        for suffix, timings in results:
+            label = urlencode(query) + suffix
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            print(f"{label:<60}{statistics.median(timings) * 1000:>10.1f}{p95 * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
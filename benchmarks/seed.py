@@ -0,0 +1,228 @@
+# benchmarks/seed.py
+#
+# Fills the configured MySQL database with production-sized data for
+# query-plan and load benchmarks. Distributions follow what a real install
+# accumulates: most complaints closed, a long tail of heavy reporters,
+# systems spread unevenly across departments, and timestamps spread over
+# the last two years (logs over the last year), counted back from midnight
+# so that the same --seed gives the same rows on any day it runs.
+#
+# Every user's password is BENCH_PASSWORD; user 1 is an Admin,
+# admin@bench.local, and the rest are userN@bench.local. The load driver
+# (benchmarks/load.py) logs in with these.
+#
+# --scale multiplies every volume; --users, --complaints, ... set one table's
+# row count outright.
+#
+# Refuses to touch a database whose name does not contain "bench" or
+# "test" unless --force is given; --truncate empties the tables first.
+#
+# Usage: IT_MGMT_DB_NAME=it_management_bench python -m benchmarks.seed [--scale 1.0] [--logs 2000000]
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from backend.config import get_setting
+from backend.db.connection import db_connection
+from backend.utils.security import hash_password
+
+BATCH_SIZE = 1000
+
+BENCH_PASSWORD = "bench-password"
+ADMIN_EMAIL = "admin@bench.local"
+
+VOLUMES = {
+    "departments": 25,
+    "networks": 40,
+    "users": 5000,
+    "systems": 20000,
+    "peripherals": 10000,
+    "complaints": 100000,
+    "logs": 500000,
+}
+
+COMPLAINT_STATUSES = (("Closed", 60), ("Resolved", 20), ("Open", 12), ("In Progress", 8))
+COMPLAINT_PRIORITIES = (("Low", 30), ("Medium", 45), ("High", 20), ("Critical", 5))
+PERIPHERAL_TYPES = (("Printer", 45), ("UPS", 25), ("Switch", 15), ("Router", 5), ("Other", 10))
+LOG_ACTIONS = ("Added", "Updated", "Deleted", "Exported")
+RESOURCE_TYPES = ("system", "peripheral", "complaint")
+
+# Complaint text for search benchmarks: a few common problems and many rare
+# details, so term frequencies look like a real helpdesk's
+COMPLAINT_DEVICES = (("printer", 25), ("laptop", 20), ("monitor", 10), ("keyboard", 8),
+                     ("network", 15), ("email", 12), ("vpn", 6), ("scanner", 4))
+COMPLAINT_PROBLEMS = ("not working", "very slow", "keeps disconnecting", "shows an error",
+                      "will not start", "makes a noise", "needs replacing", "is missing")
+COMPLAINT_DETAILS = ("since the update", "after the power cut", "in the meeting room",
+                     "on the third floor", "every morning", "when printing duplex",
+                     "with the docking station", "during video calls", "after login",
+                     "since moving desks", "with the new toner", "on battery power")
+
+
+def _weighted(choices):
+    values, weights = zip(*choices)
+    return random.choices(values, weights)[0]
+
+
+def _skewed_id(count):
+    # Pareto-ish: a handful of ids get most of the rows
+    return min(int(random.paretovariate(1.1)), count)
+
+
+# Timestamps count back from here; see seed()
+_anchor = datetime.now()
+
+
+def _recent(days):
+    return _anchor - timedelta(seconds=random.randint(0, days * 86400))
+
+
+def user_email(user_id):
+    return ADMIN_EMAIL if user_id == 1 else f"user{user_id}@bench.local"
+
+
+def volumes(scale=1.0, overrides=None):
+    """Row counts per table: VOLUMES times `scale`, then any explicit counts."""
+    counts = {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+    counts.update({name: count for name, count in (overrides or {}).items() if count is not None})
+    return counts
+
+
+def _insert(cursor, conn, sql, rows):
+    batch = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            conn.commit()
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        conn.commit()
+        total += len(batch)
+    return total
+
+
+def _complaint_text(i):
+    device = _weighted(COMPLAINT_DEVICES)
+    problem = random.choice(COMPLAINT_PROBLEMS)
+    details = random.sample(COMPLAINT_DETAILS, 2)
+    subject = f"{device.capitalize()} {problem}"
+    description = (f"My {device} {problem} {details[0]}. It also happens {details[1]}. "
+                   f"Asset tag AT{random.randint(1, 999999):06d}, ticket {i}.")
+    return subject, description
+
+
+def seed(conn, volumes):
+    global _anchor
+    _anchor = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    # One PBKDF2 hash shared by every user, salted from the seeded generator
+    password_hash = hash_password(BENCH_PASSWORD, salt=random.randbytes(16))
+    cursor = conn.cursor()
+    counts = {}
+
+    counts["departments"] = _insert(cursor, conn, "INSERT INTO department (name) VALUES (%s)", (
+        (f"Department {i}",) for i in range(1, volumes["departments"] + 1)
+    ))
+    counts["networks"] = _insert(cursor, conn, "INSERT INTO network (name, subnet, vlan_id) VALUES (%s, %s, %s)", (
+        (f"Network {i}", f"10.{i // 256}.{i % 256}.0/24", str(100 + i))
+        for i in range(1, volumes["networks"] + 1)
+    ))
+    counts["users"] = _insert(cursor, conn, """
+        INSERT INTO user (full_name, email, password_hash, role, department_id, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, (
+        ("Bench Admin" if i == 1 else f"User {i}", user_email(i), password_hash,
+         "Admin" if i == 1 else _weighted((("User", 90), ("IT_Personnel", 8), ("Admin", 2))),
+         _skewed_id(volumes["departments"]), _recent(730))
+        for i in range(1, volumes["users"] + 1)
+    ))
+    counts["systems"] = _insert(cursor, conn, """
+        INSERT INTO `system` (hostname, os_name, os_version, ram_size_gb, cpu_model, storage_size_gb,
+                              ip_address, mac_address, antivirus_status, user_id, network_id, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (
+        (f"host-{i:06d}", random.choice(("Windows", "Ubuntu", "macOS")), "1.0",
+         random.choice((8, 16, 32)), "Bench CPU", random.choice((256, 512, 1024)),
+         f"10.{i // 65536}.{i // 256 % 256}.{i % 256}", f"02:00:{i:08x}",
+         _weighted((("Installed", 80), ("Not Installed", 10), ("Unknown", 10))),
+         random.randint(1, volumes["users"]), random.randint(1, volumes["networks"]), _recent(730))
+        for i in range(1, volumes["systems"] + 1)
+    ))
+    counts["peripherals"] = _insert(cursor, conn, """
+        INSERT INTO peripheral (type, model, serial_number, assigned_to_system_id, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (
+        (_weighted(PERIPHERAL_TYPES), "Bench Model", f"SN{i:08d}",
+         random.randint(1, volumes["systems"]) if random.random() < 0.8 else None, _recent(730))
+        for i in range(1, volumes["peripherals"] + 1)
+    ))
+    counts["complaints"] = _insert(cursor, conn, """
+        INSERT INTO complaint (user_id, subject, description, status, priority, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, (
+        (_skewed_id(volumes["users"]), *_complaint_text(i),
+         _weighted(COMPLAINT_STATUSES), _weighted(COMPLAINT_PRIORITIES), _recent(730))
+        for i in range(1, volumes["complaints"] + 1)
+    ))
+    counts["logs"] = _insert(cursor, conn, """
+        INSERT INTO log_entry (user_id, action, resource_type, resource_id, context, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, (
+        (random.randint(1, volumes["users"]), random.choice(LOG_ACTIONS),
+         random.choice(RESOURCE_TYPES), random.randint(1, volumes["systems"]), "seed", _recent(365))
+        for _ in range(volumes["logs"])
+    ))
+
+    # Fresh statistics so EXPLAIN sees the real cardinalities
+    for table in ("department", "network", "user", "`system`", "peripheral", "complaint", "log_entry"):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+    return counts
+
+
+def truncate(conn):
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in ("log_entry", "complaint", "peripheral", "`system`", "user", "network", "department"):
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every volume")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true")
+    parser.add_argument("--force", action="store_true")
+    for name in VOLUMES:
+        parser.add_argument(f"--{name}", type=int, metavar="N", help=f"{name} rows (default {VOLUMES[name]} x scale)")
+    args = parser.parse_args()
+
+    db_name = get_setting("DB_NAME", "it_management")
+    if not args.force and "bench" not in db_name and "test" not in db_name:
+        parser.error(f"refusing to seed database {db_name!r}; use a *bench*/*test* database or --force")
+
+    random.seed(args.seed)
+    table_volumes = volumes(args.scale, {name: getattr(args, name) for name in VOLUMES})
+
+    with db_connection() as conn:
+        if not conn:
+            raise SystemExit("Database connection failed")
+        if args.truncate:
+            truncate(conn)
+        started = time.perf_counter()
+        counts = seed(conn, table_volumes)
+
+    for name, count in counts.items():
+        print(f"{name:<12} {count:>9}")
+    print(f"seeded {db_name} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/serving_bench.py
+#
+# Compares the serving modes in backend/serving.py without needing MySQL.
+# A synthetic handler stands in for the real routes:
+#   /fast  - tiny JSON response (static lookups, small lists)
+#   /io    - sleeps 50 ms (a MySQL round trip, a PDF flushed to the socket)
+#   /cpu   - one PBKDF2 verification, the same cost as /login
+#
+# With --keep-alive each client reuses one connection, as a browser does;
+# only the async mode keeps it open (the others close after every response,
+# so their clients reconnect anyway). --idle holds that many extra
+# connections open without sending anything, like idle browser tabs.
+#
+# Usage: python -m benchmarks.serving_bench [--clients 32] [--seconds 5] [--keep-alive] [--idle 0]
+import argparse
+import hashlib
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+from backend.async_serving import AsyncHTTPServer
+from backend.serving import SERVING_MODES, make_server, serve_prefork
+
+PORT = 8765
+
+
+class SyntheticHandler(BaseHTTPRequestHandler):
+    # Like MyHandler: HTTP/1.1, closing after every response unless the
+    # async front end keeps the connection
+    protocol_version = "HTTP/1.1"
+    keep_alive = False
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/io":
+            time.sleep(0.05)
+        elif self.path == "/cpu":
+            hashlib.pbkdf2_hmac("sha256", b"password", b"0123456789abcdef", 100000)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        if not self.keep_alive:
+            self.send_header("Connection", "close")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(mode, threads, queue_depth, processes):
+    if mode == "async":
+        AsyncHTTPServer(SyntheticHandler, "127.0.0.1", PORT, max_workers=threads,
+                        queue_depth=queue_depth).serve_forever()
+        return
+    if mode == "prefork":
+        serve_prefork(SyntheticHandler, "127.0.0.1", PORT, processes=processes,
+                      max_workers=threads, queue_depth=queue_depth)
+        return
+    httpd = make_server(SyntheticHandler, "127.0.0.1", PORT, mode=mode,
+                        max_workers=threads, queue_depth=queue_depth)
+    signal.signal(signal.SIGTERM, lambda *a: threading.Thread(target=httpd.shutdown).start())
+    httpd.serve_forever()
+    httpd.server_close()
+
+
+def _drive(path, clients, seconds, keep_alive=False):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client():
+        nonlocal errors
+        local = []
+        local_errors = 0
+        conn = None
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                if not keep_alive or resp.will_close:
+                    conn.close()
+                    conn = None
+                if resp.status != 200:
+                    local_errors += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn = None
+                continue
+            local.append(time.perf_counter() - start)
+        if conn is not None:
+            conn.close()
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    workers = [threading.Thread(target=client) for _ in range(clients)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    latencies.sort()
+    if not latencies:
+        return {"rps": 0.0, "p50_ms": None, "p95_ms": None, "errors": errors}
+    return {
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--queue-depth", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--keep-alive", action="store_true")
+    parser.add_argument("--idle", type=int, default=0, help="idle connections held open")
+    parser.add_argument("--modes", default=",".join(SERVING_MODES))
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes.split(","):
+        threads = max(1, args.threads // args.processes) if mode == "prefork" else args.threads
+        server = multiprocessing.Process(
+            target=_serve, args=(mode, threads, args.queue_depth, args.processes)
+        )
+        server.start()
+        time.sleep(0.5)
+        idle = []
+        try:
+            for _ in range(args.idle):
+                try:
+                    idle.append(socket.create_connection(("127.0.0.1", PORT), timeout=1))
+                except OSError:
+                    break
+            results[mode] = {
+                path: _drive(path, args.clients, args.seconds, args.keep_alive)
+                for path in ("/fast", "/io", "/cpu")
+            }
+        finally:
+            for sock in idle:
+                sock.close()
+            os.kill(server.pid, signal.SIGTERM)
+            server.join()
+        print(mode, json.dumps(results[mode]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
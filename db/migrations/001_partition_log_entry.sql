@@ -0,0 +1,28 @@
+-- db/migrations/001_partition_log_entry.sql
+--
+-- Convert an existing log_entry table to the monthly partitioned layout in
+-- db/schema.sql. ALTER ... PARTITION BY rebuilds the table, so run it in a
+-- maintenance window; afterwards `python -m backend.db.log_partitions`
+-- adds upcoming months and archives expired ones.
+USE it_management;
+
+-- Partitioned tables cannot have foreign keys. The constraint name is the
+-- one MySQL generated for the unnamed FOREIGN KEY in the old schema; check
+-- SHOW CREATE TABLE log_entry if yours differs.
+ALTER TABLE `log_entry` DROP FOREIGN KEY log_entry_ibfk_1;
+
+UPDATE `log_entry` SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+
+ALTER TABLE `log_entry`
+    MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (log_id, created_at);
+
+ALTER TABLE `log_entry`
+PARTITION BY RANGE COLUMNS (created_at) (
+    PARTITION p_history VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611 VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
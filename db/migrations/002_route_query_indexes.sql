@@ -0,0 +1,16 @@
+-- db/migrations/002_route_query_indexes.sql
+--
+-- Composite indexes for filtered list pages, as proposed by
+-- benchmarks/explain_audit.py. Brings an existing database in line with
+-- db/schema.sql.
+USE it_management;
+
+ALTER TABLE `complaint`
+    DROP INDEX idx_complaint_status_priority,
+    ADD INDEX idx_complaint_status_priority (status, priority, created_at),
+    ADD INDEX idx_complaint_user_created (user_id, created_at),
+    ADD INDEX idx_complaint_status_created (status, created_at),
+    ADD INDEX idx_complaint_priority_created (priority, created_at);
+
+ALTER TABLE `system`
+    ADD INDEX idx_system_network_created (network_id, created_at);
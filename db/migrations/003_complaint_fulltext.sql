@@ -0,0 +1,10 @@
+-- db/migrations/003_complaint_fulltext.sql
+--
+-- Full-text index behind GET /complaints/search. Brings an existing
+-- database in line with db/schema.sql. The first FULLTEXT index on a table
+-- rebuilds it, and writes to complaint wait until that finishes (reads do
+-- not), so run it in a maintenance window.
+USE it_management;
+
+ALTER TABLE `complaint`
+    ADD FULLTEXT INDEX ft_complaint_text (subject, description);
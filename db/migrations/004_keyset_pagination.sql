@@ -0,0 +1,30 @@
+-- db/migrations/004_keyset_pagination.sql
+--
+-- Keyset pagination (backend/utils/pagination.py) pages on (created_at, id),
+-- and `created_at < ?` never matches NULL, so rows without a creation time
+-- were skipped and broke the next-page cursor; without a (created_at, id)
+-- index every list page is a filesort. Brings an existing database in line
+-- with db/schema.sql, including idx_peripheral_type for the /stats
+-- peripherals-by-type count. Run after 001, which rebuilds log_entry.
+USE it_management;
+
+-- Unknown creation times sort oldest, where ORDER BY ... DESC already put NULLs
+UPDATE `system` SET created_at = '1970-01-01 00:00:01' WHERE created_at IS NULL;
+UPDATE `peripheral` SET created_at = '1970-01-01 00:00:01' WHERE created_at IS NULL;
+UPDATE `complaint` SET created_at = '1970-01-01 00:00:01' WHERE created_at IS NULL;
+
+ALTER TABLE `system`
+    MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD INDEX idx_system_created (created_at, system_id);
+
+ALTER TABLE `peripheral`
+    MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD INDEX idx_peripheral_created (created_at, peripheral_id),
+    ADD INDEX idx_peripheral_type (type);
+
+ALTER TABLE `complaint`
+    MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD INDEX idx_complaint_created (created_at, complaint_id);
+
+ALTER TABLE `log_entry`
+    ADD INDEX idx_log_created (created_at, log_id);
@@ -2,6 +2,9 @@
 // Handles all API requests with consistent error handling and response formatting
 
 const ApiService = {
+    // Validators for earlier GET responses: url -> { etag, data }
+    etagCache: new Map(),
+    
     /**
      * Make a fetch request with standardized error handling
      * @param {string} endpoint - API endpoint
@@ -18,8 +21,7 @@ const ApiService = {
             
             // Add auth headers if user is logged in
             if (Auth && Auth.isLoggedIn()) {
-                headers['X-User-ID'] = Auth.currentUser.id;
-                headers['X-User-Role'] = Auth.currentUser.role;
+                headers['Authorization'] = `Bearer ${Auth.token}`;
             }
             
             // Prepare URL
@@ -27,6 +29,13 @@ const ApiService = {
                 ? endpoint 
                 : `${CONFIG.API_URL}${endpoint.startsWith('/') ? '' : '/'}${endpoint}`;
             
+            // Revalidate a cached GET instead of downloading it again
+            const isGet = !options.method || options.method === 'GET';
+            const cached = isGet ? this.etagCache.get(url) : null;
+            if (cached) {
+                headers['If-None-Match'] = cached.etag;
+            }
+            
             console.log(`API Request: ${options.method || 'GET'} ${url}`);
             
             // Set up request timeout
@@ -56,6 +65,17 @@ const ApiService = {
                 return null;
             }
             
+            // Unchanged since the cached copy: reuse it
+            if (response.status === 304 && cached) {
+                return {
+                    ok: true,
+                    status: 200,
+                    data: cached.data,
+                    response,
+                    notModified: true
+                };
+            }
+            
             // Parse response
             let data;
             const contentType = response.headers.get('content-type');
@@ -67,6 +87,13 @@ const ApiService = {
             
             console.log(`API Response (${response.status}):`, data);
             
+            const etag = response.headers.get('ETag');
+            if (isGet && response.ok && etag) {
+                this.etagCache.set(url, { etag, data });
+            } else if (isGet) {
+                this.etagCache.delete(url);
+            }
+            
             // Return standardized response
             return {
                 ok: response.ok,
@@ -346,6 +373,35 @@ const ApiService = {
          */
         getLogsReportUrl() {
             return `${CONFIG.API_URL}/export-logs`;
+        },
+        
+        /**
+         * Queue a background export job
+         * @param {string} report - complaints, systems, logs or peripherals
+         * @param {Object} filters - Filter parameters
+         * @returns {Promise<Object>} - Job status
+         */
+        async startExport(report, filters = {}) {
+            return ApiService.post('/exports', { report, filters });
+        },
+        
+        /**
+         * Poll an export job
+         * @param {string} jobId - Job ID
+         * @returns {Promise<Object>} - Job status
+         */
+        async getExport(jobId) {
+            return ApiService.get(`/exports/${jobId}`);
+        },
+        
+        /**
+         * Download URL of a finished export (the session token passed as a query parameter)
+         * @param {string} jobId - Job ID
+         * @returns {string} - File URL
+         */
+        getExportFileUrl(jobId) {
+            const params = new URLSearchParams({ token: Auth.token });
+            return `${CONFIG.API_URL}/exports/${jobId}/file?${params.toString()}`;
         }
     }
 };
\ No newline at end of file
@@ -9,17 +9,22 @@ const Auth = {
         role: null
     },
     
+    // Signed session token from /login, sent as "Authorization: Bearer"
+    token: null,
+    
     // Initialize authentication state from local storage
     init() {
         this.currentUser.id = localStorage.getItem(CONFIG.STORAGE_KEYS.USER_ID);
         this.currentUser.name = localStorage.getItem(CONFIG.STORAGE_KEYS.USER_NAME);
         this.currentUser.email = localStorage.getItem(CONFIG.STORAGE_KEYS.USER_EMAIL);
         this.currentUser.role = localStorage.getItem(CONFIG.STORAGE_KEYS.USER_ROLE);
+        this.token = localStorage.getItem(CONFIG.STORAGE_KEYS.TOKEN);
         
         console.log('Auth initialized with role:', this.currentUser.role);
         
-        // Redirect to login page if not logged in
-        if (!this.currentUser.id) {
+        // Redirect to login page if not logged in (sessions from before
+        // tokens were issued have none and must log in again)
+        if (!this.isLoggedIn()) {
             window.location.href = 'login.html';
             return;
         }
@@ -69,16 +74,18 @@ const Auth = {
             
             if (response.ok) {
                 // Store user information
-                this.currentUser.id = data.user_id;
-                this.currentUser.name = data.full_name;
-                this.currentUser.email = data.email;
-                this.currentUser.role = data.role;
+                this.currentUser.id = data.user.id;
+                this.currentUser.name = data.user.name;
+                this.currentUser.email = data.user.email;
+                this.currentUser.role = data.user.role;
+                this.token = data.token;
                 
                 // Save to local storage
-                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_ID, data.user_id);
-                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_NAME, data.full_name);
-                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_EMAIL, data.email);
-                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_ROLE, data.role);
+                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_ID, data.user.id);
+                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_NAME, data.user.name);
+                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_EMAIL, data.user.email);
+                localStorage.setItem(CONFIG.STORAGE_KEYS.USER_ROLE, data.user.role);
+                localStorage.setItem(CONFIG.STORAGE_KEYS.TOKEN, data.token);
                 
                 this.updateUI();
                 UI.showToast('Login successful!', 'success');
@@ -96,17 +103,28 @@ const Auth = {
     
     // Log out the current user
     logout(redirect = true) {
+        // Revoke the token server-side; best effort, the local session ends regardless
+        if (this.token) {
+            fetch(`${CONFIG.API_URL}/logout`, {
+                method: 'POST',
+                headers: { 'Authorization': `Bearer ${this.token}` },
+                keepalive: true
+            }).catch(error => console.error('Logout error:', error));
+        }
+        
         // Clear user information
         this.currentUser.id = null;
         this.currentUser.name = null;
         this.currentUser.email = null;
         this.currentUser.role = null;
+        this.token = null;
         
         // Clear local storage
         localStorage.removeItem(CONFIG.STORAGE_KEYS.USER_ID);
         localStorage.removeItem(CONFIG.STORAGE_KEYS.USER_NAME);
         localStorage.removeItem(CONFIG.STORAGE_KEYS.USER_EMAIL);
         localStorage.removeItem(CONFIG.STORAGE_KEYS.USER_ROLE);
+        localStorage.removeItem(CONFIG.STORAGE_KEYS.TOKEN);
         
         if (redirect) {
             UI.showToast('You have been logged out.', 'success');
@@ -120,7 +138,7 @@ const Auth = {
     
     // Check if a user is logged in
     isLoggedIn() {
-        return this.currentUser.id !== null;
+        return this.currentUser.id !== null && this.token !== null;
     },
     
     // Check if the current user has a specific role
@@ -174,10 +192,7 @@ const Auth = {
         };
         
         if (this.isLoggedIn()) {
-            headers['X-User-ID'] = this.currentUser.id;
-            headers['X-User-Role'] = this.currentUser.role;
-            
-            console.log('Using auth headers:', headers);
+            headers['Authorization'] = `Bearer ${this.token}`;
         }
         
         return headers;
@@ -1,6 +1,9 @@
 // Complaints Module
 
 const Complaints = {
+    // Cursor for the next page of complaints (null once everything is loaded)
+    nextCursor: null,
+    
     // Initialize complaints module
     init() {
         this.setupEventListeners();
@@ -13,6 +16,7 @@ const Complaints = {
         const complaintForm = document.getElementById('complaintForm');
         const statusFilter = document.getElementById('statusFilter');
         const priorityFilter = document.getElementById('priorityFilter');
+        const complaintSearch = document.getElementById('complaintSearch');
         
         // Add complaint button
         addComplaintBtn.addEventListener('click', () => {
@@ -33,10 +37,17 @@ const Complaints = {
         priorityFilter.addEventListener('change', () => {
             this.loadComplaints();
         });
+        
+        // Search as the user types, once they pause
+        let searchTimer = null;
+        complaintSearch.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => this.loadComplaints(), CONFIG.SEARCH_DEBOUNCE);
+        });
     },
     
-    // Load complaints from API
-    async loadComplaints() {
+    // Load complaints from API (append=true fetches the next page)
+    async loadComplaints(append = false) {
         if (!Auth.isLoggedIn()) {
             return;
         }
@@ -44,16 +55,23 @@ const Complaints = {
         try {
             // Show loading state
             const tableBody = document.querySelector('#complaintsTable tbody');
-            tableBody.innerHTML = '<tr><td colspan="6" class="text-center">Loading complaints...</td></tr>';
+            if (!append) {
+                tableBody.innerHTML = '<tr><td colspan="6" class="text-center">Loading complaints...</td></tr>';
+            }
             
             // Get filter values
             const statusFilter = document.getElementById('statusFilter').value;
             const priorityFilter = document.getElementById('priorityFilter').value;
+            const searchText = document.getElementById('complaintSearch').value.trim();
             
             // Build query string
             let queryString = '';
+            if (searchText) {
+                queryString += `q=${encodeURIComponent(searchText)}`;
+            }
             if (statusFilter) {
-                queryString += `status=${statusFilter}`;
+                if (queryString) queryString += '&';
+                queryString += `status=${encodeURIComponent(statusFilter)}`;
             }
             
             if (priorityFilter) {
@@ -68,23 +86,32 @@ const Complaints = {
                 queryString += `user_id=${Auth.currentUser.id}`;
             }
             
+            // Page through results instead of downloading the whole table
+            if (queryString) queryString += '&';
+            queryString += `limit=${CONFIG.PAGINATION.API_PAGE_SIZE}`;
+            if (append && this.nextCursor) {
+                queryString += `&cursor=${encodeURIComponent(this.nextCursor)}`;
+            }
+            
             console.log('Loading complaints with query:', queryString);
             
-            // Fetch complaints
-            const url = `${CONFIG.API_URL}/complaints${queryString ? '?' + queryString : ''}`;
+            // Fetch complaints (ranked by relevance when searching)
+            const endpoint = searchText ? '/complaints/search' : '/complaints';
+            const url = `${CONFIG.API_URL}${endpoint}${queryString ? '?' + queryString : ''}`;
             console.log('Fetching complaints from URL:', url);
             
-            const response = await fetch(url, {
-                headers: Auth.getHeaders()
-            });
+            const result = await ApiService.fetch(url);
+            if (!result) return;
             
-            const data = await response.json();
+            const data = result.data;
             console.log('Complaints response:', data);
             
-            if (response.ok) {
+            if (result.ok) {
                 // Handle empty or undefined complaints array
                 const complaints = data.complaints || [];
-                this.renderComplaints(complaints);
+                this.nextCursor = data.next_cursor || null;
+                this.renderComplaints(complaints, append);
+                UI.setLoadMore(document.getElementById('complaintsTable'), this.nextCursor, () => this.loadComplaints(true));
             } else {
                 UI.showToast(data.error || 'Failed to load complaints', 'error');
                 
@@ -101,12 +128,14 @@ const Complaints = {
         }
     },
     
-    // Render complaints table
-    renderComplaints(complaints) {
+    // Render complaints table (append=true adds rows below the current page)
+    renderComplaints(complaints, append = false) {
         const tableBody = document.querySelector('#complaintsTable tbody');
-        tableBody.innerHTML = '';
+        if (!append) {
+            tableBody.innerHTML = '';
+        }
         
-        if (complaints.length === 0) {
+        if (complaints.length === 0 && !append) {
             const row = document.createElement('tr');
             const cell = document.createElement('td');
             cell.colSpan = 6;
@@ -120,9 +149,18 @@ const Complaints = {
         complaints.forEach(complaint => {
             const row = document.createElement('tr');
             
-            // Subject
+            // Subject (search hits come with the matched words marked;
+            // the server HTML-escapes everything else)
             const subjectCell = document.createElement('td');
-            subjectCell.textContent = complaint.subject;
+            if (complaint.highlight) {
+                subjectCell.innerHTML = complaint.highlight.subject;
+                const snippet = document.createElement('span');
+                snippet.className = 'search-snippet';
+                snippet.innerHTML = complaint.highlight.description;
+                subjectCell.appendChild(snippet);
+            } else {
+                subjectCell.textContent = complaint.subject;
+            }
             row.appendChild(subjectCell);
             
             // Status
@@ -18,23 +18,33 @@ const CONFIG = {
     // API endpoint (change this to match your backend server)
     API_URL: getServerUrl(),
     
+    // Milliseconds to wait after typing before searching complaints
+    SEARCH_DEBOUNCE: 300,
+    
     // Local storage keys with namespace to avoid conflicts
     STORAGE_KEYS: {
         USER_ID: 'it_mgmt_user_id',
         USER_NAME: 'it_mgmt_user_name',
         USER_ROLE: 'it_mgmt_user_role',
-        USER_EMAIL: 'it_mgmt_user_email'
+        USER_EMAIL: 'it_mgmt_user_email',
+        TOKEN: 'it_mgmt_token'
     },
     
     // Default pagination settings
     PAGINATION: {
         ITEMS_PER_PAGE: 10,
-        PAGE_SIZES: [5, 10, 25, 50]
+        PAGE_SIZES: [5, 10, 25, 50],
+        
+        // Rows requested per page from cursor-paged list endpoints
+        API_PAGE_SIZE: 50
     },
     
     // Toast notification duration (in milliseconds)
     TOAST_DURATION: 3000,
     
+    // How often to poll a background export job (in milliseconds)
+    EXPORT_POLL_INTERVAL: 1000,
+    
     // Request timeout (in milliseconds)
     REQUEST_TIMEOUT: 30000
 };
\ No newline at end of file
@@ -79,6 +79,7 @@ function setupLoginForm() {
                     localStorage.setItem(CONFIG.STORAGE_KEYS.USER_NAME, userData.name);
                     localStorage.setItem(CONFIG.STORAGE_KEYS.USER_EMAIL, userData.email);
                     localStorage.setItem(CONFIG.STORAGE_KEYS.USER_ROLE, userData.role);
+                    localStorage.setItem(CONFIG.STORAGE_KEYS.TOKEN, data.token);
                     
                     console.log('User role stored:', userData.role);
                     
@@ -190,8 +191,9 @@ async function loadDepartments() {
 // Check if user is already logged in
 function checkLoginStatus() {
     const userId = localStorage.getItem(CONFIG.STORAGE_KEYS.USER_ID);
+    const token = localStorage.getItem(CONFIG.STORAGE_KEYS.TOKEN);
     
-    if (userId) {
+    if (userId && token) {
         // User is already logged in, redirect to dashboard
         window.location.href = 'index.html';
     }
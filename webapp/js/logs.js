@@ -1,6 +1,9 @@
 // Logs Module
 
 const Logs = {
+    // Cursor for the next page of logs (null once everything is loaded)
+    nextCursor: null,
+    
     // Initialize logs module
     init() {
         this.setupEventListeners();
@@ -19,8 +22,8 @@ const Logs = {
         }
     },
     
-    // Load logs from API
-    async loadLogs() {
+    // Load logs from API (append=true fetches the next page)
+    async loadLogs(append = false) {
         if (!Auth.isLoggedIn()) {
             return;
         }
@@ -35,15 +38,20 @@ const Logs = {
         try {
             // Show loading state
             const tableBody = document.querySelector('#logsTable tbody');
-            tableBody.innerHTML = '<tr><td colspan="4" class="text-center">Loading logs...</td></tr>';
+            if (!append) {
+                tableBody.innerHTML = '<tr><td colspan="4" class="text-center">Loading logs...</td></tr>';
+            }
             
             // Get filter value
             const actionFilter = document.getElementById('logActionFilter')?.value || '';
             
             // Build query string
-            let queryString = '';
+            let queryString = `?limit=${CONFIG.PAGINATION.API_PAGE_SIZE}`;
             if (actionFilter) {
-                queryString = `?action=${actionFilter}`;
+                queryString += `&action=${actionFilter}`;
+            }
+            if (append && this.nextCursor) {
+                queryString += `&cursor=${encodeURIComponent(this.nextCursor)}`;
             }
             
             console.log('Loading logs with query:', queryString);
@@ -52,17 +60,18 @@ const Logs = {
             const url = `${CONFIG.API_URL}/logs${queryString}`;
             console.log('Fetching logs from URL:', url);
             
-            const response = await fetch(url, {
-                headers: Auth.getHeaders()
-            });
+            const result = await ApiService.fetch(url);
+            if (!result) return;
             
-            const data = await response.json();
+            const data = result.data;
             console.log('Logs response:', data);
             
-            if (response.ok) {
+            if (result.ok) {
                 // Handle empty or undefined logs array
                 const logs = data.logs || [];
-                this.renderLogs(logs);
+                this.nextCursor = data.next_cursor || null;
+                this.renderLogs(logs, append);
+                UI.setLoadMore(document.getElementById('logsTable'), this.nextCursor, () => this.loadLogs(true));
             } else {
                 UI.showToast(data.error || 'Failed to load logs', 'error');
                 
@@ -79,12 +88,14 @@ const Logs = {
         }
     },
     
-    // Render logs table
-    renderLogs(logs) {
+    // Render logs table (append=true adds rows below the current page)
+    renderLogs(logs, append = false) {
         const tableBody = document.querySelector('#logsTable tbody');
-        tableBody.innerHTML = '';
+        if (!append) {
+            tableBody.innerHTML = '';
+        }
         
-        if (!logs || logs.length === 0) {
+        if ((!logs || logs.length === 0) && !append) {
             const row = document.createElement('tr');
             const cell = document.createElement('td');
             cell.colSpan = 4;
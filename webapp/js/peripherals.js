@@ -1,6 +1,9 @@
 // Peripherals Module
 
 const Peripherals = {
+    // Cursor for the next page of peripherals (null once everything is loaded)
+    nextCursor: null,
+    
     // Initialize peripherals module
     init() {
         this.setupEventListeners();
@@ -24,26 +27,33 @@ const Peripherals = {
         });
     },
     
-    // Load peripherals from API
-    async loadPeripherals() {
+    // Load peripherals from API (append=true fetches the next page)
+    async loadPeripherals(append = false) {
         if (!Auth.isLoggedIn()) {
             return;
         }
         
         try {
-            const response = await fetch(`${CONFIG.API_URL}/peripherals`, {
-                headers: Auth.getHeaders()
-            });
+            let queryString = `?limit=${CONFIG.PAGINATION.API_PAGE_SIZE}`;
+            if (append && this.nextCursor) {
+                queryString += `&cursor=${encodeURIComponent(this.nextCursor)}`;
+            }
             
-            if (response.ok) {
-                const data = await response.json();
-                this.renderPeripherals(data.peripherals);
+            const result = await ApiService.fetch(`${CONFIG.API_URL}/peripherals${queryString}`);
+            if (!result) return;
+            
+            if (result.ok) {
+                const data = result.data;
+                this.nextCursor = data.next_cursor || null;
+                this.renderPeripherals(data.peripherals, append);
+                UI.setLoadMore(document.getElementById('peripheralsTable'), this.nextCursor, () => this.loadPeripherals(true));
                 
                 // Load systems for the assigned system dropdown
-                await this.loadSystemsForDropdown();
+                if (!append) {
+                    await this.loadSystemsForDropdown();
+                }
             } else {
-                const error = await response.json();
-                UI.showToast(error.error || 'Failed to load peripherals', 'error');
+                UI.showToast(result.data.error || 'Failed to load peripherals', 'error');
             }
         } catch (error) {
             console.error('Error loading peripherals:', error);
@@ -54,28 +64,43 @@ const Peripherals = {
     // Load systems for the assigned system dropdown
     async loadSystemsForDropdown() {
         try {
-            const response = await fetch(`${CONFIG.API_URL}/systems`, {
-                headers: Auth.getHeaders()
-            });
+            // The dropdown needs every system, so walk all pages
+            const systems = [];
+            let cursor = null;
             
-            if (response.ok) {
-                const data = await response.json();
-                const systemSelect = document.getElementById('assignedSystem');
+            do {
+                let url = `${CONFIG.API_URL}/systems?limit=500`;
+                if (cursor) {
+                    url += `&cursor=${encodeURIComponent(cursor)}`;
+                }
                 
-                // Populate system select
-                UI.populateSelect(systemSelect, data.systems, 'system_id', 'hostname', null);
-            }
+                const result = await ApiService.fetch(url);
+                if (!result || !result.ok) {
+                    break;
+                }
+                
+                const data = result.data;
+                systems.push(...data.systems);
+                cursor = data.next_cursor;
+            } while (cursor);
+            
+            const systemSelect = document.getElementById('assignedSystem');
+            
+            // Populate system select
+            UI.populateSelect(systemSelect, systems, 'system_id', 'hostname', null);
         } catch (error) {
             console.error('Error loading systems for dropdown:', error);
         }
     },
     
-    // Render peripherals table
-    renderPeripherals(peripherals) {
+    // Render peripherals table (append=true adds rows below the current page)
+    renderPeripherals(peripherals, append = false) {
         const tableBody = document.querySelector('#peripheralsTable tbody');
-        tableBody.innerHTML = '';
+        if (!append) {
+            tableBody.innerHTML = '';
+        }
         
-        if (peripherals.length === 0) {
+        if (peripherals.length === 0 && !append) {
             const row = document.createElement('tr');
             const cell = document.createElement('td');
             cell.colSpan = 5;
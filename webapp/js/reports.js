@@ -64,206 +64,109 @@ const Reports = {
             // Populate department filter for system report
             const systemReportDepartment = document.getElementById('systemReportDepartment');
             if (systemReportDepartment) {
-                UI.populateSelect(systemReportDepartment, departments, 'name', 'name');
+                UI.populateSelect(systemReportDepartment, departments, 'department_id', 'name');
             }
             
             // Populate network filter for system report
             const systemReportNetwork = document.getElementById('systemReportNetwork');
             if (systemReportNetwork) {
-                UI.populateSelect(systemReportNetwork, networks, 'name', 'name');
+                UI.populateSelect(systemReportNetwork, networks, 'network_id', 'name');
             }
         } catch (error) {
             console.error('Error loading report filters:', error);
         }
     },
     
-    // Export systems as PDF
-    async exportSystemsPDF() {
-        if (!Auth.isLoggedIn()) {
-            UI.showToast('You must be logged in to export reports', 'error');
-            return;
-        }
-        
-        // Only admin can export systems
-        console.log('Current user role for export:', Auth.currentUser.role);
-        if (Auth.currentUser.role !== 'Admin') {
-            UI.showToast('Only Admins can export systems', 'error');
-            return;
-        }
-        
+    // Queue an export job, wait for it to finish and download the PDF
+    async runExport(report, filters, label) {
         try {
-            // Get filter values
-            const department = document.getElementById('systemReportDepartment').value;
-            const network = document.getElementById('systemReportNetwork').value;
-            
-            // Build query string
-            let queryString = '';
-            if (department) {
-                queryString += `department=${department}`;
+            const started = await ApiService.reports.startExport(report, filters);
+            if (!started || !started.ok) {
+                UI.showToast((started && started.data && started.data.error) || `Failed to export ${label} report`, 'error');
+                return;
             }
             
-            if (network) {
-                if (queryString) queryString += '&';
-                queryString += `network=${network}`;
+            let job = started.data;
+            if (job.status !== 'done') {
+                UI.showToast(`Generating ${label} report...`, 'info');
             }
             
-            // Build URL with query parameters for headers
-            let url = `${CONFIG.API_URL}/export-systems`;
-            
-            // Add query parameters
-            const params = new URLSearchParams();
-            if (department) params.append('department', department);
-            if (network) params.append('network', network);
-            
-            // Add user ID and role as query parameters
-            params.append('user_id', Auth.currentUser.id);
-            params.append('user_role', Auth.currentUser.role);
-            
-            // Append parameters to URL
-            if (params.toString()) {
-                url += '?' + params.toString();
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, CONFIG.EXPORT_POLL_INTERVAL));
+                const polled = await ApiService.reports.getExport(job.job_id);
+                if (!polled || !polled.ok) {
+                    UI.showToast(`Failed to export ${label} report`, 'error');
+                    return;
+                }
+                job = polled.data;
             }
             
-            console.log('Exporting systems PDF with URL:', url);
-            
-            // Open in new window
-            window.open(url, '_blank');
+            if (job.status !== 'done') {
+                UI.showToast(`Failed to export ${label} report`, 'error');
+                return;
+            }
             
-            UI.showToast('Generating systems report...', 'info');
+            // The file is sent as an attachment, so this downloads it in place
+            const link = document.createElement('a');
+            link.href = ApiService.reports.getExportFileUrl(job.job_id);
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
         } catch (error) {
-            console.error('Error exporting systems PDF:', error);
-            UI.showToast('Failed to export systems report', 'error');
+            console.error(`Error exporting ${label} PDF:`, error);
+            UI.showToast(`Failed to export ${label} report`, 'error');
         }
     },
     
-    // Export complaints as PDF
-    async exportComplaintsPDF() {
+    // Check that the current user may export reports
+    canExport(what) {
         if (!Auth.isLoggedIn()) {
             UI.showToast('You must be logged in to export reports', 'error');
-            return;
+            return false;
         }
         
-        // Only admin can export complaints
         if (Auth.currentUser.role !== 'Admin') {
-            UI.showToast('Only Admins can export complaints', 'error');
-            return;
+            UI.showToast(`Only Admins can export ${what}`, 'error');
+            return false;
         }
+        return true;
+    },
+    
+    // Export systems as PDF
+    async exportSystemsPDF() {
+        if (!this.canExport('systems')) return;
         
-        try {
-            // Get filter values
-            const status = document.getElementById('complaintReportStatus').value;
-            const priority = document.getElementById('complaintReportPriority').value;
-            
-            // Prepare filters
-            const filters = {};
-            if (status) filters.status = status;
-            if (priority) filters.priority = priority;
-            
-            // Build URL with query parameters for headers
-            let url = `${CONFIG.API_URL}/export-complaints`;
-            
-            // Add query parameters
-            const params = new URLSearchParams();
-            if (status) params.append('status', status);
-            if (priority) params.append('priority', priority);
-            
-            // Add user ID and role as query parameters
-            params.append('user_id', Auth.currentUser.id);
-            params.append('user_role', Auth.currentUser.role);
-            
-            // Append parameters to URL
-            if (params.toString()) {
-                url += '?' + params.toString();
-            }
-            
-            console.log('Exporting complaints PDF with URL:', url);
-            
-            // Open in new window
-            window.open(url, '_blank');
-            
-            UI.showToast('Generating complaints report...', 'info');
-        } catch (error) {
-            console.error('Error exporting complaints PDF:', error);
-            UI.showToast('Failed to export complaints report', 'error');
-        }
+        const filters = {};
+        const department = document.getElementById('systemReportDepartment').value;
+        const network = document.getElementById('systemReportNetwork').value;
+        if (department) filters.department_id = department;
+        if (network) filters.network_id = network;
+        
+        await this.runExport('systems', filters, 'systems');
     },
     
-    // Export peripherals as PDF
-    async exportPeripheralsPDF() {
-        if (!Auth.isLoggedIn()) {
-            UI.showToast('You must be logged in to export reports', 'error');
-            return;
-        }
+    // Export complaints as PDF
+    async exportComplaintsPDF() {
+        if (!this.canExport('complaints')) return;
         
-        // Only admin can export peripherals
-        console.log('Current user role for export:', Auth.currentUser.role);
-        if (Auth.currentUser.role !== 'Admin') {
-            UI.showToast('Only Admins can export peripherals', 'error');
-            return;
-        }
+        const filters = {};
+        const status = document.getElementById('complaintReportStatus').value;
+        const priority = document.getElementById('complaintReportPriority').value;
+        if (status) filters.status = status;
+        if (priority) filters.priority = priority;
         
-        try {
-            // Build URL with query parameters for headers
-            let url = `${CONFIG.API_URL}/export/peripherals`;
-            
-            // Add user ID and role as query parameters
-            const params = new URLSearchParams();
-            params.append('user_id', Auth.currentUser.id);
-            params.append('user_role', Auth.currentUser.role);
-            
-            // Append parameters to URL
-            if (params.toString()) {
-                url += '?' + params.toString();
-            }
-            
-            console.log('Exporting peripherals PDF with URL:', url);
-            
-            // Open in new window
-            window.open(url, '_blank');
-            
-            UI.showToast('Generating peripherals report...', 'info');
-        } catch (error) {
-            console.error('Error exporting peripherals PDF:', error);
-            UI.showToast('Failed to export peripherals report', 'error');
-        }
+        await this.runExport('complaints', filters, 'complaints');
+    },
+    
+    // Export peripherals as PDF
+    async exportPeripheralsPDF() {
+        if (!this.canExport('peripherals')) return;
+        await this.runExport('peripherals', {}, 'peripherals');
     },
     
     // Export logs as PDF
     async exportLogsPDF() {
-        if (!Auth.isLoggedIn()) {
-            UI.showToast('You must be logged in to export reports', 'error');
-            return;
-        }
-        
-        // Only admin can export logs
-        if (Auth.currentUser.role !== 'Admin') {
-            UI.showToast('Only Admins can export logs', 'error');
-            return;
-        }
-        
-        try {
-            // Build URL with query parameters for headers
-            let url = `${CONFIG.API_URL}/export-logs`;
-            
-            // Add user ID and role as query parameters
-            const params = new URLSearchParams();
-            params.append('user_id', Auth.currentUser.id);
-            params.append('user_role', Auth.currentUser.role);
-            
-            // Append parameters to URL
-            if (params.toString()) {
-                url += '?' + params.toString();
-            }
-            
-            console.log('Exporting logs PDF with URL:', url);
-            
-            // Open in new window
-            window.open(url, '_blank');
-            
-            UI.showToast('Generating logs report...', 'info');
-        } catch (error) {
-            console.error('Error exporting logs PDF:', error);
-            UI.showToast('Failed to export logs report', 'error');
-        }
+        if (!this.canExport('logs')) return;
+        await this.runExport('logs', {}, 'logs');
     }
-};
\ No newline at end of file
+};
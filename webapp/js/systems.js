@@ -1,6 +1,9 @@
 // Systems Module
 
 const Systems = {
+    // Cursor for the next page of systems (null once everything is loaded)
+    nextCursor: null,
+    
     // Initialize systems module
     init() {
         this.setupEventListeners();
@@ -36,8 +39,8 @@ const Systems = {
         });
     },
     
-    // Load systems from API
-    async loadSystems() {
+    // Load systems from API (append=true fetches the next page)
+    async loadSystems(append = false) {
         if (!Auth.isLoggedIn()) {
             return;
         }
@@ -58,18 +61,27 @@ const Systems = {
                 queryString += `network=${networkFilter}`;
             }
             
+            // Page through results instead of downloading the whole table
+            if (queryString) queryString += '&';
+            queryString += `limit=${CONFIG.PAGINATION.API_PAGE_SIZE}`;
+            if (append && this.nextCursor) {
+                queryString += `&cursor=${encodeURIComponent(this.nextCursor)}`;
+            }
+            
             // Fetch systems
             const url = `${CONFIG.API_URL}/systems${queryString ? '?' + queryString : ''}`;
-            const response = await fetch(url, {
-                headers: Auth.getHeaders()
-            });
+            // ApiService revalidates with the cached ETag, so an unchanged
+            // list comes back as a 304 instead of the full body
+            const result = await ApiService.fetch(url);
+            if (!result) return;
             
-            if (response.ok) {
-                const data = await response.json();
-                this.renderSystems(data.systems);
+            if (result.ok) {
+                const data = result.data;
+                this.nextCursor = data.next_cursor || null;
+                this.renderSystems(data.systems, append);
+                UI.setLoadMore(document.getElementById('systemsTable'), this.nextCursor, () => this.loadSystems(true));
             } else {
-                const error = await response.json();
-                UI.showToast(error.error || 'Failed to load systems', 'error');
+                UI.showToast(result.data.error || 'Failed to load systems', 'error');
             }
         } catch (error) {
             console.error('Error loading systems:', error);
@@ -120,12 +132,14 @@ const Systems = {
         }
     },
     
-    // Render systems table
-    renderSystems(systems) {
+    // Render systems table (append=true adds rows below the current page)
+    renderSystems(systems, append = false) {
         const tableBody = document.querySelector('#systemsTable tbody');
-        tableBody.innerHTML = '';
+        if (!append) {
+            tableBody.innerHTML = '';
+        }
         
-        if (systems.length === 0) {
+        if (systems.length === 0 && !append) {
             const row = document.createElement('tr');
             const cell = document.createElement('td');
             cell.colSpan = 6;
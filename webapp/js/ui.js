@@ -115,6 +115,26 @@ const UI = {
         return window.confirm(message);
     },
     
+    // Show a "Load more" button under a cursor-paged table while more pages remain
+    setLoadMore(table, nextCursor, onLoadMore) {
+        let button = table.parentElement.querySelector(`.load-more[data-table="${table.id}"]`);
+        
+        if (!button) {
+            button = document.createElement('button');
+            button.className = 'btn-secondary load-more';
+            button.dataset.table = table.id;
+            button.textContent = 'Load more';
+            table.insertAdjacentElement('afterend', button);
+        }
+        
+        button.disabled = false;
+        button.onclick = () => {
+            button.disabled = true;
+            onLoadMore();
+        };
+        button.classList.toggle('hidden', !nextCursor);
+    },
+    
     // Load data into a select element
     populateSelect(selectElement, options, valueKey, textKey, selectedValue = null) {
         // Clear existing options